@@ -0,0 +1,99 @@
+"""
+LoggerUtil 初始化开销基准测试
+
+测试模块在顶层创建 LoggerUtil() 实例（如 tests/test_work/test_01_case_api.py），
+收集阶段就会执行这行代码。本脚本在全新的子进程中分别测量：
+- lazy: 只创建 LoggerUtil() 实例（现在的行为：不建目录、不开文件、不启动线程）
+- eager: 创建实例并立即初始化日志系统（原来导入模块时就会发生的开销）
+
+另外测量对 test_01_case_api.py 执行 pytest --collect-only 的总耗时。
+
+运行方式（在项目根目录执行）：
+    python -m benchmarks.bench_collection
+    python -m benchmarks.bench_collection --rounds 20
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 子进程中执行的代码：日志目录指向临时目录，避免污染项目的logs目录
+SNIPPET = """
+import sys, time, threading
+from src.config.settings import Settings
+Settings().LOG_DIR = __import__("pathlib").Path(sys.argv[2])
+start = time.perf_counter()
+from src.utils.logger import LoggerUtil
+logger = LoggerUtil()
+if sys.argv[1] == "eager":
+    logger.get_logger()
+elapsed = time.perf_counter() - start
+print(elapsed, threading.active_count())
+"""
+
+
+def _measure_import(mode: str, rounds: int):
+    """
+    在全新子进程中测量导入并创建 LoggerUtil 的耗时
+
+    @param mode lazy 或 eager
+    @param rounds 重复次数
+    @return tuple (耗时列表, 线程数)
+    """
+    timings, threads = [], 0
+    for _ in range(rounds):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = subprocess.run(
+                [sys.executable, "-c", SNIPPET, mode, str(Path(tmp) / "logs")],
+                cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+            ).stdout.split()
+        timings.append(float(out[0]))
+        threads = int(out[1])
+    return timings, threads
+
+
+def _measure_collect(rounds: int):
+    """
+    测量对 test_01_case_api.py 执行 pytest --collect-only 的总耗时
+
+    @param rounds 重复次数
+    @return list 耗时列表
+    """
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "pytest", "--collect-only", "-q",
+             "tests/test_work/test_01_case_api.py"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LoggerUtil 初始化开销基准测试")
+    parser.add_argument("--rounds", type=int, default=10, help="每种模式重复的次数")
+    args = parser.parse_args()
+
+    print(f"{'模式':<8}{'中位数(ms)':>14}{'最小值(ms)':>14}{'线程数':>10}")
+    for mode in ("lazy", "eager"):
+        timings, threads = _measure_import(mode, args.rounds)
+        print(f"{mode:<8}{statistics.median(timings) * 1000:>14.2f}"
+              f"{min(timings) * 1000:>14.2f}{threads:>10}")
+
+    timings = _measure_collect(args.rounds)
+    print(f"pytest --collect-only test_01_case_api.py 中位数: {statistics.median(timings) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
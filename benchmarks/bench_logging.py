@@ -0,0 +1,119 @@
+"""
+日志吞吐量基准测试
+
+对比两种日志配置下调用方记录日志的耗时：
+- sync: 原来的同步配置，StreamHandler + FileHandler 直接挂在日志器上
+- queue: 现在 LoggerUtil 使用的配置，处理器挂在 QueueListener 后台线程上
+
+运行方式（在项目根目录执行）：
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --count 50000
+
+输出中的 "调用方耗时" 是测试代码真正等待的时间，
+"含落盘耗时" 额外包含等待后台线程把队列写完的时间。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils.logger import _EnqueueHandler
+
+# 与 LoggerUtil 相同的日志格式
+FORMAT = '%(asctime)s | %(levelname)-8s | %(name)s | %(message)s'
+DATEFMT = '%Y-%m-%d %H:%M:%S'
+
+
+def _build_handlers(log_file: Path, stream):
+    """
+    创建控制台和文件处理器
+
+    @param log_file 日志文件路径
+    @param stream 控制台输出流（基准测试中使用空设备）
+    @return list 处理器列表
+    """
+    formatter = logging.Formatter(fmt=FORMAT, datefmt=DATEFMT)
+    console_handler = logging.StreamHandler(stream)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(formatter)
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(formatter)
+    return [console_handler, file_handler]
+
+
+def _run(mode: str, count: int, payload: dict, workdir: Path, stream):
+    """
+    执行一轮基准测试
+
+    @param mode sync 或 queue
+    @param count 日志条数
+    @param payload 每条日志携带的数据（模拟记录整段接口响应）
+    @param workdir 临时目录
+    @param stream 控制台输出流
+    @return tuple (调用方耗时, 含落盘耗时)
+    """
+    logger = logging.getLogger(f"bench_{mode}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handlers = _build_handlers(workdir / f"{mode}.log", stream)
+    listener = None
+
+    if mode == "sync":
+        for handler in handlers:
+            logger.addHandler(handler)
+    else:
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(_EnqueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        listener.start()
+
+    start = time.perf_counter()
+    for i in range(count):
+        logger.info('获取到的设备配置信息:%s', payload)
+    caller_elapsed = time.perf_counter() - start
+
+    if listener is not None:
+        listener.stop()
+    for handler in handlers:
+        handler.flush()
+        handler.close()
+    total_elapsed = time.perf_counter() - start
+
+    logger.handlers.clear()
+    return caller_elapsed, total_elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LoggerUtil 日志吞吐量基准测试")
+    parser.add_argument("--count", type=int, default=20000, help="每轮记录的日志条数")
+    args = parser.parse_args()
+
+    # 模拟 test_03_get_device_conf 中记录的整段响应
+    payload = {
+        "code": 200,
+        "data": {"deviceId": "223345", "config": {f"key_{i}": i for i in range(50)}},
+        "msg": "成功",
+        "status": True,
+    }
+
+    print(f"日志条数: {args.count}")
+    print(f"{'模式':<8}{'调用方耗时(s)':>16}{'调用方吞吐(条/s)':>20}{'含落盘耗时(s)':>16}")
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        for mode in ("sync", "queue"):
+            caller, total = _run(mode, args.count, payload, Path(tmp), devnull)
+            print(f"{mode:<8}{caller:>16.3f}{args.count / caller:>20.0f}{total:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
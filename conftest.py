@@ -30,6 +30,23 @@ def add_src_to_path():
 add_src_to_path()
 
 
+# ========================================
+# 插件注册 - 加载src/plugins下的项目插件
+# ========================================
+pytest_plugins = [
+    "src.plugins.logging_plugin",
+    "src.plugins.data_plugin",
+    "src.plugins.benchmark_plugin",
+    "src.plugins.profiler_plugin",
+    "src.plugins.memory_plugin",
+    "src.plugins.timeline_plugin",
+    "src.plugins.scheduling_plugin",
+    "src.plugins.distributed_plugin",
+    "src.plugins.impact_plugin",
+    "src.plugins.result_cache_plugin",
+]
+
+
 # ========================================
 # 全局Fixtures
 # ========================================
@@ -116,6 +133,25 @@ def test_data_file(settings):
     return settings.TEST_DATA_FILE
 
 
+@pytest.fixture(scope="session")
+def test_data(settings):
+    """
+    测试数据fixture
+
+    每个进程只解析一次 data/test_data.json，所有测试共享同一份只读数据。
+    需要修改数据时先用 src.utils.readonly.thaw() 复制一份。
+
+    使用示例：
+        def test_user(test_data):
+            assert test_data["users"][0]["name"] == "Alice"
+
+    @param settings 全局配置对象
+    @return ReadOnlyDict 测试数据的只读视图
+    """
+    from src.utils.data_loader import DataLoader
+    return DataLoader().load(settings.TEST_DATA_FILE)
+
+
 @pytest.fixture
 def temp_dir(tmp_path):
     """
@@ -163,6 +199,28 @@ def sample_post():
     }
 
 
+@pytest.fixture
+def data_factory(settings):
+    """
+    批量测试数据工厂
+
+    用于需要大量用户/帖子数据的容量测试，按批生成，内存占用不随数据量增长。
+    使用固定的随机种子，每个测试拿到的数据都相同。
+
+    使用示例：
+        def test_bulk(data_factory, tmp_path):
+            data_factory.write_jsonl(tmp_path / "users.jsonl", "users", 100_000)
+            for batch in data_factory.posts(10_000):
+                ...
+
+    @param settings 全局配置对象
+    @return DataFactory 数据工厂
+    """
+    pytest.importorskip("numpy", reason="数据工厂需要安装numpy")
+    from src.utils.data_factory import DataFactory
+    return DataFactory(seed=settings.DATA_FACTORY_SEED)
+
+
 # ========================================
 # Playwright测试Fixtures
 # ========================================
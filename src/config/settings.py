@@ -75,6 +75,21 @@ class Settings:
         # 测试数据文件
         self.TEST_DATA_FILE = self.DATA_DIR / "test_data.json"
 
+        # 数据文件超过该字节数时通过内存映射读取（0表示不使用内存映射）
+        self.DATA_MMAP_THRESHOLD = 8 * 1024 * 1024
+
+        # 是否把 DATA_DIR 下的数据文件解析结果编译为二进制缓存
+        self.DATA_CACHE = True
+
+        # 测试数据二进制缓存目录
+        self.DATA_CACHE_DIR = self.BASE_DIR / ".data_cache"
+
+        # 测试数据缓存格式：pickle、msgpack（需安装msgpack）
+        self.DATA_CACHE_FORMAT = "pickle"
+
+        # 测试数据工厂（data_factory fixture）的随机种子，固定种子保证每次生成的数据相同
+        self.DATA_FACTORY_SEED = 20250101
+
         # ========================================
         # 报告配置
         # ========================================
@@ -84,6 +99,100 @@ class Settings:
         # 截图保存目录
         self.SCREENSHOT_DIR = self.BASE_DIR / "screenshots"
 
+        # ========================================
+        # 基准测试配置
+        # ========================================
+        # 每个基准测试计时的总时长目标（秒），也可通过 --benchmark-max-time 命令行参数设置
+        self.BENCHMARK_MAX_TIME = 1.0
+
+        # 每个基准测试的最少轮数，也可通过 --benchmark-min-rounds 命令行参数设置
+        self.BENCHMARK_MIN_ROUNDS = 5
+
+        # 正式计时前的预热时长（秒，0表示不预热）
+        self.BENCHMARK_WARMUP_TIME = 0.1
+
+        # 计时期间是否关闭垃圾回收，也可通过 --benchmark-disable-gc 命令行参数开启
+        self.BENCHMARK_DISABLE_GC = False
+
+        # 基准测试结果存储目录（--benchmark-save 保存，--benchmark-compare 对比）
+        self.BENCHMARK_STORAGE = self.BASE_DIR / ".benchmarks"
+
+        # 中位数变慢超过该比例且差异显著时判定为性能退化，也可通过 --benchmark-compare-fail 命令行参数设置
+        self.BENCHMARK_REGRESSION_THRESHOLD = 0.10
+
+        # 判定差异显著的显著性水平（Mann-Whitney U 检验的p值）
+        self.BENCHMARK_ALPHA = 0.05
+
+        # ========================================
+        # 性能分析配置
+        # ========================================
+        # --fixture-durations 报告中，构建+清理总耗时不低于该值（秒）的fixture才给出作用域建议
+        self.PROFILE_SCOPE_HINT_SECONDS = 0.05
+
+        # CPU性能分析（@pytest.mark.profile、--profile）结果的输出目录
+        self.PROFILE_DIR = self.REPORT_DIR / "profiles"
+
+        # 内存跟踪（--memory-track）：测试结束后留存增长超过该值（KB）判定为疑似泄漏，
+        # 也可通过 --memory-leak-threshold 命令行参数设置
+        self.MEMORY_LEAK_THRESHOLD_KB = 1024
+        # 疑似泄漏的测试列出的分配位置数
+        self.MEMORY_TOP_SITES = 5
+        # tracemalloc 记录的调用栈深度，越深越容易定位，开销也越大
+        self.MEMORY_TRACE_DEPTH = 10
+
+        # 时间线（--timeline）默认保存位置，Chrome Trace Event JSON
+        self.TIMELINE_FILE = self.REPORT_DIR / "timeline.json"
+
+        # ========================================
+        # 测试调度配置
+        # ========================================
+        # 测试耗时历史和上次失败的测试（--schedule-by-duration 按它调度xdist）
+        self.DURATION_STORE = self.BASE_DIR / ".test_durations.json"
+
+        # 耗时按指数加权移动平均更新，新耗时的权重
+        self.DURATION_EWMA_ALPHA = 0.3
+
+        # 分片（--shard=i/n）清单的保存目录
+        self.SHARD_DIR = self.REPORT_DIR / "shards"
+
+        # 分布式运行（--coordinator、--worker）的默认地址
+        self.DIST_ADDRESS = "127.0.0.1:8765"
+
+        # worker每次从共享队列预留的工作单元数上限（剩余的单元少时自动减小）
+        self.DIST_BATCH_SIZE = 4
+
+        # worker连接协调者的最长等待时间（秒），协调者还在收集测试时worker会重试
+        self.DIST_CONNECT_TIMEOUT = 30
+
+        # 没有可领取的单元、但别的worker还有没执行完的单元时，空闲worker再次领取的间隔（秒）
+        self.DIST_POLL_INTERVAL = 0.5
+
+        # --spawn-workers 启动的worker进程的输出日志目录
+        self.DIST_LOG_DIR = self.REPORT_DIR / "workers"
+
+        # 测试影响分析（--impact-record、--impact-select）的依赖映射数据库
+        self.IMPACT_DB = self.BASE_DIR / ".test_impact.db"
+
+        # 不记录为依赖的文件（相对于项目根目录的fnmatch模式，* 可以匹配多级目录）
+        # logger.py 在每个测试开始时都由日志插件调用，记录下来会让所有测试都依赖它
+        self.IMPACT_IGNORED = [".*", "*/__pycache__/*", "reports/*", "logs/*", "src/utils/logger.py"]
+
+        # 改动后影响所有测试的文件，--impact-select 遇到时运行全部测试
+        self.IMPACT_RUN_ALL = [
+            "conftest.py", "*/conftest.py", "pytest.ini", "requirements.txt", "src/plugins/*", "src/config/*",
+        ]
+
+        # 映射中没有的测试超过这个比例时认为映射已过期，运行全部测试
+        self.IMPACT_MAX_UNKNOWN_RATIO = 0.5
+
+        # 结果缓存（--result-cache）：通过的测试的指纹
+        self.RESULT_CACHE_FILE = self.BASE_DIR / ".test_results_cache.json"
+
+        # 不缓存结果的测试：带这些标记的、使用这些fixture的、测试模块导入了这些库的（结果依赖网络、浏览器或计时）
+        self.RESULT_CACHE_EXCLUDED_MARKERS = ["api", "ui", "network", "profile"]
+        self.RESULT_CACHE_EXCLUDED_FIXTURES = ["page", "browser", "context", "benchmark", "timer"]
+        self.RESULT_CACHE_EXCLUDED_IMPORTS = ["requests", "httpx", "playwright", "selenium", "webdriver_manager"]
+
         # ========================================
         # 日志配置
         # ========================================
@@ -93,6 +202,47 @@ class Settings:
         # 日志文件
         self.LOG_FILE = self.BASE_DIR / "logs" / "test.log"
 
+        # 日志目录
+        self.LOG_DIR = self.BASE_DIR / "logs"
+
+        # 是否额外输出结构化JSON-lines日志（也可通过 --log-json 命令行参数开启）
+        self.LOG_JSON = False
+
+        # 单个日志文件的最大字节数，超过后轮转（0表示只按日期轮转）
+        self.LOG_MAX_BYTES = 100 * 1024 * 1024
+
+        # 最多保留的历史日志分段数量（0表示不限制）
+        self.LOG_BACKUP_COUNT = 50
+
+        # 历史日志分段保留天数（0表示不限制）
+        self.LOG_RETENTION_DAYS = 7
+
+        # 历史日志分段的压缩方式：gzip、zstd（需安装zstandard）、none
+        self.LOG_COMPRESSION = "gzip"
+
+        # 本次测试会话的ID，由日志插件在会话开始时生成；xdist worker的日志文件名中带有它，
+        # 会话结束时只合并本次会话的worker日志
+        self.LOG_RUN_ID = None
+
+        # 是否为日志建立离线索引（轮转时和会话结束时），用于 python -m src.utils.log_index query 快速查询
+        self.LOG_INDEX = True
+
+        # 是否只在测试失败时输出DEBUG日志（也可通过 --log-failure-only 命令行参数开启）
+        self.LOG_FAILURE_ONLY = False
+
+        # 失败时才输出DEBUG日志模式下，每个测试最多缓存的日志条数
+        self.LOG_RING_CAPACITY = 2000
+
+        # 同一调用点在 LOG_RATE_WINDOW 秒内最多输出的日志条数（0表示不限流，默认不限流）
+        # 轮询、压测循环刷屏时再开启，如 50
+        self.LOG_RATE_LIMIT = 0
+
+        # 限流时间窗口（秒）
+        self.LOG_RATE_WINDOW = 1.0
+
+        # 同一调用点相同消息的去重时间窗口（秒），窗口内的重复消息折叠为一条汇总（0表示不去重，默认不去重）
+        self.LOG_DEDUP_WINDOW = 0
+
     def _get_base_dir(self):
         """
         获取项目根目录
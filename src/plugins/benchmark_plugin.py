@@ -0,0 +1,283 @@
+"""
+基准测试插件
+
+提供 benchmark fixture（见 src/utils/benchmark.py），并在测试结束时汇总所有基准测试结果：
+
+    def test_parse(benchmark):
+        result = benchmark(json.loads, text)
+
+    @pytest.mark.benchmark(max_time=0.2, min_rounds=10, disable_gc=True)
+    def test_fast(benchmark):
+        benchmark(func)
+
+- 默认参数来自 Settings 的基准测试配置，可以被命令行参数覆盖，
+  单个测试可以用 benchmark 标记覆盖
+- --benchmark-disable 只调用一次被测函数、不计时，用于快速验证测试逻辑
+- xdist并行时各worker的结果通过 workeroutput 传回主进程一起汇总
+- --benchmark-save 把结果连同机器信息保存到 Settings.BENCHMARK_STORAGE
+- --benchmark-compare 与保存的基线对比，输出变化表；有显著的性能退化时本次运行失败
+  （判定规则见 src/utils/benchmark_store.py）
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import pytest
+
+# 结果在config上的stash键：[BenchmarkStats字典, ...]
+BENCHMARK_RESULTS = pytest.StashKey[list]()
+# 与基线对比的结果：(基线信息, [Comparison, ...])
+BENCHMARK_COMPARISON = pytest.StashKey[tuple]()
+# 本次结果保存的文件
+BENCHMARK_SAVED = pytest.StashKey[object]()
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_benchmark", "benchmark基准测试")
+    group.addoption(
+        "--benchmark-max-time",
+        type=float,
+        default=None,
+        help="每个基准测试计时的总时长目标（秒），默认见 Settings.BENCHMARK_MAX_TIME",
+    )
+    group.addoption(
+        "--benchmark-min-rounds",
+        type=int,
+        default=None,
+        help="每个基准测试的最少轮数，默认见 Settings.BENCHMARK_MIN_ROUNDS",
+    )
+    group.addoption(
+        "--benchmark-disable-gc",
+        action="store_true",
+        default=False,
+        help="计时期间关闭垃圾回收",
+    )
+    group.addoption(
+        "--benchmark-disable",
+        action="store_true",
+        default=False,
+        help="只调用一次被测函数，不计时",
+    )
+    group.addoption(
+        "--benchmark-save",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="NAME",
+        help="保存本次基准测试结果，可以附加一个名称",
+    )
+    group.addoption(
+        "--benchmark-compare",
+        nargs="?",
+        const="latest",
+        default=None,
+        metavar="REF",
+        help="与保存的结果对比：编号或文件路径，默认最近一次",
+    )
+    group.addoption(
+        "--benchmark-compare-fail",
+        type=float,
+        default=None,
+        metavar="PERCENT",
+        help="中位数变慢超过该百分比且差异显著时运行失败，默认见 Settings.BENCHMARK_REGRESSION_THRESHOLD",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子 - 注册标记，把命令行参数写入Settings
+
+    @param config pytest配置对象
+    """
+    from src.config.settings import Settings
+    config.addinivalue_line(
+        "markers",
+        "benchmark(max_time=None, min_rounds=None, warmup_time=None, disable_gc=None): 覆盖单个基准测试的参数",
+    )
+    config.stash[BENCHMARK_RESULTS] = []
+    settings = Settings()
+    if config.getoption("benchmark_max_time") is not None:
+        settings.BENCHMARK_MAX_TIME = config.getoption("benchmark_max_time")
+    if config.getoption("benchmark_min_rounds") is not None:
+        settings.BENCHMARK_MIN_ROUNDS = config.getoption("benchmark_min_rounds")
+    if config.getoption("benchmark_disable_gc"):
+        settings.BENCHMARK_DISABLE_GC = True
+    if config.getoption("benchmark_compare_fail") is not None:
+        settings.BENCHMARK_REGRESSION_THRESHOLD = config.getoption("benchmark_compare_fail") / 100
+
+
+@pytest.fixture
+def benchmark(request):
+    """
+    基准测试fixture
+
+    使用示例：
+        def test_parse(benchmark):
+            result = benchmark(json.loads, '{"a": 1}')
+            assert result == {"a": 1}
+
+        def test_block(benchmark):
+            with benchmark:
+                do_something()
+
+    @param request pytest请求对象
+    @return Benchmark 基准测试计时器
+    """
+    from src.config.settings import Settings
+    from src.utils.benchmark import Benchmark
+
+    settings = Settings()
+    options = {
+        "max_time": settings.BENCHMARK_MAX_TIME,
+        "min_rounds": settings.BENCHMARK_MIN_ROUNDS,
+        "warmup_time": settings.BENCHMARK_WARMUP_TIME,
+        "disable_gc": settings.BENCHMARK_DISABLE_GC,
+    }
+    marker = request.node.get_closest_marker("benchmark")
+    if marker is not None:
+        unknown = set(marker.kwargs) - set(options)
+        if unknown:
+            raise ValueError(f"benchmark 标记不支持的参数: {', '.join(sorted(unknown))}")
+        options.update({key: value for key, value in marker.kwargs.items() if value is not None})
+
+    bench = Benchmark(
+        request.node.nodeid,
+        disabled=request.config.getoption("benchmark_disable"),
+        **options,
+    )
+    yield bench
+    if bench.stats is not None:
+        request.config.stash[BENCHMARK_RESULTS].append(bench.stats.as_dict())
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """
+    测试会话结束钩子 - 保存并对比基准测试结果
+
+    xdist的worker只把结果放进workeroutput；主进程此时已经收集到所有worker的结果，
+    先与基线对比（对比的是保存之前的最近一次结果），再保存本次结果。
+    有性能退化时把退出状态改为测试失败。
+
+    @param session pytest会话对象
+    @param exitstatus 退出状态码
+    """
+    config = session.config
+    if hasattr(config, "workerinput"):
+        config.workeroutput["benchmark_results"] = config.stash[BENCHMARK_RESULTS]
+        return
+    results = config.stash[BENCHMARK_RESULTS]
+    compare_ref = config.getoption("benchmark_compare")
+    save_name = config.getoption("benchmark_save")
+    if not results or config.getoption("benchmark_disable"):
+        return
+
+    from src.config.settings import Settings
+    from src.utils.benchmark_store import compare_runs, load_run, save_run
+    settings = Settings()
+    if compare_ref is not None:
+        try:
+            baseline = load_run(settings.BENCHMARK_STORAGE, compare_ref)
+        except FileNotFoundError as e:
+            config.stash[BENCHMARK_COMPARISON] = (str(e), [])
+        else:
+            comparisons = compare_runs(
+                baseline["benchmarks"], results,
+                settings.BENCHMARK_REGRESSION_THRESHOLD, settings.BENCHMARK_ALPHA,
+            )
+            config.stash[BENCHMARK_COMPARISON] = (baseline, comparisons)
+            if any(item.status == "regression" for item in comparisons):
+                session.exitstatus = pytest.ExitCode.TESTS_FAILED
+    if save_name is not None:
+        path = save_run(settings.BENCHMARK_STORAGE, results, save_name or None)
+        config.stash[BENCHMARK_SAVED] = path
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+    xdist worker结束钩子 - 收集worker的基准测试结果
+
+    @param node worker节点
+    @param error worker异常退出时的错误信息
+    """
+    results = getattr(node, "workeroutput", {}).get("benchmark_results", [])
+    node.config.stash[BENCHMARK_RESULTS].extend(results)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """
+    终端汇总钩子 - 输出基准测试结果表
+
+    @param terminalreporter 终端输出对象
+    @param exitstatus 退出状态码
+    @param config pytest配置对象
+    """
+    results = config.stash.get(BENCHMARK_RESULTS, [])
+    if not results:
+        return
+    from src.utils.benchmark import format_time
+
+    terminalreporter.section("benchmark")
+    terminalreporter.write_line(
+        f"{'测试':<48} {'min':>11} {'median':>11} {'IQR':>11} {'离群':>6} {'轮数':>8} {'每轮次数':>8}"
+    )
+    for result in sorted(results, key=lambda item: item["median"]):
+        terminalreporter.write_line(
+            f"{_short_name(result['name']):<50} {format_time(result['min']):>11} {format_time(result['median']):>11} "
+            f"{format_time(result['iqr']):>11} {result['outliers']:>8} {result['rounds']:>10} "
+            f"{result['iterations']:>12}"
+        )
+
+    if BENCHMARK_SAVED in config.stash:
+        terminalreporter.write_line(f"结果已保存: {config.stash[BENCHMARK_SAVED]}")
+    if BENCHMARK_COMPARISON in config.stash:
+        _report_comparison(terminalreporter, config)
+
+
+def _report_comparison(terminalreporter, config):
+    """
+    输出与基线的对比表
+
+    @param terminalreporter 终端输出对象
+    @param config pytest配置对象
+    """
+    from src.config.settings import Settings
+    from src.utils.benchmark_store import format_comparisons, machine_id, machine_info
+
+    baseline, comparisons = config.stash[BENCHMARK_COMPARISON]
+    terminalreporter.section("benchmark 对比")
+    if isinstance(baseline, str):
+        terminalreporter.write_line(baseline, yellow=True)
+        return
+    settings = Settings()
+    commit = (baseline["machine_info"].get("commit") or "-")[:10]
+    terminalreporter.write_line(f"基线: {baseline['path']}（{baseline['datetime']}，commit {commit}）")
+    if machine_id(baseline["machine_info"]) != machine_id(machine_info()):
+        terminalreporter.write_line("警告: 基线来自不同的机器环境，对比结果仅供参考", yellow=True)
+    terminalreporter.write_line(
+        f"判定规则: 中位数变慢超过 {settings.BENCHMARK_REGRESSION_THRESHOLD:.0%} "
+        f"且 Mann-Whitney U 检验 p < {settings.BENCHMARK_ALPHA}"
+    )
+    for line in format_comparisons(comparisons):
+        terminalreporter.write_line(line, red=line.endswith("regression"), green=line.endswith("improvement"))
+    regressions = sum(1 for item in comparisons if item.status == "regression")
+    if regressions:
+        terminalreporter.write_line(f"{regressions} 个基准测试性能退化，本次运行失败", red=True, bold=True)
+
+
+def _short_name(nodeid: str, width: int = 50) -> str:
+    """
+    缩短测试用例ID以便在表格中显示，保留末尾的类名和函数名
+
+    @param nodeid 测试用例ID
+    @param width 最大宽度
+    @return str 缩短后的ID
+    """
+    if len(nodeid) <= width:
+        return nodeid
+    return "..." + nodeid[-(width - 3):]
@@ -0,0 +1,172 @@
+"""
+数据驱动参数化插件
+
+提供 parametrize_from_file 标记，从数据文件中读取测试数据进行参数化：
+
+    @pytest.mark.parametrize_from_file("cases/add_cases.jsonl", id_field="name")
+    def test_add(data_row):
+        assert data_row["a"] + data_row["b"] == data_row["expected"]
+
+- 数据文件路径相对于 Settings.DATA_DIR，也可以是绝对路径
+- 支持 .jsonl、.csv、.json（顶层为数组）三种格式，见 src/utils/data_rows.py
+- 收集阶段流式扫描文件，每个参数只保存数据所在的字节位置（RowRef）
+- 测试执行时由 data_row fixture 按位置读取并解析这一条数据
+- 测试ID默认为 row0、row1 ...；指定 id_field 时使用该字段的值
+  （扫描的同时从读到的内容中解析出该字段，解析结果随即丢弃，不会逐条重新读文件）
+
+测试结束时在终端汇总 DataLoader 加载测试数据的来源（解析原文件/二进制缓存）和耗时，
+xdist并行时各worker的统计通过 workeroutput 传回主进程一起汇总。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import unicodedata
+from pathlib import Path
+
+import pytest
+
+# 测试数据加载统计在config上的stash键：[{path, source, seconds, parse_seconds, worker}, ...]
+DATA_LOAD_STATS = pytest.StashKey[list]()
+
+# 加载统计表的列 (显示宽度, 对齐方式)，表头和数据行共用
+_SUMMARY_COLUMNS = ((40, "<"), (8, "<"), (8, "<"), (12, ">"), (18, ">"))
+
+
+def pytest_configure(config):
+    """
+    注册标记
+
+    @param config pytest配置对象
+    """
+    config.addinivalue_line(
+        "markers",
+        "parametrize_from_file(path, id_field=None): 从数据文件(.jsonl/.csv/.json)流式读取数据参数化data_row",
+    )
+    config.stash[DATA_LOAD_STATS] = []
+
+
+def _resolve(path) -> Path:
+    """
+    解析数据文件路径，相对路径以 Settings.DATA_DIR 为基准
+
+    @param path 数据文件路径
+    @return Path 绝对路径
+    """
+    from src.config.settings import Settings
+    path = Path(path)
+    if not path.is_absolute():
+        path = Settings().DATA_DIR / path
+    return path
+
+
+def pytest_generate_tests(metafunc):
+    """
+    生成测试钩子 - 按 parametrize_from_file 标记参数化 data_row
+
+    @param metafunc 测试函数的元信息
+    """
+    marker = metafunc.definition.get_closest_marker("parametrize_from_file")
+    if marker is None:
+        return
+    from src.utils.data_rows import iter_rows, iter_rows_with_field
+
+    if not marker.args:
+        raise ValueError(f"{metafunc.definition.nodeid}: parametrize_from_file 需要指定数据文件路径")
+    path = _resolve(marker.args[0])
+    id_field = marker.kwargs.get("id_field")
+
+    if id_field is None:
+        rows = list(iter_rows(path))
+        ids = [f"row{number}" for number in range(len(rows))]
+    else:
+        rows, ids = [], []
+        for row, value in iter_rows_with_field(path, id_field):
+            rows.append(row)
+            ids.append(str(value))
+    metafunc.parametrize("data_row", rows, ids=ids, indirect=True)
+
+
+@pytest.fixture
+def data_row(request):
+    """
+    数据行fixture
+
+    测试执行时才读取并解析 parametrize_from_file 分配给当前测试的那一条数据。
+
+    @param request pytest请求对象
+    @return 这一条数据（CSV为 {列名: 字符串值} 字典，JSON为解析后的对象）
+    """
+    return request.param.load()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """
+    测试会话结束钩子 - 收集本进程的测试数据加载统计
+
+    xdist的worker把统计放进workeroutput，由主进程在 pytest_testnodedown 中收集。
+
+    @param session pytest会话对象
+    @param exitstatus 退出状态码
+    """
+    from dataclasses import asdict
+    from src.utils.data_loader import DataLoader
+    stats = [dict(asdict(stat), worker="main") for stat in DataLoader().stats]
+    config = session.config
+    if hasattr(config, "workerinput"):
+        worker = config.workerinput["workerid"]
+        config.workeroutput["data_load_stats"] = [dict(stat, worker=worker) for stat in stats]
+    else:
+        config.stash[DATA_LOAD_STATS].extend(stats)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+    xdist worker结束钩子 - 收集worker的测试数据加载统计
+
+    @param node worker节点
+    @param error worker异常退出时的错误信息
+    """
+    stats = getattr(node, "workeroutput", {}).get("data_load_stats", [])
+    node.config.stash[DATA_LOAD_STATS].extend(stats)
+
+
+def _summary_row(*cells: str) -> str:
+    """
+    按 _SUMMARY_COLUMNS 排列一行，宽度按终端显示宽度计算（中文字符占两列）
+
+    @param cells 各列的文本
+    @return str 一行文本
+    """
+    parts = []
+    for cell, (width, align) in zip(cells, _SUMMARY_COLUMNS):
+        shown = sum(2 if unicodedata.east_asian_width(char) in "WF" else 1 for char in cell)
+        padding = " " * max(0, width - shown)
+        parts.append(cell + padding if align == "<" else padding + cell)
+    return " ".join(parts)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """
+    终端汇总钩子 - 输出测试数据的加载来源和耗时
+
+    @param terminalreporter 终端输出对象
+    @param exitstatus 退出状态码
+    @param config pytest配置对象
+    """
+    stats = config.stash.get(DATA_LOAD_STATS, [])
+    if not stats:
+        return
+    from src.config.settings import Settings
+    data_dir = Settings().DATA_DIR.resolve()
+
+    terminalreporter.section("测试数据加载")
+    terminalreporter.write_line(_summary_row("数据文件", "进程", "来源", "耗时(ms)", "解析耗时(ms)"))
+    for stat in sorted(stats, key=lambda item: (item["path"], item["worker"])):
+        path = Path(stat["path"])
+        name = str(path.relative_to(data_dir)) if path.is_relative_to(data_dir) else str(path)
+        terminalreporter.write_line(_summary_row(
+            name, stat["worker"], stat["source"],
+            f"{stat['seconds'] * 1000:.2f}", f"{stat['parse_seconds'] * 1000:.2f}",
+        ))
@@ -0,0 +1,395 @@
+"""
+分布式运行插件
+
+xdist（-n）和分片（--shard）都是事先分好测试，耗时估计不准时总有机器先跑完、然后空等。
+这个插件让测试在运行中动态分配（见 src/utils/work_stealing.py）：
+
+- 协调者：pytest --coordinator HOST:PORT 收集测试，按工作单元（测试类、有序分组整体一个单元）放进共享队列，
+  等待worker连接领取；所有worker的测试结果都发回协调者，由协调者输出报告、更新耗时历史
+- worker：pytest --worker HOST:PORT 连接协调者，领取单元执行。worker是一个普通的pytest会话，
+  session作用域的fixture（浏览器、登录token等）在每个worker上只构建一次，被所有分给它的测试复用
+- 空闲的worker从共享队列领取，共享队列空了就从别的worker预留的单元中窃取，各worker几乎同时结束
+
+本机运行（回环地址）：
+    pytest --spawn-workers 4                         协调者在本机启动4个worker进程
+多台机器：
+    pytest --coordinator 0.0.0.0:8765                机器A
+    pytest --worker 机器A:8765                        每台worker机器，测试路径与协调者一致
+
+worker要能收集到协调者的所有测试（同样的代码和测试路径），否则拒绝执行。
+--spawn-workers 启动的worker的输出写在 Settings.DIST_LOG_DIR。不能与 -n 同时使用。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import os
+import platform
+import queue
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional
+
+import pytest
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_scheduling", "测试调度")
+    group.addoption(
+        "--coordinator",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="HOST:PORT",
+        help="作为协调者运行：收集测试后等待worker连接领取，结果汇总到本进程，默认地址见 Settings.DIST_ADDRESS",
+    )
+    group.addoption(
+        "--spawn-workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="作为协调者运行，并在本机启动N个worker进程（未指定 --coordinator 时监听回环地址的随机端口）",
+    )
+    group.addoption(
+        "--worker",
+        default=None,
+        metavar="HOST:PORT",
+        help="作为worker运行：连接协调者，领取测试执行，结果发回协调者",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子 - 检查参数，注册协调者或worker
+
+    @param config pytest配置对象
+    """
+    coordinator = config.getoption("coordinator")
+    spawn = config.getoption("spawn_workers")
+    worker = config.getoption("worker")
+    if coordinator is None and not spawn and worker is None:
+        return
+    if worker is not None and (coordinator is not None or spawn):
+        raise pytest.UsageError("--worker 不能与 --coordinator、--spawn-workers 同时使用")
+    if getattr(config.option, "numprocesses", None):
+        raise pytest.UsageError("--coordinator、--spawn-workers、--worker 不能与 -n 同时使用")
+
+    from src.config.settings import Settings
+    from src.utils.work_stealing import parse_address
+
+    settings = Settings()
+    if worker is not None:
+        value = worker
+    elif coordinator:
+        value = coordinator
+    else:
+        value = "127.0.0.1:0" if coordinator is None else settings.DIST_ADDRESS
+    try:
+        address = parse_address(value)
+    except ValueError as e:
+        raise pytest.UsageError(str(e)) from None
+    if worker is not None:
+        config.pluginmanager.register(DistributedWorker(config, address), "pytest_learn_dist_worker")
+    else:
+        config.pluginmanager.register(Coordinator(config, address, spawn), "pytest_learn_coordinator")
+
+
+def _collection_failed(session) -> bool:
+    """
+    是否有收集错误（此时交给pytest默认的运行循环报错退出）
+    """
+    return bool(session.testsfailed) and not session.config.option.continue_on_collection_errors
+
+
+class Coordinator:
+    """
+    协调者：分配工作单元，汇总各worker的结果
+
+    @attr address 监听地址（实际端口在开始运行后确定）
+    @attr workers 各worker的情况 {名称: {"host", "pid", "tests", "busy"}}
+    """
+
+    def __init__(self, config, address, spawn: int):
+        """
+        @param config pytest配置对象
+        @param address 监听地址
+        @param spawn 在本机启动的worker数
+        """
+        self.config = config
+        self.address = address
+        self.spawn = spawn
+        self.workers: Dict[str, dict] = {}
+        self.items: Dict[str, pytest.Item] = {}
+        self.server = None
+        self._processes: List[subprocess.Popen] = []
+        self._logs: List[str] = []
+        # 各worker正在执行的测试（收到setup报告、还没收到teardown报告）
+        self._running: Dict[str, str] = {}
+        self._remaining = set()
+
+    def _write(self, message: str, **markup):
+        terminal = self.config.pluginmanager.get_plugin("terminalreporter")
+        if terminal is not None:
+            terminal.write_line(message, **markup)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        """
+        运行循环钩子 - 启动服务，把收到的报告交给pytest的报告钩子，直到所有测试结束
+
+        @param session pytest会话对象
+        @return True 测试已经由worker执行
+        """
+        if _collection_failed(session) or session.config.option.collectonly:
+            return None
+        from src.config.settings import Settings
+        from src.plugins.scheduling_plugin import DURATION_STORE, item_work_unit, unit_priority
+        from src.utils.work_stealing import CoordinatorServer, WorkQueue
+
+        units: Dict[str, List[str]] = {}
+        for item in session.items:
+            units.setdefault(item_work_unit(item), []).append(item.nodeid)
+            self.items[item.nodeid] = item
+        store = self.config.stash[DURATION_STORE]
+        default = store.typical() or 1.0
+        order = sorted(units, key=lambda unit: unit_priority(store, units[unit], default), reverse=True)
+        work = WorkQueue(units, order, Settings().DIST_BATCH_SIZE)
+
+        self.server = CoordinatorServer(self.address, work, list(self.items))
+        self.address = self.server.server_address[:2]
+        threading.Thread(target=self.server.serve_forever, name="coordinator", daemon=True).start()
+        host, port = self.address
+        self._write(f"协调者监听 {host}:{port}，{len(self.items)} 个测试，{len(units)} 个工作单元")
+        try:
+            if self.spawn:
+                self._spawn_workers(f"{host}:{port}")
+            self._remaining = set(self.items)
+            self._loop(session)
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+            self._stop_workers()
+        return True
+
+    def _spawn_workers(self, address: str):
+        """
+        在本机启动worker进程，使用与协调者相同的测试路径和根目录
+        """
+        from src.config.settings import Settings
+
+        log_dir = Settings().DIST_LOG_DIR
+        log_dir.mkdir(parents=True, exist_ok=True)
+        command = [
+            sys.executable, "-m", "pytest", "--worker", address, "-p", "no:cacheprovider",
+            "--rootdir", str(self.config.rootpath), *self.config.args,
+        ]
+        for index in range(self.spawn):
+            log_path = log_dir / f"worker-{index}.log"
+            with open(log_path, "wb") as log:
+                self._processes.append(subprocess.Popen(
+                    command, cwd=self.config.invocation_params.dir, stdout=log, stderr=subprocess.STDOUT,
+                ))
+            self._logs.append(str(log_path))
+
+    def _stop_workers(self):
+        for process in self._processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def _loop(self, session):
+        """
+        处理worker的事件，直到所有测试都有结果
+        """
+        events = self.server.events
+        work = self.server.work
+        while self._remaining:
+            if session.shouldfail or session.shouldstop:
+                work.stop()
+                if session.shouldfail:
+                    raise session.Failed(session.shouldfail)
+                raise session.Interrupted(session.shouldstop)
+            try:
+                kind, worker, data = events.get(timeout=0.5)
+            except queue.Empty:
+                if self.server.active_workers == 0 and events.empty():
+                    self._check_workers_gone(session)
+                continue
+            if kind == "report":
+                self._report(worker, data)
+            elif kind == "up":
+                self.workers[worker] = dict(data, tests=0, busy=0.0)
+                if self.config.option.verbose > 0:
+                    self._write(f"[{worker}] 已连接: {data['host']} pid={data['pid']}")
+            elif kind == "error":
+                self._write(f"[{worker}] 无法执行: {data}", red=True)
+            elif kind == "down":
+                self._worker_down(worker, data)
+
+    def _check_workers_gone(self, session):
+        """
+        没有连接的worker时检查是否还会有worker来：本机启动的进程都已退出，
+        或者外部worker都已断开（至少连接过一个），就列出没有运行的测试并中断
+        """
+        if self._processes:
+            if any(process.poll() is None for process in self._processes):
+                return
+            reason = f"所有worker进程都已退出，日志见 {self._logs[0]} 等"
+        elif self.workers:
+            reason = "所有worker都已断开"
+        else:
+            return
+        for nodeid in sorted(self._remaining):
+            self._write(f"没有运行: {nodeid}", red=True)
+        raise session.Interrupted(f"{reason}，还有 {len(self._remaining)} 个测试没有运行")
+
+    def _report(self, worker: str, data: dict):
+        """
+        把worker的报告交给pytest的报告钩子（终端输出、失败统计、耗时历史等）
+        """
+        hook = self.config.hook
+        report = hook.pytest_report_from_serializable(config=self.config, data=data)
+        if report is None or not hasattr(report, "when"):
+            return
+        location = self.items[report.nodeid].location if report.nodeid in self.items else report.location
+        if report.when == "setup":
+            self._running[worker] = report.nodeid
+            hook.pytest_runtest_logstart(nodeid=report.nodeid, location=location)
+        hook.pytest_runtest_logreport(report=report)
+        stats = self.workers.get(worker)
+        if stats is not None:
+            stats["busy"] += report.duration
+        if report.when == "teardown":
+            self._running.pop(worker, None)
+            self._remaining.discard(report.nodeid)
+            if stats is not None:
+                stats["tests"] += 1
+            hook.pytest_runtest_logfinish(nodeid=report.nodeid, location=location)
+
+    def _worker_down(self, worker: str, error: Optional[str]):
+        """
+        worker断开：正在执行的测试记为失败，没有运行的测试重新排队
+        """
+        work = self.server.work
+        crashed = self._running.pop(worker, None)
+        if crashed is not None:
+            item = self.items[crashed]
+            report = pytest.TestReport(
+                crashed, item.location, {}, "failed", f"worker {worker} 在执行这个测试时断开: {error or '连接关闭'}", "call",
+            )
+            self.config.hook.pytest_runtest_logreport(report=report)
+            self.config.hook.pytest_runtest_logfinish(nodeid=crashed, location=item.location)
+            self._remaining.discard(crashed)
+        work.remove_worker(worker, crashed)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """
+        终端汇总钩子 - 输出各worker执行的测试数、忙碌时间和窃取的单元数
+
+        @param terminalreporter 终端输出对象
+        """
+        if not self.workers:
+            return
+        write = terminalreporter.write_line
+        terminalreporter.section("分布式运行")
+        write(f"{'worker':<8} {'主机':<20} {'pid':>8} {'测试数':>6} {'忙碌(s)':>9} {'窃取':>5}")
+        for name, stats in self.workers.items():
+            write(f"{name:<8} {str(stats['host']):<22} {stats['pid']:>8} {stats['tests']:>9} "
+                  f"{stats['busy']:>11.2f} {self.server.work.steals.get(name, 0):>7}")
+        for process, log in zip(self._processes, self._logs):
+            # 0 全部通过，1 有失败，5 没有测试；其他退出码是worker自身出错或进程崩溃
+            if process.returncode not in (0, 1, 5):
+                write(f"worker进程 pid={process.pid} 异常退出（退出码 {process.returncode}），日志: {log}", red=True)
+
+
+class DistributedWorker:
+    """
+    worker：从协调者领取单元执行，把报告发回协调者
+
+    @attr address 协调者地址
+    @attr name 协调者分配的名称
+    """
+
+    def __init__(self, config, address):
+        """
+        @param config pytest配置对象
+        @param address 协调者地址
+        """
+        self.config = config
+        self.address = address
+        self.name = None
+        self.client = None
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        """
+        运行循环钩子 - 按协调者的分配执行测试
+
+        每个单元的最后一个测试开始前先领取下一个单元，pytest据此决定清理哪些fixture
+        （下一个测试仍在同一个模块时，模块作用域的fixture不清理）。
+
+        @param session pytest会话对象
+        @return True 测试已经执行
+        """
+        if session.config.option.collectonly:
+            return None
+        from src.config.settings import Settings
+        from src.utils.work_stealing import WorkerClient
+
+        self.client = WorkerClient.connect(self.address, Settings().DIST_CONNECT_TIMEOUT)
+        try:
+            welcome = self.client.hello(platform.node(), os.getpid())
+            self.name = welcome["worker"]
+            if _collection_failed(session):
+                self.client.error(f"收集测试时有 {session.testsfailed} 个错误")
+                return None
+            items = {item.nodeid: item for item in session.items}
+            missing = [nodeid for nodeid in welcome["tests"] if nodeid not in items]
+            if missing:
+                self.client.error(f"有 {len(missing)} 个测试没有收集到，如 {missing[0]}")
+                raise session.Interrupted(f"收集结果与协调者不一致，缺少 {len(missing)} 个测试")
+            self._run(session, items)
+        except OSError as e:
+            raise session.Interrupted(f"与协调者的连接断开: {e}") from None
+        finally:
+            self.client.close()
+            self.client = None
+        return True
+
+    def _run(self, session, items: Dict[str, pytest.Item]):
+        from src.config.settings import Settings
+
+        interval = Settings().DIST_POLL_INTERVAL
+        tests = self.client.next_unit(interval=interval)
+        while tests is not None:
+            following = None
+            for index, nodeid in enumerate(tests):
+                if index + 1 < len(tests):
+                    nextitem = items[tests[index + 1]]
+                else:
+                    # 预取不等待：各worker都在等别人的单元执行完时会互相卡住
+                    following = self.client.next_unit(wait=False)
+                    nextitem = items[following[0]] if following else None
+                items[nodeid].config.hook.pytest_runtest_protocol(item=items[nodeid], nextitem=nextitem)
+                if session.shouldfail:
+                    raise session.Failed(session.shouldfail)
+                if session.shouldstop:
+                    raise session.Interrupted(session.shouldstop)
+            tests = following if following is not None else self.client.next_unit(interval=interval)
+
+    def pytest_runtest_logreport(self, report):
+        """
+        测试报告钩子 - 把报告发回协调者
+
+        @param report 测试报告
+        """
+        if self.client is not None:
+            self.client.report(self.config.hook.pytest_report_to_serializable(config=self.config, report=report))
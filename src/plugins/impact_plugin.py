@@ -0,0 +1,327 @@
+"""
+测试影响分析插件
+
+改了 src/utils/request_util.py 或 data/test_data.json 这样的一个文件，往往只有少数测试用到它。
+这个插件记录每个测试依赖的文件（见 src/utils/impact.py），之后只运行受改动影响的测试：
+
+- --impact-record：运行测试的同时记录每个测试用到的源代码和数据文件，保存到 Settings.IMPACT_DB。
+  只替换本次运行的测试的记录，完整运行一次得到所有测试的映射
+- --impact-select：用git找出相对记录时的提交（或 --impact-base 指定的提交）改动过的文件
+  （包括未提交的改动和新文件），只运行依赖这些文件的测试，以及映射中还没有的新测试
+
+以下情况映射不可信，运行全部测试：
+- 还没有记录过映射，或映射中没有的测试超过 Settings.IMPACT_MAX_UNKNOWN_RATIO
+- 无法用git比较（不是git仓库、记录时的提交已经不存在）
+- 改动了对所有测试都有影响的文件（Settings.IMPACT_RUN_ALL，如 conftest.py、pytest.ini、插件）
+
+两个参数可以一起使用：只运行受影响的测试，同时更新它们的映射。
+记录时使用 sys.setprofile，不能与 --profile 同时使用；带 @pytest.mark.profile 标记的测试
+（cProfile会替换掉记录用的回调）不记录，保留原来的映射，并给出警告。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+from typing import Dict, List, Optional, Set
+
+import pytest
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_scheduling", "测试调度")
+    group.addoption(
+        "--impact-record",
+        action="store_true",
+        default=False,
+        help="记录每个测试依赖的源代码和数据文件，保存到 Settings.IMPACT_DB",
+    )
+    group.addoption(
+        "--impact-select",
+        action="store_true",
+        default=False,
+        help="只运行受git改动影响的测试，映射过期或不可信时运行全部测试",
+    )
+    group.addoption(
+        "--impact-base",
+        default=None,
+        metavar="REF",
+        help="--impact-select 比较的git提交，如 origin/main，默认为记录映射时的提交",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子 - 注册依赖记录器和测试选择器
+
+    @param config pytest配置对象
+    """
+    record = config.getoption("impact_record")
+    select = config.getoption("impact_select")
+    if not record and not select:
+        return
+    if record and config.getoption("profile"):
+        raise pytest.UsageError("--impact-record 不能与 --profile 同时使用（都需要 sys.setprofile）")
+    if select:
+        config.pluginmanager.register(ImpactSelector(config), "pytest_learn_impact_selector")
+    if record:
+        config.pluginmanager.register(ImpactRecorder(config), "pytest_learn_impact_recorder")
+
+
+class ImpactRecorder:
+    """
+    依赖记录器
+
+    @attr mapping 本次运行的测试依赖的文件 {测试ID: [相对路径, ...]}
+    """
+
+    def __init__(self, config):
+        """
+        @param config pytest配置对象
+        """
+        from src.config.settings import Settings
+        from src.utils import impact
+
+        settings = Settings()
+        self.config = config
+        self.db_path = settings.IMPACT_DB
+        # 改动后本来就会运行全部测试的文件不必记录（插件的钩子在每个测试中都会被调用）
+        self.recorder = impact.enable(settings.BASE_DIR, settings.IMPACT_IGNORED + settings.IMPACT_RUN_ALL)
+        self.mapping: Dict[str, List[str]] = {}
+        # fixture构建时用到的文件 {(fixture名称, 定义位置): 文件}
+        self._fixture_files: Dict[tuple, Set[str]] = {}
+        # 使用了缓存结果（--result-cache）、没有实际运行的测试，保留原来的记录
+        self._cached: Set[str] = set()
+        # 带profile标记的测试，call阶段由cProfile接管 sys.setprofile，记录不完整，保留原来的记录
+        self._profiled: Set[str] = set()
+        self.saved = None
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        """
+        收集完成钩子 - 找出带profile标记的测试，它们不记录依赖
+
+        @param session pytest会话对象
+        @param config pytest配置对象
+        @param items 收集到的测试项
+        """
+        for item in items:
+            if item.get_closest_marker("profile"):
+                self._profiled.add(item.nodeid)
+                item.warn(pytest.PytestWarning(
+                    "带profile标记的测试在call阶段使用cProfile，--impact-record 不记录它的依赖，保留原来的映射"
+                ))
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        """
+        测试执行钩子 - 记录 setup + call + teardown 期间用到的文件
+
+        @param item 测试项
+        @param nextitem 下一个测试项
+        """
+        from src.utils.impact import fixture_files, start_profile, stop_profile
+
+        if item.nodeid in self._profiled:
+            yield
+            return
+        self.recorder.push()
+        start_profile(self.recorder)
+        try:
+            yield
+        finally:
+            stop_profile()
+            files = self.recorder.pop()
+        files |= fixture_files(item, self._fixture_files)
+        if item.nodeid in self._cached:
+            return
+        test_file = self.recorder.normalize(str(item.path))
+        if test_file is not None:
+            files.add(test_file)
+        self.mapping[item.nodeid] = sorted(files)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        """
+        fixture构建钩子 - 记录构建期间用到的文件
+
+        @param fixturedef fixture定义
+        @param request fixture请求对象
+        """
+        from src.utils.impact import fixture_key
+
+        self.recorder.push()
+        try:
+            yield
+        finally:
+            files = self.recorder.pop()
+        self._fixture_files.setdefault(fixture_key(fixturedef), set()).update(files)
+
+    def pytest_runtest_logreport(self, report):
+        """
+        测试报告钩子 - 记下使用了缓存结果的测试
+
+        @param report 测试报告
+        """
+        from src.plugins.result_cache_plugin import is_cached_report
+
+        if is_cached_report(report):
+            self._cached.add(report.nodeid)
+
+    def pytest_sessionfinish(self, session):
+        """
+        测试会话结束钩子 - 保存映射，xdist的worker把映射放进workeroutput
+
+        @param session pytest会话对象
+        """
+        if hasattr(self.config, "workerinput"):
+            self.config.workeroutput["impact_mapping"] = self.mapping
+            return
+        if not self.mapping:
+            return
+        from src.config.settings import Settings
+        from src.utils.impact import ImpactStore, git_head
+
+        store = ImpactStore(self.db_path)
+        try:
+            store.record(self.mapping, git_head(Settings().BASE_DIR))
+        finally:
+            store.close()
+        self.saved = len(self.mapping)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        """
+        xdist worker结束钩子 - 收集worker的映射
+
+        @param node worker节点
+        @param error worker异常退出时的错误信息
+        """
+        self.mapping.update(getattr(node, "workeroutput", {}).get("impact_mapping", {}))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """
+        终端汇总钩子 - 输出映射保存位置
+
+        @param terminalreporter 终端输出对象
+        """
+        if self.saved is None:
+            return
+        terminalreporter.section("影响分析")
+        terminalreporter.write_line(f"已记录 {self.saved} 个测试依赖的文件: {self.db_path}")
+
+    def pytest_unconfigure(self, config):
+        """
+        配置清理钩子 - 关闭记录
+
+        @param config pytest配置对象
+        """
+        from src.utils import impact
+        impact.disable()
+
+
+class ImpactSelector:
+    """
+    测试选择器：只保留受改动影响的测试
+
+    xdist的worker也各自选择（映射和git状态相同，选择结果一致）。
+
+    @attr changed 改动过的文件
+    @attr reason 运行全部测试的原因，只运行部分测试时为None
+    """
+
+    def __init__(self, config):
+        """
+        @param config pytest配置对象
+        """
+        self.config = config
+        self.changed: List[str] = []
+        self.reason: Optional[str] = None
+        self.counts = None
+
+    def _impacted(self, tests: List[str]) -> Optional[Set[str]]:
+        """
+        受改动影响的测试
+
+        @param tests 收集到的测试ID
+        @return Set[str] 需要运行的测试，映射不可信时为None（原因记在reason）
+        """
+        from src.config.settings import Settings
+        from src.utils.impact import ImpactStore, changed_files, matches
+
+        settings = Settings()
+        if not settings.IMPACT_DB.exists():
+            self.reason = "还没有依赖映射，先用 --impact-record 完整运行一次"
+            return None
+        store = ImpactStore(settings.IMPACT_DB)
+        try:
+            recorded = store.tests()
+            unknown = [test for test in tests if test not in recorded]
+            if not recorded or len(unknown) > len(tests) * settings.IMPACT_MAX_UNKNOWN_RATIO:
+                self.reason = f"映射中没有 {len(unknown)}/{len(tests)} 个测试，映射已过期"
+                return None
+            base = self.config.getoption("impact_base")
+            bases = {base} if base else {recorded[test] for test in tests if test in recorded}
+            changed: Set[str] = set()
+            for commit in sorted(bases, key=str):
+                files = changed_files(settings.BASE_DIR, commit) if commit else None
+                if files is None:
+                    self.reason = f"无法用git与提交 {commit} 比较"
+                    return None
+                changed |= files
+            self.changed = sorted(changed)
+            global_changes = [path for path in self.changed if matches(path, settings.IMPACT_RUN_ALL)]
+            if global_changes:
+                self.reason = f"改动了影响所有测试的文件: {', '.join(global_changes)}"
+                return None
+            return store.impacted(changed) | set(unknown)
+        finally:
+            store.close()
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        """
+        收集完成钩子 - 只保留受影响的测试
+
+        在分片（--shard，最后执行）之前执行，分片只对选中的测试进行。
+
+        @param session pytest会话对象
+        @param config pytest配置对象
+        @param items 收集到的测试项
+        """
+        selected_ids = self._impacted([item.nodeid for item in items])
+        if selected_ids is None:
+            self.counts = (len(items), len(items))
+            return
+        selected, deselected = [], []
+        for item in items:
+            (selected if item.nodeid in selected_ids else deselected).append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        self.counts = (len(selected), len(items))
+        items[:] = selected
+
+    def pytest_report_collectionfinish(self, config, start_path, items):
+        """
+        收集完成报告钩子 - 在收集结果下面显示选择的情况
+
+        @return str 显示的行
+        """
+        if self.counts is None:
+            return None
+        selected, total = self.counts
+        if self.reason is not None:
+            return f"影响分析: {self.reason}，运行全部 {total} 个测试"
+        return f"影响分析: {len(self.changed)} 个文件有改动，运行受影响的 {selected}/{total} 个测试"
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        """
+        测试会话结束钩子 - 没有受影响的测试时按成功退出（pytest默认把没有测试当作错误）
+
+        @param session pytest会话对象
+        @param exitstatus 退出状态码
+        """
+        if exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED and self.counts is not None and self.counts[1]:
+            session.exitstatus = pytest.ExitCode.OK
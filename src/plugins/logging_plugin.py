@@ -0,0 +1,157 @@
+"""
+日志插件
+
+把 LoggerUtil 的生命周期挂到 pytest 会话上：
+- --log-json 命令行参数开启结构化JSON-lines日志输出
+- --log-failure-only 命令行参数开启失败时才输出DEBUG日志的模式
+- 每个测试开始/结束时更新日志上下文（test_id、测试耗时）
+- 测试失败时把缓存的DEBUG日志写入日志文件并附加到测试报告
+- 会话结束时停止后台日志线程，确保队列中的日志全部落盘
+- xdist并行执行结束后，把本次会话各worker的日志按时间顺序合并为一个文件
+- 会话结束后为当天的日志文件增量建立离线索引
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import uuid
+
+import pytest
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_logging", "LoggerUtil日志")
+    group.addoption(
+        "--log-json",
+        action="store_true",
+        default=False,
+        help="额外输出结构化JSON-lines日志到 logs/pytest_YYYY-MM-DD.jsonl",
+    )
+    group.addoption(
+        "--log-failure-only",
+        action="store_true",
+        default=False,
+        help="DEBUG日志只在测试失败时写入日志文件和测试报告",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子
+
+    必须在LoggerUtil第一次初始化之前把命令行参数写入Settings。
+
+    @param config pytest配置对象
+    """
+    from src.config.settings import Settings
+    settings = Settings()
+    # xdist worker使用主进程生成的会话ID（见 pytest_configure_node）
+    workerinput = getattr(config, "workerinput", None)
+    settings.LOG_RUN_ID = workerinput["log_run_id"] if workerinput else uuid.uuid4().hex[:12]
+    if config.getoption("log_json"):
+        settings.LOG_JSON = True
+    if config.getoption("log_failure_only"):
+        settings.LOG_FAILURE_ONLY = True
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    xdist worker启动钩子 - 把会话ID传给worker，worker的日志文件名中带上它
+
+    @param node worker节点
+    """
+    from src.config.settings import Settings
+    node.workerinput["log_run_id"] = Settings().LOG_RUN_ID
+
+
+def pytest_runtest_logstart(nodeid, location):
+    """
+    测试开始钩子 - 设置日志上下文中的当前测试
+
+    @param nodeid 测试用例ID
+    @param location 测试用例位置
+    """
+    from src.utils.logger import LoggerUtil
+    LoggerUtil.set_current_test(nodeid)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """
+    生成测试报告钩子 - 测试失败时附加缓存的DEBUG日志
+
+    setup、call、teardown任一阶段失败都会写出该阶段之前缓存的日志。
+
+    @param item 测试用例
+    @param call 测试阶段的调用信息
+    """
+    outcome = yield
+    report = outcome.get_result()
+    if report.failed:
+        from src.utils.logger import LoggerUtil
+        text = LoggerUtil.flush_failure_context()
+        if text:
+            report.sections.append((f"LoggerUtil DEBUG log ({report.when})", text))
+
+
+def pytest_runtest_logfinish(nodeid, location):
+    """
+    测试结束钩子 - 清除日志上下文中的当前测试
+
+    @param nodeid 测试用例ID
+    @param location 测试用例位置
+    """
+    from src.utils.logger import LoggerUtil
+    LoggerUtil.set_current_test(None)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session, exitstatus):
+    """
+    测试会话结束钩子
+
+    trylast=True 让其他插件在 sessionfinish 中记录的日志也能先入队，
+    最后再统一等待后台线程把队列写完。
+
+    @param session pytest会话对象
+    @param exitstatus 退出状态码
+    """
+    from src.utils.logger import LoggerUtil
+    LoggerUtil.shutdown()
+
+
+def pytest_unconfigure(config):
+    """
+    配置清理钩子 - 合并xdist各worker的日志并建立日志索引
+
+    只在主进程中执行；xdist并行时此时所有worker进程都已退出，
+    它们的日志文件（包括后台压缩）已经全部写完。
+
+    @param config pytest配置对象
+    """
+    if hasattr(config, "workerinput"):
+        return
+    from src.config.settings import Settings
+    from src.utils.logger import LoggerUtil
+    from src.utils.log_index import build_active_indexes
+    from src.utils.log_merge import merge_worker_logs
+    from src.utils.log_rotation import rotation_options
+    LoggerUtil.shutdown()
+    settings = Settings()
+    if not settings.LOG_DIR.exists():
+        return
+    if config.pluginmanager.hasplugin("dsession"):
+        # 合并时主日志文件可能轮转，先关闭主进程自己打开的日志文件
+        LoggerUtil.release_files()
+        # 失败时才输出DEBUG日志的模式下，补写的日志在worker文件中最多错位 LOG_RING_CAPACITY 条
+        window = settings.LOG_RING_CAPACITY if settings.LOG_FAILURE_ONLY else 0
+        merge_worker_logs(settings.LOG_DIR, settings.LOG_RUN_ID, rotation_options(settings), settings.LOG_INDEX,
+                          reorder_window=window)
+    if settings.LOG_INDEX:
+        build_active_indexes(settings.LOG_DIR)
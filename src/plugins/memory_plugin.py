@@ -0,0 +1,255 @@
+"""
+内存跟踪插件
+
+--memory-track 开启：用 tracemalloc 记录每个测试（setup + call + teardown）的：
+- 峰值：测试期间Python分配的内存比测试开始时最多高出多少
+- 留存增长：测试结束并做一次垃圾回收后，比测试开始时多出的内存，
+  也就是测试结束后仍然没有释放的对象（如被全局变量、缓存、未关闭的页面持有的响应对象）
+
+留存增长超过阈值（--memory-leak-threshold，默认见 Settings.MEMORY_LEAK_THRESHOLD_KB）的测试
+会在结束时列出，并给出新增内存最多的分配位置（调用栈）。
+
+注意：
+- 只统计Python通过内存分配器申请的内存，不等于进程RSS，但足以定位是哪个测试持有了对象
+- 测试中第一次构建的 module/session 作用域fixture会一直保留到作用域结束，
+  计入第一个使用它的测试的留存增长；出现在报告中时先看分配位置是不是这类fixture
+- tracemalloc 会让测试变慢、内存占用变大，只在排查问题时开启
+
+未开启时插件不注册任何钩子，对测试没有额外开销。
+xdist并行时各worker的记录通过 workeroutput 传回主进程一起汇总。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import gc
+import re
+import tracemalloc
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+# 分配位置的调用栈中不显示的帧：导入机制、pytest和pluggy的内部调用
+_IGNORED_FRAMES = re.compile(r"<frozen |[/\\](_pytest|pluggy)[/\\]")
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_profiling", "性能分析")
+    group.addoption(
+        "--memory-track",
+        action="store_true",
+        default=False,
+        help="用tracemalloc记录每个测试的内存峰值和留存增长，列出疑似内存泄漏的测试",
+    )
+    group.addoption(
+        "--memory-leak-threshold",
+        type=float,
+        default=None,
+        metavar="KB",
+        help="留存增长超过该值（KB）的测试判定为疑似泄漏，默认见 Settings.MEMORY_LEAK_THRESHOLD_KB",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子 - 开启时注册内存跟踪器，把命令行参数写入Settings
+
+    @param config pytest配置对象
+    """
+    if not config.getoption("memory_track"):
+        return
+    from src.config.settings import Settings
+    settings = Settings()
+    if config.getoption("memory_leak_threshold") is not None:
+        settings.MEMORY_LEAK_THRESHOLD_KB = config.getoption("memory_leak_threshold")
+    config.pluginmanager.register(MemoryTracker(config), "pytest_learn_memory_tracker")
+
+
+def format_size(size: float) -> str:
+    """
+    按数量级格式化字节数
+
+    @param size 字节数，可以为负
+    @return str 如 "1.5 MiB"
+    """
+    for unit, scale in (("GiB", 1 << 30), ("MiB", 1 << 20), ("KiB", 1 << 10)):
+        if abs(size) >= scale:
+            return f"{size / scale:.1f} {unit}"
+    return f"{size:.0f} B"
+
+
+def _relative(filename: str) -> str:
+    """
+    项目内的文件显示为相对路径
+
+    @param filename 文件路径
+    @return str 相对于项目根目录的路径，项目外的文件原样返回
+    """
+    from src.config.settings import Settings
+    try:
+        return str(Path(filename).relative_to(Settings().BASE_DIR))
+    except ValueError:
+        return filename
+
+
+class MemoryTracker:
+    """
+    内存跟踪器
+
+    每个测试只读取当前内存和峰值（开销很小），只有留存增长超过阈值时才拍快照（对象多时一次几十到几百毫秒），
+    与上一次拍的快照对比找出分配位置。两次快照之间没有超过阈值的测试留下的少量增长也会计入对比结果，
+    按大小排序后一般排在后面。
+
+    @attr records 每个测试的记录 [{"test", "peak", "retained", "sites"}, ...]
+    """
+
+    def __init__(self, config):
+        """
+        @param config pytest配置对象
+        """
+        from src.config.settings import Settings
+        settings = Settings()
+        self.config = config
+        self.threshold = settings.MEMORY_LEAK_THRESHOLD_KB * 1024
+        self.top_sites = settings.MEMORY_TOP_SITES
+        self.depth = settings.MEMORY_TRACE_DEPTH
+        self.records: List[dict] = []
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started = False
+        # tracemalloc是否由插件启动，插件启动的才由插件停止
+        self._owns_tracing = False
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        """
+        测试执行钩子 - 在setup之前和teardown之后测量内存
+
+        tracemalloc 在第一个测试开始时才启动，xdist主进程不执行测试，也就不会启动。
+
+        @param item 测试项
+        @param nextitem 下一个测试项
+        """
+        if not self._started:
+            self._start()
+        gc.collect()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        yield
+        _, peak = tracemalloc.get_traced_memory()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+
+        retained = after - before
+        record = {"test": item.nodeid, "peak": peak - before, "retained": retained, "sites": []}
+        if retained > self.threshold:
+            snapshot = tracemalloc.take_snapshot()
+            record["sites"] = self._top_sites(snapshot)
+            item.user_properties.append(("memory_retained", retained))
+            self._snapshot = snapshot
+        self.records.append(record)
+
+    def _start(self):
+        """
+        启动tracemalloc并拍下第一张快照；已经在跟踪时（如 python -X tracemalloc）沿用
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.depth)
+            self._owns_tracing = True
+        gc.collect()
+        self._snapshot = tracemalloc.take_snapshot()
+        self._started = True
+
+    def _top_sites(self, snapshot: tracemalloc.Snapshot) -> List[dict]:
+        """
+        与上一次的快照对比，找出新增内存最多的分配位置
+
+        不用 Snapshot.filter_traces 过滤（逐条匹配所有对象的调用栈，对象多时要几秒），
+        只在对比结果中跳过 tracemalloc 自身的分配。
+
+        @param snapshot 测试结束后的快照
+        @return List[dict] [{"size", "count", "traceback": ["文件:行号", ...]}, ...]，调用栈由内到外，
+                只保留项目代码和标准库的帧
+        """
+        sites = []
+        for stat in snapshot.compare_to(self._snapshot, "traceback"):
+            if stat.size_diff <= 0:
+                continue
+            filenames = [frame.filename for frame in stat.traceback]
+            if tracemalloc.__file__ in filenames:
+                continue
+            sites.append({
+                "size": stat.size_diff,
+                "count": stat.count_diff,
+                "traceback": [
+                    f"{_relative(frame.filename)}:{frame.lineno}"
+                    for frame in stat.traceback
+                    if not _IGNORED_FRAMES.search(frame.filename)
+                ],
+            })
+            if len(sites) >= self.top_sites:
+                break
+        return sites
+
+    def pytest_unconfigure(self, config):
+        """
+        配置清理钩子 - 停止由插件启动的tracemalloc
+
+        @param config pytest配置对象
+        """
+        if self._owns_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # ========================================
+    # 汇总
+    # ========================================
+
+    def pytest_sessionfinish(self, session):
+        """
+        测试会话结束钩子 - xdist的worker把记录放进workeroutput
+
+        @param session pytest会话对象
+        """
+        if hasattr(self.config, "workerinput"):
+            self.config.workeroutput["memory_records"] = self.records
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        """
+        xdist worker结束钩子 - 收集worker的记录
+
+        @param node worker节点
+        @param error worker异常退出时的错误信息
+        """
+        self.records.extend(getattr(node, "workeroutput", {}).get("memory_records", []))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """
+        终端汇总钩子 - 输出峰值最高的测试和疑似泄漏的测试
+
+        @param terminalreporter 终端输出对象
+        """
+        if not self.records:
+            return
+        write = terminalreporter.write_line
+        terminalreporter.section("内存跟踪")
+        write(f"{'峰值':>11} {'留存增长':>11}  测试")
+        for record in sorted(self.records, key=lambda item: item["peak"], reverse=True)[:10]:
+            write(f"{format_size(record['peak']):>12} {format_size(record['retained']):>14}  {record['test']}")
+
+        leaks = [record for record in self.records if record["retained"] > self.threshold]
+        if not leaks:
+            write(f"没有留存增长超过 {format_size(self.threshold)} 的测试", green=True)
+            return
+        terminalreporter.section("疑似内存泄漏")
+        for record in sorted(leaks, key=lambda item: item["retained"], reverse=True):
+            write(f"{record['test']}  留存增长 {format_size(record['retained'])}", red=True)
+            for site in record["sites"]:
+                write(f"    +{format_size(site['size'])}（{site['count']:+d} 个对象）")
+                for frame in site["traceback"]:
+                    write(f"        {frame}")
@@ -0,0 +1,456 @@
+"""
+阶段耗时分析插件
+
+--fixture-durations=N 开启：记录每个测试 setup、call、teardown 三个阶段的耗时，
+并把 setup/teardown 的耗时归到具体的fixture上（按fixture和作用域统计）。会话结束时输出：
+
+- 最耗时的fixture：按构建+清理总耗时排序，包括构建次数和作用域
+- 最慢的测试：按三个阶段总耗时排序
+- 作用域建议：构建多次、每次返回的值都相同、总耗时较高的fixture，
+  在依赖允许的范围内建议扩大作用域（值可能被测试修改时可以配合 shared_fixture 使用）
+
+fixture耗时只统计fixture自身的代码：
+- 构建：pytest_fixture_setup 执行时依赖的fixture已经构建好，不计入
+- 清理：在fixture构建完成后注册一个标记清理函数，它在fixture自身的清理代码之前执行，
+  记下开始时间；pytest_fixture_post_finalizer 在清理代码之后调用，记下结束时间
+
+CPU性能分析：给测试加 @pytest.mark.profile 标记，或者运行时加 --profile（分析所有选中的测试），
+只对测试的call阶段做cProfile分析，每个测试输出两个文件到 Settings.PROFILE_DIR：
+- <测试>.prof：pstats格式，python -m pstats 或 snakeviz 查看
+- <测试>.collapsed：折叠调用栈，flamegraph.pl 或 speedscope 生成火焰图（见 src/utils/profiling.py）
+
+两种分析都是未开启时不注册任何钩子，对测试没有额外开销；开启CPU分析时，没有选中的测试也不会启动profiler。
+xdist并行时各worker的记录通过 workeroutput 传回主进程一起汇总。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import cProfile
+import hashlib
+import inspect
+import pickle
+import pstats
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+
+# 作用域从窄到宽
+SCOPES = ["function", "class", "module", "package", "session"]
+# CPU分析结果在config上的stash键：[{"test", "duration", "prof", "collapsed", "top"}, ...]
+CPU_PROFILES = pytest.StashKey[list]()
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_profiling", "性能分析")
+    group.addoption(
+        "--fixture-durations",
+        type=int,
+        default=None,
+        metavar="N",
+        help="记录各阶段和各fixture的耗时，结束时输出最耗时的N个fixture、最慢的N个测试和作用域建议（0表示全部）",
+    )
+    group.addoption(
+        "--profile",
+        action="store_true",
+        default=False,
+        help="对所有选中测试的call阶段做cProfile分析，不加时只分析带profile标记的测试",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子 - 注册标记，开启时注册阶段耗时分析器
+
+    @param config pytest配置对象
+    """
+    config.addinivalue_line(
+        "markers",
+        "profile: 对该测试的call阶段做cProfile分析，输出pstats和火焰图折叠调用栈文件",
+    )
+    config.stash[CPU_PROFILES] = []
+    top = config.getoption("fixture_durations")
+    if top is not None:
+        config.pluginmanager.register(PhaseProfiler(config, top), "pytest_learn_phase_profiler")
+
+
+def pytest_collection_modifyitems(session, config, items):
+    """
+    收集完成钩子 - 有需要分析的测试时才注册CPU分析器
+
+    @param session pytest会话对象
+    @param config pytest配置对象
+    @param items 收集到的测试项
+    """
+    if config.pluginmanager.has_plugin("pytest_learn_cpu_profiler"):
+        return
+    if config.getoption("profile") or any(item.get_closest_marker("profile") for item in items):
+        config.pluginmanager.register(CallProfiler(config), "pytest_learn_cpu_profiler")
+
+
+def pytest_sessionfinish(session):
+    """
+    测试会话结束钩子 - xdist的worker把CPU分析结果放进workeroutput
+
+    @param session pytest会话对象
+    """
+    config = session.config
+    if hasattr(config, "workerinput"):
+        config.workeroutput["cpu_profiles"] = config.stash[CPU_PROFILES]
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+    xdist worker结束钩子 - 收集worker的CPU分析结果
+
+    @param node worker节点
+    @param error worker异常退出时的错误信息
+    """
+    node.config.stash[CPU_PROFILES].extend(getattr(node, "workeroutput", {}).get("cpu_profiles", []))
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """
+    终端汇总钩子 - 输出CPU分析结果文件和最耗时的函数
+
+    @param terminalreporter 终端输出对象
+    @param exitstatus 退出状态码
+    @param config pytest配置对象
+    """
+    results = config.stash.get(CPU_PROFILES, [])
+    if not results:
+        return
+    terminalreporter.section("CPU性能分析")
+    for result in sorted(results, key=lambda item: item["duration"], reverse=True):
+        terminalreporter.write_line(f"{result['test']}  call耗时 {result['duration']:.4f}s")
+        for label, own, cumulative in result["top"]:
+            terminalreporter.write_line(f"    自身 {own:.4f}s  累计 {cumulative:.4f}s  {label}")
+        terminalreporter.write_line(f"    {result['prof']}")
+        terminalreporter.write_line(f"    {result['collapsed']}")
+
+
+def fixture_location(fixturedef) -> str:
+    """
+    获取fixture定义的位置
+
+    @param fixturedef fixture定义
+    @return str 如 conftest.py:120
+    """
+    code = getattr(fixturedef.func, "__code__", None)
+    if code is None:
+        return fixturedef.baseid or "-"
+    return f"{Path(code.co_filename).name}:{code.co_firstlineno}"
+
+
+def value_fingerprint(value) -> Optional[str]:
+    """
+    计算fixture返回值的指纹，用于判断每次构建的值是否相同
+
+    无法序列化的值（如浏览器、连接等对象）返回None，不参与作用域建议。
+
+    @param value fixture返回值
+    @return str 指纹
+    """
+    try:
+        return hashlib.sha1(pickle.dumps(value, protocol=4)).hexdigest()
+    except Exception:
+        return None
+
+
+class PhaseProfiler:
+    """
+    阶段耗时分析器
+
+    @attr events fixture构建/清理记录
+    @attr phases 测试各阶段耗时 {nodeid: {setup/call/teardown: 秒}}
+    """
+
+    def __init__(self, config, top: int):
+        """
+        @param config pytest配置对象
+        @param top 报告中每部分显示的条数，0表示全部
+        """
+        self.config = config
+        self.top = top
+        self.events: List[dict] = []
+        self.phases: Dict[str, Dict[str, float]] = defaultdict(dict)
+        # 正在清理的fixture：{id(fixturedef): (开始时间, 记录)}
+        self._tearing_down: Dict[int, tuple] = {}
+
+    # ========================================
+    # fixture耗时
+    # ========================================
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        """
+        fixture构建钩子 - 记录构建耗时，并注册清理开始的标记
+
+        @param fixturedef fixture定义
+        @param request fixture请求对象
+        """
+        start = time.perf_counter()
+        outcome = yield
+        duration = time.perf_counter() - start
+        if outcome.excinfo is not None:
+            return
+        event = {
+            "fixture": fixturedef.argname,
+            "scope": fixturedef.scope,
+            "location": fixture_location(fixturedef),
+            "test": request.node.nodeid,
+            "setup": duration,
+            "teardown": 0.0,
+            "fingerprint": value_fingerprint(outcome.get_result()),
+            "max_scope": self._max_scope(fixturedef, request),
+        }
+        self.events.append(event)
+        key = id(fixturedef)
+        # 标记清理函数注册在fixture自身的清理代码之后，所以会在它之前执行
+        fixturedef.addfinalizer(lambda: self._tearing_down.__setitem__(key, (time.perf_counter(), event)))
+
+    def pytest_fixture_post_finalizer(self, fixturedef, request):
+        """
+        fixture清理完成钩子 - 记录清理耗时
+
+        @param fixturedef fixture定义
+        @param request fixture请求对象
+        """
+        started = self._tearing_down.pop(id(fixturedef), None)
+        if started is not None:
+            start, event = started
+            event["teardown"] = time.perf_counter() - start
+
+    @staticmethod
+    def _max_scope(fixturedef, request) -> str:
+        """
+        计算fixture在依赖允许的范围内可以使用的最宽作用域
+
+        依赖了更窄作用域的fixture（如tmp_path）时不能扩大到比依赖更宽。
+
+        @param fixturedef fixture定义
+        @param request fixture请求对象
+        @return str 作用域
+        """
+        widest = len(SCOPES) - 1
+        item = getattr(request, "_pyfuncitem", None)
+        fixtureinfo = getattr(item, "_fixtureinfo", None)
+        for argname in fixturedef.argnames:
+            if argname == "request":
+                continue
+            defs = fixtureinfo.name2fixturedefs.get(argname) if fixtureinfo else None
+            if not defs:
+                return fixturedef.scope
+            widest = min(widest, SCOPES.index(defs[-1].scope))
+        return SCOPES[widest]
+
+    # ========================================
+    # 测试阶段耗时
+    # ========================================
+
+    def pytest_runtest_logreport(self, report):
+        """
+        测试报告钩子 - 记录各阶段耗时
+
+        xdist并行时主进程也会收到worker的报告，阶段耗时直接在主进程统计。
+
+        @param report 测试报告
+        """
+        self.phases[report.nodeid][report.when] = report.duration
+
+    # ========================================
+    # 汇总
+    # ========================================
+
+    def pytest_sessionfinish(self, session):
+        """
+        测试会话结束钩子 - xdist的worker把fixture记录放进workeroutput
+
+        @param session pytest会话对象
+        """
+        if hasattr(self.config, "workerinput"):
+            self.config.workeroutput["fixture_events"] = self.events
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        """
+        xdist worker结束钩子 - 收集worker的fixture记录
+
+        @param node worker节点
+        @param error worker异常退出时的错误信息
+        """
+        self.events.extend(getattr(node, "workeroutput", {}).get("fixture_events", []))
+
+    def _limit(self, rows: list) -> list:
+        return rows if self.top == 0 else rows[:self.top]
+
+    def fixture_summary(self) -> List[dict]:
+        """
+        按fixture汇总构建和清理耗时
+
+        @return List[dict] 按总耗时从高到低排序
+        """
+        groups: Dict[tuple, dict] = {}
+        for event in self.events:
+            key = (event["fixture"], event["scope"], event["location"])
+            group = groups.setdefault(key, {
+                "fixture": event["fixture"], "scope": event["scope"], "location": event["location"],
+                "count": 0, "setup": 0.0, "teardown": 0.0, "max": 0.0,
+                "fingerprints": set(), "max_scope": event["max_scope"],
+            })
+            group["count"] += 1
+            group["setup"] += event["setup"]
+            group["teardown"] += event["teardown"]
+            group["max"] = max(group["max"], event["setup"] + event["teardown"])
+            group["fingerprints"].add(event["fingerprint"])
+            if SCOPES.index(event["max_scope"]) < SCOPES.index(group["max_scope"]):
+                group["max_scope"] = event["max_scope"]
+        rows = list(groups.values())
+        for row in rows:
+            row["total"] = row["setup"] + row["teardown"]
+        return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+    def scope_suggestions(self, fixtures: List[dict], min_seconds: float) -> List[dict]:
+        """
+        找出可以扩大作用域的fixture
+
+        条件：构建了多次，每次的值都相同（可序列化且指纹一致），
+        总耗时不低于 min_seconds，依赖允许扩大作用域。
+
+        @param fixtures fixture_summary 的结果
+        @param min_seconds 总耗时下限
+        @return List[dict] fixture汇总行，额外带有 suggested 字段
+        """
+        suggestions = []
+        for row in fixtures:
+            fingerprints = row["fingerprints"]
+            if row["count"] < 2 or row["total"] < min_seconds:
+                continue
+            if len(fingerprints) != 1 or None in fingerprints:
+                continue
+            if SCOPES.index(row["max_scope"]) <= SCOPES.index(row["scope"]):
+                continue
+            suggestions.append(dict(row, suggested=row["max_scope"]))
+        return suggestions
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """
+        终端汇总钩子 - 输出fixture耗时、慢测试和作用域建议
+
+        @param terminalreporter 终端输出对象
+        """
+        from src.config.settings import Settings
+        write = terminalreporter.write_line
+
+        fixtures = self.fixture_summary()
+        terminalreporter.section("最耗时的fixture")
+        write(f"{'fixture':<32} {'作用域':<7} {'次数':>6} {'构建(s)':>9} {'清理(s)':>9} {'合计(s)':>9} {'单次最长(s)':>11}  位置")
+        for row in self._limit(fixtures):
+            write(
+                f"{row['fixture']:<32} {row['scope']:<10} {row['count']:>8} {row['setup']:>11.4f} "
+                f"{row['teardown']:>11.4f} {row['total']:>11.4f} {row['max']:>16.4f}  {row['location']}"
+            )
+
+        tests = [
+            (nodeid, phases.get("setup", 0.0), phases.get("call", 0.0), phases.get("teardown", 0.0))
+            for nodeid, phases in self.phases.items()
+        ]
+        tests.sort(key=lambda row: row[1] + row[2] + row[3], reverse=True)
+        terminalreporter.section("最慢的测试")
+        write(f"{'setup(s)':>9} {'call(s)':>9} {'teardown(s)':>11} {'合计(s)':>9}  测试")
+        for nodeid, setup, call, teardown in self._limit(tests):
+            write(f"{setup:>9.4f} {call:>9.4f} {teardown:>11.4f} {setup + call + teardown:>11.4f}  {nodeid}")
+
+        suggestions = self.scope_suggestions(fixtures, Settings().PROFILE_SCOPE_HINT_SECONDS)
+        if suggestions:
+            terminalreporter.section("fixture作用域建议")
+            for row in suggestions:
+                write(
+                    f"{row['fixture']} ({row['location']}): scope={row['scope']} 构建了 {row['count']} 次，"
+                    f"共耗时 {row['total']:.3f}s，每次返回的值都相同，"
+                    f"可以改为 scope=\"{row['suggested']}\"（测试会修改返回值时使用 shared_fixture）"
+                )
+
+
+class CallProfiler:
+    """
+    测试call阶段的CPU分析器
+
+    分析结果保存在 config.stash[CPU_PROFILES] 中，由模块级的钩子汇总和输出，
+    这样xdist主进程（不执行测试，也就不注册分析器）也能输出各worker的结果。
+    """
+
+    def __init__(self, config):
+        """
+        @param config pytest配置对象
+        """
+        self.config = config
+        self.profile_all = config.getoption("profile")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        """
+        测试执行钩子 - 只在call阶段开启cProfile
+
+        @param item 测试项
+        """
+        if not (self.profile_all or item.get_closest_marker("profile")):
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        yield
+        profiler.disable()
+        self._save(item, profiler)
+
+    def _save(self, item, profiler):
+        """
+        保存一个测试的分析结果
+
+        折叠调用栈以测试函数为栈底，去掉pytest自身的调用层级。
+
+        @param item 测试项
+        @param profiler 已停止的profiler
+        """
+        from src.config.settings import Settings
+        from src.utils.profiling import profile_name, top_functions, write_profile
+
+        root = _test_function_key(item)
+        stats = pstats.Stats(profiler)
+        roots = [root] if root in stats.stats else None
+        prof_path, collapsed_path = write_profile(
+            profiler, Settings().PROFILE_DIR / profile_name(item.nodeid), roots,
+        )
+        duration = stats.stats[root][3] if roots else stats.total_tt
+        self.config.stash[CPU_PROFILES].append({
+            "test": item.nodeid,
+            "duration": duration,
+            "prof": str(prof_path),
+            "collapsed": str(collapsed_path),
+            "top": top_functions(stats, 3, roots),
+        })
+
+
+def _test_function_key(item) -> Optional[tuple]:
+    """
+    获取测试函数在pstats中的键
+
+    @param item 测试项
+    @return (文件名, 行号, 函数名)，不是普通测试函数时返回None
+    """
+    func = getattr(item, "obj", None)
+    if func is None:
+        return None
+    code = getattr(inspect.unwrap(func), "__code__", None)
+    if code is None:
+        return None
+    return code.co_filename, code.co_firstlineno, code.co_name
@@ -0,0 +1,288 @@
+"""
+结果缓存插件
+
+--result-cache 开启：测试的指纹（代码、fixture、导入的 src 模块、读取的数据文件，见 src/utils/result_cache.py）
+与上次通过时相同，就不再运行，直接报告为 cached。test_basic/ 中这类只依赖自身代码的测试，
+改动与它们无关时几乎不花时间。
+
+- 只缓存通过的测试；失败、跳过、xfail 的测试每次都运行
+- 不缓存结果依赖外部环境的测试：带 Settings.RESULT_CACHE_EXCLUDED_MARKERS 中的标记（api、ui 等）、
+  使用 Settings.RESULT_CACHE_EXCLUDED_FIXTURES 中的fixture（Playwright的page、benchmark 等）、
+  测试模块（直接或间接）导入了 Settings.RESULT_CACHE_EXCLUDED_IMPORTS 中的库（requests 等），
+  以及有序分组中的测试（依赖同组前面的测试的执行结果）
+- 读取的数据文件用审计钩子记录（与 impact_plugin 相同，见 src/utils/impact.py）
+
+缓存保存在 Settings.RESULT_CACHE_FILE，删除这个文件即可让所有测试重新运行。
+xdist并行时各worker的结果通过 workeroutput 传回主进程保存。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import inspect
+from typing import Dict, Optional, Set
+
+import pytest
+
+# 使用缓存结果的测试的跳过原因前缀，用于识别报告
+CACHED_REASON = "[cached]"
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_scheduling", "测试调度")
+    group.addoption(
+        "--result-cache",
+        action="store_true",
+        default=False,
+        help="跳过指纹（代码、fixture、导入的模块、数据文件）与上次通过时相同的测试，报告为cached",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子 - 开启时注册结果缓存
+
+    @param config pytest配置对象
+    """
+    if config.getoption("result_cache"):
+        config.pluginmanager.register(ResultCache(config), "pytest_learn_result_cache")
+
+
+def is_cached_report(report) -> bool:
+    """
+    报告是否为使用缓存结果的测试（被插件跳过）
+
+    @param report 测试报告
+    @return bool 是否使用了缓存
+    """
+    return (report.skipped and isinstance(report.longrepr, tuple)
+            and str(report.longrepr[2]).startswith(f"Skipped: {CACHED_REASON}"))
+
+
+class ResultCache:
+    """
+    结果缓存
+
+    @attr fingerprints 本进程中可缓存的测试的指纹 {测试ID: 指纹}
+    @attr cached 使用缓存结果的测试
+    @attr updates 本次运行对缓存的修改 {测试ID: 新记录或None（删除）}
+    """
+
+    def __init__(self, config):
+        """
+        @param config pytest配置对象
+        """
+        from src.config.settings import Settings
+        from src.utils.result_cache import Fingerprinter, ResultCacheStore
+
+        settings = Settings()
+        self.config = config
+        self.settings = settings
+        self.store = ResultCacheStore(settings.RESULT_CACHE_FILE)
+        self.fingerprinter = Fingerprinter(settings.BASE_DIR)
+        self.fingerprints: Dict[str, str] = {}
+        self.cached: Set[str] = set()
+        self.updates: Dict[str, Optional[dict]] = {}
+        self.reported = 0
+        self._failed: Set[str] = set()
+        # fixture构建时读取的文件 {fixture_key: 文件}
+        self._fixture_files: Dict[tuple, Set[str]] = {}
+
+    def _recorder(self):
+        """
+        读取文件的记录器，同时开启了 --impact-record 时共用它的记录器
+        """
+        from src.utils import impact
+        return impact.get_recorder() or impact.enable(self.settings.BASE_DIR, self.settings.IMPACT_IGNORED)
+
+    # ========================================
+    # 指纹和跳过
+    # ========================================
+
+    def _fingerprint(self, item) -> Optional[str]:
+        """
+        计算可缓存的测试的指纹
+
+        @param item 测试项
+        @return str 指纹，不可缓存的测试为None
+        """
+        from src.plugins.scheduling_plugin import ordered_group
+
+        settings = self.settings
+        if not isinstance(item, pytest.Function) or self.fingerprinter.relative(item.path) is None:
+            return None
+        if any(item.get_closest_marker(name) for name in settings.RESULT_CACHE_EXCLUDED_MARKERS + ["xfail"]):
+            return None
+        if set(item.fixturenames) & set(settings.RESULT_CACHE_EXCLUDED_FIXTURES) or ordered_group(item):
+            return None
+
+        fixture_files, builtin = set(), set()
+        for name in item.fixturenames:
+            fixturedefs = item._fixtureinfo.name2fixturedefs.get(name)
+            if not fixturedefs:
+                continue
+            try:
+                source = inspect.getsourcefile(inspect.unwrap(fixturedefs[-1].func))
+            except TypeError:
+                source = None
+            if source and self.fingerprinter.relative(source) is not None:
+                fixture_files.add(source)
+            else:
+                builtin.add(name)
+        result = self.fingerprinter.fingerprint(item.path, item.function.__qualname__, fixture_files, builtin)
+        if result is None:
+            return None
+        fingerprint, imports = result
+        if imports & set(settings.RESULT_CACHE_EXCLUDED_IMPORTS):
+            return None
+        return fingerprint
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        """
+        收集完成钩子 - 计算指纹，给可以使用缓存结果的测试加上跳过标记
+
+        @param session pytest会话对象
+        @param config pytest配置对象
+        @param items 收集到的测试项
+        """
+        for item in items:
+            fingerprint = self._fingerprint(item)
+            if fingerprint is None:
+                continue
+            test = item.nodeid
+            self.fingerprints[test] = fingerprint
+            if self.store.is_valid(test, fingerprint, self.fingerprinter):
+                self.cached.add(test)
+                item.add_marker(pytest.mark.skip(reason=f"{CACHED_REASON} 指纹与上次通过时相同"))
+
+    # ========================================
+    # 记录结果
+    # ========================================
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        """
+        测试执行钩子 - 记录测试读取的数据文件，测试通过后保存指纹
+
+        @param item 测试项
+        @param nextitem 下一个测试项
+        """
+        from src.utils.impact import fixture_files
+
+        test = item.nodeid
+        if test not in self.fingerprints or test in self.cached:
+            yield
+            return
+        recorder = self._recorder()
+        recorder.push()
+        try:
+            yield
+        finally:
+            files = recorder.pop()
+        if test in self._failed:
+            self.updates[test] = None
+            return
+        files |= fixture_files(item, self._fixture_files)
+        root = self.fingerprinter.root
+        self.updates[test] = {
+            "fingerprint": self.fingerprints[test],
+            "data": {
+                path: self.fingerprinter.digest(root / path, refresh=True)
+                for path in sorted(files) if not path.endswith(".py")
+            },
+        }
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        """
+        fixture构建钩子 - 记录构建期间读取的文件
+
+        @param fixturedef fixture定义
+        @param request fixture请求对象
+        """
+        from src.utils.impact import fixture_key
+
+        recorder = self._recorder()
+        recorder.push()
+        try:
+            yield
+        finally:
+            files = recorder.pop()
+        self._fixture_files.setdefault(fixture_key(fixturedef), set()).update(files)
+
+    def pytest_runtest_logreport(self, report):
+        """
+        测试报告钩子 - 记下没有通过的测试，统计使用缓存的测试
+
+        @param report 测试报告
+        """
+        if is_cached_report(report):
+            self.reported += 1
+        elif report.failed or report.skipped or hasattr(report, "wasxfail"):
+            self._failed.add(report.nodeid)
+
+    def pytest_report_teststatus(self, report, config):
+        """
+        测试状态钩子 - 使用缓存结果的测试显示为 cached
+
+        @param report 测试报告
+        @param config pytest配置对象
+        @return (统计分类, 简短标记, 详细标记)
+        """
+        if report.when == "setup" and is_cached_report(report):
+            return "cached", "c", ("CACHED", {"green": True})
+        return None
+
+    def pytest_sessionfinish(self, session):
+        """
+        测试会话结束钩子 - 保存缓存，xdist的worker把修改放进workeroutput
+
+        @param session pytest会话对象
+        """
+        if hasattr(self.config, "workerinput"):
+            self.config.workeroutput["result_cache_updates"] = self.updates
+            return
+        if not self.updates:
+            return
+        for test, entry in self.updates.items():
+            self.store.update(test, entry)
+        self.store.save()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        """
+        xdist worker结束钩子 - 收集worker对缓存的修改
+
+        @param node worker节点
+        @param error worker异常退出时的错误信息
+        """
+        self.updates.update(getattr(node, "workeroutput", {}).get("result_cache_updates", {}))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """
+        终端汇总钩子 - 输出使用缓存和新缓存的测试数
+
+        @param terminalreporter 终端输出对象
+        """
+        saved = sum(1 for entry in self.updates.values() if entry is not None)
+        if not self.reported and not saved:
+            return
+        terminalreporter.section("结果缓存")
+        terminalreporter.write_line(
+            f"{self.reported} 个测试的指纹没有变化，使用了上次通过的结果；新缓存 {saved} 个通过的测试: {self.store.path}"
+        )
+
+    def pytest_unconfigure(self, config):
+        """
+        配置清理钩子 - 关闭文件记录
+
+        @param config pytest配置对象
+        """
+        from src.utils import impact
+        impact.disable()
@@ -0,0 +1,666 @@
+"""
+测试调度插件
+
+记录每个测试的历史耗时和上一次失败的测试（见 src/utils/duration_store.py），
+--schedule-by-duration 开启后按历史耗时给xdist的worker分配测试（只用于默认的 --dist load，
+指定了其他 --dist 方式时给出警告，仍由xdist的调度器分配）：
+
+- 工作单元：测试类的所有方法是一个单元，始终在同一个worker上按原顺序运行（类作用域的fixture只构建一次）；
+  模块中的测试函数每个是一个单元，可以分到不同的worker上
+- 最长优先（LPT）：每当一个worker快要空闲时，把剩下的单元中估计耗时最长的交给它。
+  耗时长的测试（如Playwright测试）最先开始，最后剩下的都是很快的测试，各worker几乎同时结束；
+  默认的分配方式不知道耗时，长测试常常在最后才轮到，整个运行只能等那一个worker
+- 失败优先：包含上一次失败测试的单元排在最前面，修复中的问题尽早看到结果
+- 没有历史的测试按已知耗时的中位数估计
+- 有序分组：标记了 @pytest.mark.ordered_group 的测试类或模块是一个不可拆分的单元，
+  组内的测试始终在同一个worker（同一片）上按收集顺序运行，组外的测试照常分散到各worker。
+  用于方法之间通过类属性传递数据、必须按顺序执行的测试（如 Test01CaseApi）；
+  同名的组（@pytest.mark.ordered_group("login")）即使分布在不同的类或模块中也是同一个单元。
+  不开启 --schedule-by-duration 的 -n 运行（默认的 --dist load）同样保证有序分组不被拆开，
+  其余测试仍然逐个分配；收集到的测试中没有有序分组时使用xdist自己的 LoadScheduling，与不装这个插件完全相同。
+  指定了其他 --dist 方式时由xdist自己的调度器分配，有序分组不保证在同一个worker上
+
+xdist的主进程不收集测试，只拿到测试ID。有序分组由worker收集后按标记计算，
+写到主进程指定的文件（workerinput["ordered_groups_file"]）中，调度器读取后作为单元的键；
+测试ID本身不做任何修改。因此有序分组只对本机的worker（-n）生效。
+
+不使用xdist时只把上一次失败的测试所在的单元提前运行。
+耗时历史只在开启了 --schedule-by-duration、--record-durations 或作为分布式运行的协调者时，
+在运行结束时更新（只在主进程写入），运行一部分测试时只更新这部分；平时运行不会改写 .test_durations.json。
+分片运行时不更新。
+
+--shard=i/n 把测试按历史耗时分成n片，只运行第i片，用于多台机器分担一次完整运行，
+结束时在 Settings.SHARD_DIR 写分片清单，用 python -m src.utils.sharding merge 合并（见 src/utils/sharding.py）。
+可以和 -n 一起使用：先分片，片内再由xdist并行。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import heapq
+import itertools
+import json
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+try:
+    from xdist.scheduler import LoadScheduling, LoadScopeScheduling
+except ImportError:
+    LoadScheduling = LoadScopeScheduling = None
+
+# 耗时历史在config上的stash键
+DURATION_STORE = pytest.StashKey[object]()
+
+# 有序分组的工作单元名称前缀，与测试类、测试函数的单元区分开
+GROUP_PREFIX = "@ordered_group:"
+
+# xdist主进程上存放各worker有序分组文件的临时目录的stash键
+ORDERED_GROUPS_DIR = pytest.StashKey[Path]()
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_scheduling", "测试调度")
+    group.addoption(
+        "--schedule-by-duration",
+        action="store_true",
+        default=False,
+        help="按历史耗时给xdist的worker分配测试（最长优先），上一次失败的测试最先运行",
+    )
+    group.addoption(
+        "--record-durations",
+        action="store_true",
+        default=False,
+        help="不改变调度，只在运行结束时更新耗时历史（开启 --schedule-by-duration 时总是更新）",
+    )
+    group.addoption(
+        "--shard",
+        default=None,
+        metavar="i/n",
+        help="按历史耗时把测试分成n片，只运行第i片（从1开始），结束时写分片清单",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子 - 注册标记，读取耗时历史，主进程注册耗时记录器
+
+    @param config pytest配置对象
+    """
+    config.addinivalue_line(
+        "markers",
+        "ordered_group(name=None): 有序分组，组内的测试在同一个worker上按顺序运行，不指定名称时每个类或模块是一组",
+    )
+    from src.config.settings import Settings
+    from src.utils.duration_store import DurationStore
+
+    settings = Settings()
+    store = DurationStore(settings.DURATION_STORE, settings.DURATION_EWMA_ALPHA)
+    config.stash[DURATION_STORE] = store
+    shard = config.getoption("shard")
+    if records_durations(config):
+        config.pluginmanager.register(DurationRecorder(store), "pytest_learn_duration_recorder")
+
+    if shard is not None:
+        from src.utils.sharding import parse_shard
+        try:
+            index, total = parse_shard(shard)
+        except ValueError as e:
+            raise pytest.UsageError(str(e)) from None
+        config.pluginmanager.register(ShardSelector(config, store, index, total), "pytest_learn_shard")
+
+
+def records_durations(config) -> bool:
+    """
+    本进程是否在运行结束时更新耗时历史
+
+    只在用到耗时历史的运行中记录：--schedule-by-duration、--record-durations、分布式运行的协调者。
+    分片运行时耗时历史只读：各分片必须用同一份历史才能分得一致，耗时由 sharding merge --update-durations 统一更新；
+    xdist的worker和分布式运行的worker不记录，它们的报告都会发回主进程（协调者）统一记录。
+
+    @param config pytest配置对象
+    @return bool 是否记录
+    """
+    if hasattr(config, "workerinput") or config.getoption("shard") is not None:
+        return False
+    if config.getoption("worker", None) is not None:
+        return False
+    coordinator = config.getoption("coordinator", None) is not None or config.getoption("spawn_workers", 0)
+    return bool(config.getoption("schedule_by_duration") or config.getoption("record_durations") or coordinator)
+
+
+def pytest_report_header(config):
+    """
+    报告头钩子 - 显示分片，开启调度时显示耗时历史的情况
+
+    @param config pytest配置对象
+    @return List[str] 报告头中的行
+    """
+    lines = []
+    if config.getoption("shard") is not None:
+        lines.append(f"分片: {config.getoption('shard')}")
+    if not config.getoption("schedule_by_duration"):
+        return lines
+    store = config.stash[DURATION_STORE]
+    return lines + [f"按历史耗时调度: 已知 {len(store.durations)} 个测试的耗时，上次失败 {len(store.failed)} 个（{store.path.name}）"]
+
+
+def ordered_group(item) -> Optional[str]:
+    """
+    测试所属的有序分组
+
+    @param item 测试项
+    @return str 标记中指定的组名，没有指定时为打了标记的类或模块的ID；没有标记时为None
+    """
+    marker = item.get_closest_marker("ordered_group")
+    if marker is None:
+        return None
+    name = marker.args[0] if marker.args else marker.kwargs.get("name")
+    if name:
+        return str(name)
+    for node in reversed(item.listchain()):
+        if any(mark.name == "ordered_group" for mark in node.own_markers):
+            return node.nodeid
+    return item.nodeid
+
+
+def work_unit(nodeid: str) -> str:
+    """
+    测试所属的工作单元（不考虑有序分组）
+
+    @param nodeid 测试用例ID
+    @return str 测试类中的方法返回类的ID，模块中的函数返回测试自身的ID
+    """
+    parts = nodeid.split("[", 1)[0].split("::")
+    if len(parts) > 2:
+        return "::".join(parts[:-1])
+    return nodeid
+
+
+def item_work_unit(item) -> str:
+    """
+    测试项所属的工作单元
+
+    @param item 测试项
+    @return str 有序分组的测试返回带前缀的组名，其他同 work_unit
+    """
+    group = ordered_group(item)
+    if group is not None:
+        return GROUP_PREFIX + group
+    return work_unit(item.nodeid)
+
+
+def unit_priority(store, nodeids, default: float) -> Tuple[bool, float]:
+    """
+    工作单元的调度优先级，值越大越先运行
+
+    @param store 耗时历史
+    @param nodeids 单元中的测试
+    @param default 没有历史的测试的估计耗时
+    @return (是否包含上次失败的测试, 估计总耗时)
+    """
+    failed = any(nodeid in store.failed for nodeid in nodeids)
+    return failed, sum(store.estimate(nodeid, default) for nodeid in nodeids)
+
+
+@pytest.hookimpl(optionalhook=True, tryfirst=True)
+def pytest_xdist_make_scheduler(config, log):
+    """
+    xdist创建调度器钩子 - 开启调度时使用按耗时调度的调度器，默认的 --dist load 有有序分组时换成保证有序分组的调度器
+
+    @param config pytest配置对象
+    @param log xdist日志对象
+    @return 调度器，使用其他 --dist 方式时返回None，由xdist创建
+    """
+    dist = config.getoption("dist", None)
+    if dist != "load":
+        if config.getoption("schedule_by_duration"):
+            config.issue_config_time_warning(
+                pytest.PytestConfigWarning(f"--schedule-by-duration 只用于 --dist load，--dist {dist} 仍由xdist调度"),
+                stacklevel=2,
+            )
+        return None
+    if config.getoption("schedule_by_duration"):
+        return DurationScheduling(config, log)
+    return DeferredScheduling(config, log)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    xdist配置worker钩子 - 告诉worker把有序分组写到哪个文件
+
+    @param node worker节点
+    """
+    config = node.config
+    if ORDERED_GROUPS_DIR not in config.stash:
+        config.stash[ORDERED_GROUPS_DIR] = Path(tempfile.mkdtemp(prefix="pytest_learn_groups_"))
+    path = config.stash[ORDERED_GROUPS_DIR] / f"{node.workerinput['workerid']}.json"
+    node.workerinput["ordered_groups_file"] = str(path)
+
+
+def pytest_unconfigure(config):
+    """
+    配置清理钩子 - 删除xdist主进程的有序分组临时目录
+
+    @param config pytest配置对象
+    """
+    directory = config.stash.get(ORDERED_GROUPS_DIR, None)
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def pytest_collection_modifyitems(session, config, items):
+    """
+    收集完成钩子 - 不使用xdist时把上一次失败的测试所在的单元提前
+
+    xdist的worker不调整顺序（各worker的收集结果必须一致，由主进程的调度器决定顺序），
+    只把有序分组的测试写到主进程指定的文件中，主进程的调度器据此把同组的测试分给同一个worker。
+
+    @param session pytest会话对象
+    @param config pytest配置对象
+    @param items 收集到的测试项
+    """
+    if hasattr(config, "workerinput"):
+        path = config.workerinput.get("ordered_groups_file")
+        if path is not None:
+            groups = {item.nodeid: item_work_unit(item) for item in items if ordered_group(item) is not None}
+            write_ordered_groups(Path(path), groups)
+        return
+    if not config.getoption("schedule_by_duration"):
+        return
+    store = config.stash[DURATION_STORE]
+    failed_units = {item_work_unit(item) for item in items if item.nodeid in store.failed}
+    if failed_units:
+        items.sort(key=lambda item: item_work_unit(item) not in failed_units)
+
+
+def write_ordered_groups(path: Path, groups: Dict[str, str]):
+    """
+    写有序分组文件（先写临时文件再改名，主进程不会读到写了一半的文件）
+
+    @param path 文件路径
+    @param groups {测试ID: 有序分组的单元}
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(groups, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def read_ordered_groups(path: Optional[str]) -> Dict[str, str]:
+    """
+    读取worker写的有序分组文件
+
+    @param path 文件路径，None表示没有
+    @return Dict {测试ID: 有序分组的单元}，文件不存在（如远程的worker）时为空
+    """
+    if path is None:
+        return {}
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+class DurationRecorder:
+    """
+    本次运行的耗时记录器，只在主进程注册
+
+    @attr durations 本次运行的耗时和结果 {nodeid: [总耗时, 是否失败]}
+    """
+
+    def __init__(self, store):
+        """
+        @param store 耗时历史
+        """
+        self.store = store
+        self.durations: Dict[str, list] = {}
+
+    def pytest_runtest_logreport(self, report):
+        """
+        测试报告钩子 - 累计每个测试各阶段的耗时
+
+        xdist并行时主进程也会收到worker的报告，直接在主进程统计。
+
+        @param report 测试报告
+        """
+        record = self.durations.setdefault(report.nodeid, [0.0, False])
+        record[0] += report.duration
+        record[1] = record[1] or report.failed
+
+    def pytest_sessionfinish(self, session):
+        """
+        测试会话结束钩子 - 更新并保存耗时历史
+
+        @param session pytest会话对象
+        """
+        if not self.durations:
+            return
+        for nodeid, (duration, failed) in self.durations.items():
+            self.store.update(nodeid, duration, failed)
+        self.store.save()
+
+
+class ShardSelector:
+    """
+    分片选择器：只保留本片的测试，结束时写分片清单
+
+    xdist的worker也注册（各worker收集后同样只保留本片的测试，收集结果一致），清单只由主进程写。
+
+    @attr index 第几片（从1开始）
+    @attr total 总片数
+    @attr tests 本片的测试
+    @attr results 本片的测试结果 {nodeid: passed/failed/skipped}
+    """
+
+    def __init__(self, config, store, index: int, total: int):
+        """
+        @param config pytest配置对象
+        @param store 耗时历史
+        @param index 第几片
+        @param total 总片数
+        """
+        self.config = config
+        self.store = store
+        self.index = index
+        self.total = total
+        self.tests: List[str] = []
+        self.estimated = 0.0
+        self.results: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self.manifest_path = None
+        # 没有历史的测试的估计耗时，完全没有历史时每个测试按1秒估计（按测试数平均分）
+        self._default = store.typical() or 1.0
+        self._started = time.time()
+
+    def _estimate(self, nodeid: str) -> float:
+        return self.store.estimate(nodeid, self._default)
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        """
+        收集完成钩子 - 只保留本片的测试
+
+        在其他插件（-k、-m 的筛选，失败优先的排序）之后执行，只对选中的测试分片，保持原有顺序。
+
+        @param session pytest会话对象
+        @param config pytest配置对象
+        @param items 收集到的测试项
+        """
+        from src.utils.sharding import split_shards
+
+        units: Dict[str, List[str]] = {}
+        for item in items:
+            units.setdefault(item_work_unit(item), []).append(item.nodeid)
+        mine = set(split_shards(units, self._estimate, self.total)[self.index - 1])
+
+        selected, deselected = [], []
+        for item in items:
+            (selected if item_work_unit(item) in mine else deselected).append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+        self.tests = [item.nodeid for item in selected]
+        self.estimated = sum(self._estimate(nodeid) for nodeid in self.tests)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_node_collection_finished(self, node, ids):
+        """
+        xdist worker收集完成钩子 - 主进程不收集测试，从worker的收集结果得到本片的测试
+
+        @param node worker节点
+        @param ids 收集到的测试ID（已经只包含本片）
+        """
+        if not self.tests:
+            self.tests = list(ids)
+            self.estimated = sum(self._estimate(nodeid) for nodeid in self.tests)
+
+    def pytest_runtest_logreport(self, report):
+        """
+        测试报告钩子 - 记录结果和耗时
+
+        @param report 测试报告
+        """
+        nodeid = report.nodeid
+        self.durations[nodeid] = self.durations.get(nodeid, 0.0) + report.duration
+        if report.failed:
+            self.results[nodeid] = "failed"
+        elif report.skipped and self.results.get(nodeid) != "failed":
+            self.results[nodeid] = "skipped"
+        elif report.when == "call" and nodeid not in self.results:
+            self.results[nodeid] = "passed"
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        """
+        测试会话结束钩子 - 主进程写分片清单
+
+        @param session pytest会话对象
+        @param exitstatus 退出状态码
+        """
+        if hasattr(self.config, "workerinput") or self.config.option.collectonly:
+            return
+        from src.config.settings import Settings
+        from src.utils.sharding import write_manifest
+
+        self.manifest_path = Settings().SHARD_DIR / f"shard-{self.index}-of-{self.total}.json"
+        write_manifest(self.manifest_path, {
+            "shard": self.index,
+            "total": self.total,
+            "node": platform.node(),
+            "started": datetime.fromtimestamp(self._started).isoformat(timespec="seconds"),
+            "elapsed": time.time() - self._started,
+            "exitstatus": int(exitstatus),
+            "estimated": self.estimated,
+            "tests": self.tests,
+            "results": self.results,
+            "durations": self.durations,
+        })
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """
+        终端汇总钩子 - 输出分片清单位置
+
+        @param terminalreporter 终端输出对象
+        """
+        if self.manifest_path is None:
+            return
+        terminalreporter.section("分片")
+        terminalreporter.write_line(
+            f"第 {self.index}/{self.total} 片: {len(self.tests)} 个测试，估计耗时 {self.estimated:.1f}s"
+        )
+        terminalreporter.write_line(f"分片清单: {self.manifest_path}")
+        terminalreporter.write_line("所有分片结束后用 python -m src.utils.sharding merge <清单...> 合并结果")
+
+
+if LoadScopeScheduling is not None:
+
+    class OrderedGroupScheduling(LoadScopeScheduling):
+        """
+        保证有序分组的xdist调度器
+
+        在 LoadScopeScheduling 的基础上，有序分组的测试是一个单元，其余测试各自是一个单元
+        （与默认的 --dist load 一样逐个分配）。有序分组从worker写的文件中读取（见 read_ordered_groups）。
+        """
+
+        def __init__(self, config, log=None):
+            """
+            @param config pytest配置对象
+            @param log xdist日志对象
+            """
+            super().__init__(config, log)
+            self.groups: Dict[str, str] = {}
+            # 测试ID在收集结果中的位置（各worker的收集结果相同）
+            self._positions: Optional[Dict[str, int]] = None
+
+        def add_node_collection(self, node, collection):
+            """
+            记录worker的收集结果，同时读取它写的有序分组
+
+            @param node worker节点
+            @param collection 收集到的测试ID
+            """
+            if not self.groups:
+                self.groups = read_ordered_groups(node.workerinput.get("ordered_groups_file"))
+            super().add_node_collection(node, collection)
+
+        def _split_scope(self, nodeid: str) -> str:
+            return self.groups.get(nodeid) or self._default_scope(nodeid)
+
+        def _assign_work_unit(self, node):
+            """
+            把队列最前面的单元分配给node
+
+            与 LoadScopeScheduling 相同，只是按字典查找测试在收集结果中的位置：
+            单元很多（每个测试一个单元）时逐个 list.index 查找是平方复杂度。
+
+            @param node worker节点
+            """
+            if self._positions is None:
+                self._positions = {nodeid: index for index, nodeid in enumerate(self.collection)}
+            scope, unit = self.workqueue.popitem(last=False)
+            self.assigned_work.setdefault(node, {})[scope] = unit
+            node.send_runtest_some([self._positions[nodeid] for nodeid, completed in unit.items() if not completed])
+
+        def _default_scope(self, nodeid: str) -> str:
+            """
+            不在有序分组中的测试所属的单元
+
+            @param nodeid 测试用例ID
+            @return str 单元
+            """
+            return nodeid
+
+    class DeferredScheduling:
+        """
+        默认的 --dist load 使用的调度器：收到第一个worker的收集结果时才决定由谁调度
+
+        创建调度器时主进程还没有任何收集结果，不知道有没有有序分组。
+        worker在发送收集结果之前已经写好有序分组文件，第一次 add_node_collection 时读取：
+        有有序分组时交给 OrderedGroupScheduling，没有时交给xdist的 LoadScheduling。
+        在此之前加入的worker先记下来，选定后依次交给实际的调度器，之后的调用全部转发。
+        """
+
+        def __init__(self, config, log=None):
+            """
+            @param config pytest配置对象
+            @param log xdist日志对象
+            """
+            self.config = config
+            self.log = log
+            self.scheduler = None
+            self._nodes: List[object] = []
+
+        @property
+        def nodes(self) -> List[object]:
+            return self.scheduler.nodes if self.scheduler is not None else list(self._nodes)
+
+        @property
+        def collection_is_completed(self) -> bool:
+            return self.scheduler is not None and self.scheduler.collection_is_completed
+
+        @property
+        def tests_finished(self) -> bool:
+            return self.scheduler is not None and self.scheduler.tests_finished
+
+        @property
+        def has_pending(self) -> bool:
+            return self.scheduler is not None and self.scheduler.has_pending
+
+        def add_node(self, node):
+            if self.scheduler is not None:
+                self.scheduler.add_node(node)
+            else:
+                self._nodes.append(node)
+
+        def remove_node(self, node):
+            if self.scheduler is not None:
+                return self.scheduler.remove_node(node)
+            self._nodes.remove(node)
+            return None
+
+        def add_node_collection(self, node, collection):
+            """
+            记录worker的收集结果，第一次调用时按有序分组选定实际的调度器
+
+            @param node worker节点
+            @param collection 收集到的测试ID
+            """
+            if self.scheduler is None:
+                groups = read_ordered_groups(node.workerinput.get("ordered_groups_file"))
+                if groups:
+                    self.scheduler = OrderedGroupScheduling(self.config, self.log)
+                    self.scheduler.groups = groups
+                else:
+                    self.scheduler = LoadScheduling(self.config, self.log)
+                for pending in self._nodes:
+                    self.scheduler.add_node(pending)
+                self._nodes.clear()
+            self.scheduler.add_node_collection(node, collection)
+
+        def mark_test_complete(self, node, item_index, duration=0):
+            self.scheduler.mark_test_complete(node, item_index, duration)
+
+        def mark_test_pending(self, item):
+            self.scheduler.mark_test_pending(item)
+
+        def remove_pending_tests_from_node(self, node, indices):
+            self.scheduler.remove_pending_tests_from_node(node, indices)
+
+        def schedule(self):
+            self.scheduler.schedule()
+
+    class DurationScheduling(OrderedGroupScheduling):
+        """
+        按历史耗时调度的xdist调度器
+
+        在 OrderedGroupScheduling 的基础上修改了两点：
+        - 测试类是一个单元，模块中的函数各自是一个单元
+        - _assign_work_unit：不按收集顺序，而是先取优先级最高（失败优先、估计耗时最长）的单元
+        """
+
+        def __init__(self, config, log=None):
+            """
+            @param config pytest配置对象
+            @param log xdist日志对象
+            """
+            super().__init__(config, log)
+            self.store = config.stash[DURATION_STORE]
+            self._default = self.store.typical()
+            # 待分配单元的堆: (不含失败的测试, -估计耗时, 入堆顺序, 单元)，堆顶是优先级最高的单元
+            self._heap: List[Tuple[bool, float, int, str]] = []
+            self._queued = set()
+            self._order = itertools.count()
+
+        def _default_scope(self, nodeid: str) -> str:
+            return work_unit(nodeid)
+
+        def _assign_work_unit(self, node):
+            """
+            把优先级最高的单元移到队列最前面，再按原逻辑分配给node
+
+            队列中还没入堆的单元（第一次分配时的全部单元、崩溃的worker退回的单元）先入堆，
+            每次分配只需从堆顶取出，不用扫描整个队列。
+
+            @param node worker节点
+            """
+            if len(self._queued) != len(self.workqueue):
+                for scope, unit in self.workqueue.items():
+                    if scope not in self._queued:
+                        failed, estimate = unit_priority(self.store, unit, self._default)
+                        heapq.heappush(self._heap, (not failed, -estimate, next(self._order), scope))
+                        self._queued.add(scope)
+            scope = heapq.heappop(self._heap)[-1]
+            self._queued.discard(scope)
+            self.workqueue.move_to_end(scope, last=False)
+            super()._assign_work_unit(node)
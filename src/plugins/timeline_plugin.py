@@ -0,0 +1,271 @@
+"""
+时间线插件
+
+--timeline 开启：记录测试运行过程中各段代码的开始时间和耗时，保存为 Chrome Trace Event JSON，
+在 chrome://tracing 或 https://ui.perfetto.dev 中打开可以按时间线查看：
+
+- collection：收集测试
+- 测试：每个测试一段，下面分 setup、call、teardown 三个阶段
+- fixture：每个fixture的构建和清理（清理只统计fixture自身的清理代码，做法同 profiler_plugin）
+- http：RequestUtil 发起的请求
+- playwright：Page.goto 页面跳转
+
+xdist并行时每个worker是一个单独的轨道（gw0、gw1 ...）：worker各自写一个时间线文件，
+主进程在结束时合并为一个文件。哪个worker在空等、哪些测试只能串行、哪个fixture拖慢了整体，一眼就能看出来。
+
+未开启时插件不注册任何钩子，src/utils/tracing.py 中的 span() 也不记录任何内容。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import functools
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行参数
+
+    @param parser pytest命令行参数解析器
+    """
+    group = parser.getgroup("pytest_learn_profiling", "性能分析")
+    group.addoption(
+        "--timeline",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="记录测试、fixture、HTTP请求、页面跳转的时间线，保存为Chrome Trace JSON，默认见 Settings.TIMELINE_FILE",
+    )
+
+
+def pytest_configure(config):
+    """
+    配置钩子 - 开启时注册时间线记录器
+
+    @param config pytest配置对象
+    """
+    path = config.getoption("timeline")
+    if path is None:
+        return
+    from src.config.settings import Settings
+    output = Path(path) if path else Settings().TIMELINE_FILE
+    config.pluginmanager.register(TimelineRecorder(config, output), "pytest_learn_timeline")
+
+
+def _patch_playwright_goto():
+    """
+    给 Playwright 的 Page.goto 加上时间线记录，没有安装playwright时跳过
+
+    @return 恢复原方法的函数，没有打补丁时为None
+    """
+    try:
+        from playwright.sync_api import Page
+    except ImportError:
+        return None
+    from src.utils.tracing import span
+
+    original = Page.goto
+
+    @functools.wraps(original)
+    def goto(self, url, *args, **kwargs):
+        with span(f"goto {url}", "playwright", url=url) as trace:
+            response = original(self, url, *args, **kwargs)
+            trace.set("status", response.status if response is not None else None)
+        return response
+
+    Page.goto = goto
+
+    def restore():
+        Page.goto = original
+    return restore
+
+
+class TimelineRecorder:
+    """
+    时间线记录器
+
+    @attr output 合并后的时间线文件
+    @attr tracer 当前进程的跟踪器
+    """
+
+    def __init__(self, config, output: Path):
+        """
+        @param config pytest配置对象
+        @param output 时间线文件路径
+        """
+        from src.utils import tracing
+
+        self.config = config
+        self.output = output
+        workerinput = getattr(config, "workerinput", None)
+        if workerinput is not None:
+            worker_id = workerinput["workerid"]
+            self.tracer = tracing.enable(int(worker_id.lstrip("gw") or 0) + 1, worker_id)
+        else:
+            self.tracer = tracing.enable(0, "main")
+        self._restore_playwright = _patch_playwright_goto()
+        # 各worker的时间线文件（主进程收集）
+        self._worker_files: List[str] = []
+        # 正在清理的fixture：{id(fixturedef): (开始时间, fixture名称, 附加信息)}
+        self._tearing_down: Dict[int, tuple] = {}
+        self.saved = None
+
+    # ========================================
+    # 测试和fixture
+    # ========================================
+
+    def _span(self, name: str, cat: str, **args):
+        from src.utils.tracing import Span
+        return Span(self.tracer, name, cat, args)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_collection(self, session):
+        """
+        收集钩子 - 记录收集测试的耗时
+
+        @param session pytest会话对象
+        """
+        with self._span("collection", "session"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        """
+        测试执行钩子 - 记录整个测试（setup + call + teardown）
+
+        @param item 测试项
+        @param nextitem 下一个测试项
+        """
+        with self._span(item.nodeid, "test", nodeid=item.nodeid):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        """
+        测试setup阶段钩子 - 记录setup阶段
+        """
+        with self._span("setup", "test"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        """
+        测试call阶段钩子 - 记录call阶段
+        """
+        with self._span("call", "test"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        """
+        测试teardown阶段钩子 - 记录teardown阶段
+        """
+        with self._span("teardown", "test"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        """
+        fixture构建钩子 - 记录构建，并注册清理开始的标记
+
+        @param fixturedef fixture定义
+        @param request fixture请求对象
+        """
+        from src.plugins.profiler_plugin import fixture_location
+
+        args = {"scope": fixturedef.scope, "location": fixture_location(fixturedef)}
+        start = self.tracer.now()
+        outcome = yield
+        self.tracer.add(f"{fixturedef.argname} setup", "fixture", start, self.tracer.now(), args)
+        if outcome.excinfo is not None:
+            return
+        key = id(fixturedef)
+        # 标记清理函数注册在fixture自身的清理代码之后，所以会在它之前执行
+        fixturedef.addfinalizer(
+            lambda: self._tearing_down.__setitem__(key, (self.tracer.now(), fixturedef.argname, args))
+        )
+
+    def pytest_fixture_post_finalizer(self, fixturedef, request):
+        """
+        fixture清理完成钩子 - 记录清理
+
+        @param fixturedef fixture定义
+        @param request fixture请求对象
+        """
+        started = self._tearing_down.pop(id(fixturedef), None)
+        if started is not None:
+            start, name, args = started
+            self.tracer.add(f"{name} teardown", "fixture", start, self.tracer.now(), args)
+
+    # ========================================
+    # 保存和合并
+    # ========================================
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session):
+        """
+        测试会话结束钩子 - 保存时间线
+
+        在pytest清理session作用域fixture之后执行，这些fixture的清理也能记录下来。
+        worker把自己的时间线写到单独的文件，主进程合并各worker的文件；没有使用xdist时直接保存。
+
+        @param session pytest会话对象
+        """
+        from src.utils.tracing import merge_traces
+
+        if hasattr(self.config, "workerinput"):
+            part = self.output.with_name(f"{self.output.stem}.{self.tracer.process_name}{self.output.suffix}")
+            self.tracer.dump(part)
+            self.config.workeroutput["timeline_file"] = str(part)
+            return
+        if not self._worker_files:
+            self.tracer.dump(self.output)
+            self.saved = (self.output, len(self.tracer.events))
+            return
+        count = merge_traces(sorted(self._worker_files), self.output)
+        for part in self._worker_files:
+            Path(part).unlink(missing_ok=True)
+        self.saved = (self.output, count)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        """
+        xdist worker结束钩子 - 记下worker的时间线文件
+
+        @param node worker节点
+        @param error worker异常退出时的错误信息
+        """
+        part = getattr(node, "workeroutput", {}).get("timeline_file")
+        if part:
+            self._worker_files.append(part)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        """
+        终端汇总钩子 - 输出时间线文件位置
+
+        @param terminalreporter 终端输出对象
+        """
+        if self.saved is None:
+            return
+        path, count = self.saved
+        terminalreporter.section("时间线")
+        merged = f"，合并了 {len(self._worker_files)} 个worker" if self._worker_files else ""
+        terminalreporter.write_line(f"已保存 {count} 个事件{merged}: {path}")
+        terminalreporter.write_line("在 chrome://tracing 或 https://ui.perfetto.dev 中打开查看")
+
+    def pytest_unconfigure(self, config):
+        """
+        配置清理钩子 - 关闭跟踪，恢复 Playwright 的 Page.goto
+
+        @param config pytest配置对象
+        """
+        from src.utils import tracing
+
+        tracing.disable()
+        if self._restore_playwright is not None:
+            self._restore_playwright()
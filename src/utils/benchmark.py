@@ -0,0 +1,317 @@
+"""
+基准测试模块
+
+提供 benchmark fixture 背后的计时器：
+
+- 使用 perf_counter_ns 计时，单调、纳秒精度，不受系统时间调整影响
+- 自动校准：每轮（round）重复调用被测函数多次（iteration），使一轮的耗时远大于计时器分辨率；
+  再根据 max_time 确定轮数，至少 min_rounds 轮
+- 正式计时前先预热 warmup_time 秒（导入、缓存、JIT式的一次性开销不计入结果）
+- 可选在计时期间关闭垃圾回收，避免GC停顿造成的离群值
+- 统计每次调用耗时的 min、max、mean、median、stddev、四分位距（IQR），
+  以及按 1.5×IQR 规则判定的离群轮数
+
+使用方式：
+    result = benchmark(func, arg1, key=value)   # 自动校准，返回func第一次调用的返回值
+    benchmark.pedantic(func, rounds=10, iterations=100)
+    with benchmark:                             # 与timer fixture相同的with块用法，每个with块记为一轮
+        ...
+    benchmark.elapsed                           # 最后一个with块的耗时（秒）
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import gc
+import math
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, List, Optional
+
+# 一轮的最短耗时：计时器分辨率的多少倍
+_RESOLUTION_FACTOR = 1000
+# 一轮的最短耗时下限（纳秒），分辨率很高的平台上也不低于该值
+_MIN_ROUND_NS = 20_000
+# 最多轮数
+_MAX_ROUNDS = 100_000
+
+
+@dataclass
+class BenchmarkStats:
+    """
+    基准测试统计结果，时间单位均为秒（每次调用）
+
+    @attr name 测试用例ID
+    @attr rounds 轮数
+    @attr iterations 每轮调用次数
+    @attr min 最小值
+    @attr max 最大值
+    @attr mean 平均值
+    @attr median 中位数
+    @attr stddev 标准差
+    @attr q1 下四分位数
+    @attr q3 上四分位数
+    @attr iqr 四分位距
+    @attr outliers 离群轮数（超出 [q1 - 1.5×IQR, q3 + 1.5×IQR]）
+    @attr ops 每秒调用次数（按平均值计算）
+    @attr data 每轮的单次调用耗时
+    """
+    name: str
+    rounds: int
+    iterations: int
+    min: float
+    max: float
+    mean: float
+    median: float
+    stddev: float
+    q1: float
+    q3: float
+    iqr: float
+    outliers: int
+    ops: float
+    data: List[float]
+
+    def as_dict(self) -> dict:
+        """
+        转换为可序列化的字典
+
+        @return dict
+        """
+        return asdict(self)
+
+
+def compute_stats(name: str, samples: List[float], iterations: int) -> BenchmarkStats:
+    """
+    根据每轮的单次调用耗时计算统计结果
+
+    @param name 测试用例ID
+    @param samples 每轮的单次调用耗时（秒）
+    @param iterations 每轮调用次数
+    @return BenchmarkStats 统计结果
+    """
+    if len(samples) >= 2:
+        q1, _, q3 = statistics.quantiles(samples, n=4, method="inclusive")
+        stddev = statistics.stdev(samples)
+    else:
+        q1 = q3 = samples[0]
+        stddev = 0.0
+    iqr = q3 - q1
+    low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    mean = statistics.fmean(samples)
+    return BenchmarkStats(
+        name=name,
+        rounds=len(samples),
+        iterations=iterations,
+        min=min(samples),
+        max=max(samples),
+        mean=mean,
+        median=statistics.median(samples),
+        stddev=stddev,
+        q1=q1,
+        q3=q3,
+        iqr=iqr,
+        outliers=sum(1 for value in samples if value < low or value > high),
+        ops=1 / mean if mean > 0 else 0.0,
+        data=list(samples),
+    )
+
+
+def format_time(seconds: float) -> str:
+    """
+    按数量级格式化时间
+
+    @param seconds 秒
+    @return str 如 "12.35 us"
+    """
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def timer_resolution_ns() -> int:
+    """
+    实测 perf_counter_ns 的最小可分辨间隔
+
+    @return int 纳秒
+    """
+    resolution = math.inf
+    for _ in range(20):
+        start = time.perf_counter_ns()
+        end = time.perf_counter_ns()
+        while end == start:
+            end = time.perf_counter_ns()
+        resolution = min(resolution, end - start)
+    return int(resolution)
+
+
+class Benchmark:
+    """
+    基准测试计时器
+
+    一个实例只对应一个测试用例：可以调用一次 benchmark()/pedantic()，
+    或者多次使用 with 块（每个with块记为一轮），两种方式不能混用。
+    """
+
+    def __init__(self, name: str, max_time: float = 1.0, min_rounds: int = 5,
+                 warmup_time: float = 0.1, disable_gc: bool = False, disabled: bool = False):
+        """
+        @param name 测试用例ID
+        @param max_time 自动校准时计时的总时长目标（秒）
+        @param min_rounds 最少轮数
+        @param warmup_time 预热时长（秒），0表示不预热
+        @param disable_gc 计时期间是否关闭垃圾回收
+        @param disabled 为True时只调用一次被测函数，不计时（--benchmark-disable）
+        """
+        self.name = name
+        self.max_time = max_time
+        self.min_rounds = min_rounds
+        self.warmup_time = warmup_time
+        self.disable_gc = disable_gc
+        self.disabled = disabled
+        self.stats: Optional[BenchmarkStats] = None
+        self._used = False
+        self._samples: List[float] = []
+        self._block_start = 0
+        # with块用法的属性，与timer fixture一致
+        self.start_time = None
+        self.end_time = None
+        self.elapsed = 0
+
+    # ========================================
+    # 调用方式
+    # ========================================
+
+    def __call__(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        自动校准轮数和每轮调用次数，对func计时
+
+        @param func 被测函数
+        @param args 位置参数
+        @param kwargs 关键字参数
+        @return func第一次调用的返回值
+        """
+        self._start_function_mode()
+        result, first_ns = self._timed_call(func, args, kwargs)
+        if self.disabled:
+            return result
+        self._warmup(func, args, kwargs, first_ns)
+        iterations, round_ns = self._calibrate(func, args, kwargs, first_ns)
+        rounds = max(self.min_rounds, min(_MAX_ROUNDS, int(self.max_time * 1e9 / max(round_ns, 1))))
+        self._measure(func, args, kwargs, rounds, iterations)
+        return result
+
+    def pedantic(self, func: Callable, args: tuple = (), kwargs: Optional[dict] = None,
+                 rounds: int = 1, iterations: int = 1, warmup_rounds: int = 0) -> Any:
+        """
+        按指定的轮数和每轮调用次数计时，不做校准
+
+        @param func 被测函数
+        @param args 位置参数
+        @param kwargs 关键字参数
+        @param rounds 轮数
+        @param iterations 每轮调用次数
+        @param warmup_rounds 预热轮数
+        @return func第一次调用的返回值
+        """
+        self._start_function_mode()
+        kwargs = kwargs or {}
+        result, _ = self._timed_call(func, args, kwargs)
+        if self.disabled:
+            return result
+        for _ in range(warmup_rounds):
+            self._run(func, args, kwargs, iterations)
+        self._measure(func, args, kwargs, rounds, iterations)
+        return result
+
+    def __enter__(self):
+        """
+        进入with块时开始计时
+        """
+        if self._used:
+            raise RuntimeError("benchmark 已经以函数方式调用过，不能再使用with块")
+        self.start_time = time.time()
+        self._block_start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        """
+        退出with块时停止计时，记为一轮
+        """
+        elapsed_ns = time.perf_counter_ns() - self._block_start
+        self.end_time = time.time()
+        self.elapsed = elapsed_ns / 1e9
+        self._samples.append(self.elapsed)
+        self.stats = compute_stats(self.name, self._samples, 1)
+
+    # ========================================
+    # 计时实现
+    # ========================================
+
+    def _start_function_mode(self):
+        if self._used or self._samples:
+            raise RuntimeError("benchmark 在一个测试中只能以函数方式调用一次")
+        self._used = True
+
+    @staticmethod
+    def _timed_call(func: Callable, args: tuple, kwargs: dict):
+        start = time.perf_counter_ns()
+        result = func(*args, **kwargs)
+        return result, time.perf_counter_ns() - start
+
+    @staticmethod
+    def _run(func: Callable, args: tuple, kwargs: dict, iterations: int) -> int:
+        """
+        连续调用func iterations次
+
+        @return int 总耗时（纳秒）
+        """
+        loops = range(iterations)
+        start = time.perf_counter_ns()
+        for _ in loops:
+            func(*args, **kwargs)
+        return time.perf_counter_ns() - start
+
+    def _warmup(self, func: Callable, args: tuple, kwargs: dict, first_ns: int):
+        """
+        预热：持续调用func直到达到 warmup_time；单次调用已超过预热时长时跳过
+        """
+        warmup_ns = self.warmup_time * 1e9
+        if warmup_ns <= 0 or first_ns >= warmup_ns:
+            return
+        deadline = time.perf_counter_ns() + warmup_ns
+        while time.perf_counter_ns() < deadline:
+            func(*args, **kwargs)
+
+    def _calibrate(self, func: Callable, args: tuple, kwargs: dict, first_ns: int):
+        """
+        校准每轮调用次数，使一轮的耗时不低于计时器分辨率的 _RESOLUTION_FACTOR 倍
+
+        @return (每轮调用次数, 一轮耗时纳秒)
+        """
+        min_round_ns = max(timer_resolution_ns() * _RESOLUTION_FACTOR, _MIN_ROUND_NS)
+        if first_ns >= min_round_ns:
+            return 1, first_ns
+        iterations = 1
+        while True:
+            duration = self._run(func, args, kwargs, iterations)
+            if duration >= min_round_ns:
+                return iterations, duration
+            # 按比例放大，至少翻倍，防止耗时为0时死循环
+            scale = min_round_ns / duration if duration > 0 else 10
+            iterations = max(iterations * 2, math.ceil(iterations * scale * 1.2))
+
+    def _measure(self, func: Callable, args: tuple, kwargs: dict, rounds: int, iterations: int):
+        """
+        正式计时，统计每轮的单次调用耗时
+        """
+        gc_enabled = gc.isenabled()
+        if self.disable_gc:
+            gc.disable()
+        try:
+            samples = [self._run(func, args, kwargs, iterations) / iterations / 1e9 for _ in range(rounds)]
+        finally:
+            if self.disable_gc and gc_enabled:
+                gc.enable()
+        self.stats = compute_stats(self.name, samples, iterations)
@@ -0,0 +1,346 @@
+"""
+基准测试结果存储与对比模块
+
+把每次运行的基准测试结果连同机器信息保存到本地目录，并与历史结果（基线）对比：
+
+- 保存位置：Settings.BENCHMARK_STORAGE/<机器标识>/<编号>_<时间>[_<名称>].json，
+  机器标识如 Linux-CPython-3.11-x86_64，不同机器的结果不混在一起
+- 对比时对每个基准测试的各轮耗时做 Mann-Whitney U 检验（双侧，正态近似，含并列修正），
+  中位数变慢超过阈值且差异显著（p < alpha）时判定为性能退化
+- 只比较中位数不看显著性，会把正常的波动误判为退化；只看显著性不看阈值，
+  会把统计上显著但实际很小的变化判为退化，所以两个条件同时满足才算
+
+命令行查看：
+    python -m src.utils.benchmark_store list
+    python -m src.utils.benchmark_store compare 0001 0002
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 每个基准测试最多保存的轮数据，超过时等间隔抽样
+_MAX_STORED_SAMPLES = 2000
+# 结果文件名：0001_20250101_120000[_name].json
+_RUN_FILE = re.compile(r"^(\d{4})_(\d{8}_\d{6})(?:_(.+))?\.json$")
+# 结果文件格式版本
+_FORMAT_VERSION = 1
+
+
+@dataclass
+class Comparison:
+    """
+    单个基准测试与基线的对比结果
+
+    @attr name 测试用例ID
+    @attr baseline 基线中位数（秒），新增的测试为None
+    @attr current 本次中位数（秒），基线中有、本次没有的测试为None
+    @attr change 中位数变化比例，如 0.25 表示慢了25%
+    @attr p_value Mann-Whitney U 检验的p值
+    @attr status regression（退化）、improvement（提升）、unchanged（无显著变化）、new（新增）、missing（本次未运行）
+    """
+    name: str
+    baseline: Optional[float]
+    current: Optional[float]
+    change: Optional[float]
+    p_value: Optional[float]
+    status: str
+
+
+# ========================================
+# 机器信息
+# ========================================
+
+def machine_info() -> dict:
+    """
+    收集当前机器和Python环境信息
+
+    @return dict 机器信息
+    """
+    info = {
+        "node": platform.node(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python_implementation": platform.python_implementation(),
+        "python_version": platform.python_version(),
+    }
+    info["commit"] = _git_commit()
+    return info
+
+
+def _git_commit() -> Optional[str]:
+    """
+    获取当前git提交，不在git仓库中时返回None
+
+    @return str 提交哈希
+    """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def machine_id(info: dict) -> str:
+    """
+    生成机器标识，作为结果存储的子目录名
+
+    @param info 机器信息
+    @return str 如 Linux-CPython-3.11-x86_64
+    """
+    version = ".".join(info["python_version"].split(".")[:2])
+    return f"{info['system']}-{info['python_implementation']}-{version}-{info['machine']}"
+
+
+# ========================================
+# 存储
+# ========================================
+
+def _subsample(data: List[float]) -> List[float]:
+    if len(data) <= _MAX_STORED_SAMPLES:
+        return list(data)
+    step = len(data) / _MAX_STORED_SAMPLES
+    return [data[int(i * step)] for i in range(_MAX_STORED_SAMPLES)]
+
+
+def list_runs(storage: Path, machine: Optional[str] = None) -> List[Path]:
+    """
+    列出保存的运行结果，按编号从旧到新
+
+    @param storage 存储根目录
+    @param machine 机器标识，默认为当前机器
+    @return List[Path] 结果文件列表
+    """
+    directory = Path(storage) / (machine or machine_id(machine_info()))
+    if not directory.exists():
+        return []
+    runs = [path for path in directory.iterdir() if _RUN_FILE.match(path.name)]
+    return sorted(runs, key=lambda path: path.name)
+
+
+def save_run(storage: Path, results: List[dict], name: Optional[str] = None) -> Path:
+    """
+    保存一次运行的基准测试结果
+
+    @param storage 存储根目录
+    @param results BenchmarkStats字典列表
+    @param name 附加在文件名中的名称
+    @return Path 结果文件路径
+    """
+    info = machine_info()
+    directory = Path(storage) / machine_id(info)
+    directory.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": _FORMAT_VERSION,
+        "datetime": datetime.now().isoformat(timespec="seconds"),
+        "machine_info": info,
+        "benchmarks": [dict(result, data=_subsample(result["data"])) for result in results],
+    }
+    suffix = f"_{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}" if name else ""
+    while True:
+        runs = list_runs(storage, directory.name)
+        number = int(_RUN_FILE.match(runs[-1].name).group(1)) + 1 if runs else 1
+        path = directory / f"{number:04d}_{datetime.now():%Y%m%d_%H%M%S}{suffix}.json"
+        try:
+            # 独占创建，多个会话同时保存时编号不会重复
+            with open(path, "x", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+            return path
+        except FileExistsError:
+            continue
+
+
+def load_run(storage: Path, ref: str = "latest") -> dict:
+    """
+    读取保存的运行结果
+
+    @param storage 存储根目录
+    @param ref latest（最近一次）、编号（如 0003 或 3）或结果文件路径
+    @return dict 结果内容，额外带有 path 字段
+    """
+    path = Path(ref)
+    if not path.is_file():
+        runs = list_runs(storage)
+        if not runs:
+            raise FileNotFoundError(f"{storage} 中没有当前机器的基准测试结果，先用 --benchmark-save 保存一次")
+        if ref == "latest":
+            path = runs[-1]
+        else:
+            matched = [run for run in runs if ref.isdigit() and int(_RUN_FILE.match(run.name).group(1)) == int(ref)]
+            if not matched:
+                raise FileNotFoundError(f"找不到基准测试结果: {ref}")
+            path = matched[0]
+    with open(path, encoding="utf-8") as f:
+        run = json.load(f)
+    run["path"] = str(path)
+    return run
+
+
+# ========================================
+# 对比
+# ========================================
+
+def _normal_sf(z: float) -> float:
+    """
+    标准正态分布的上尾概率 P(Z > z)
+    """
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney_u(a: List[float], b: List[float]) -> float:
+    """
+    双侧 Mann-Whitney U 检验
+
+    使用正态近似（含并列修正和连续性修正），样本量很小（少于8）时结果偏保守。
+
+    @param a 样本a
+    @param b 样本b
+    @return float p值
+    """
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        # 并列的值取平均秩
+        rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[k] = rank
+        count = j - i + 1
+        tie_term += count ** 3 - count
+        i = j + 1
+
+    rank_sum_a = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return min(1.0, 2 * _normal_sf(max(z, 0.0)))
+
+
+def compare_runs(baseline: List[dict], current: List[dict], threshold: float, alpha: float) -> List[Comparison]:
+    """
+    对比本次结果与基线
+
+    @param baseline 基线的BenchmarkStats字典列表
+    @param current 本次的BenchmarkStats字典列表
+    @param threshold 判定退化的中位数变慢比例，如 0.1 表示慢10%
+    @param alpha 显著性水平
+    @return List[Comparison] 对比结果，按名称排序
+    """
+    base: Dict[str, dict] = {item["name"]: item for item in baseline}
+    cur: Dict[str, dict] = {item["name"]: item for item in current}
+    comparisons = []
+    for name in sorted(set(base) | set(cur)):
+        if name not in base:
+            comparisons.append(Comparison(name, None, cur[name]["median"], None, None, "new"))
+            continue
+        if name not in cur:
+            comparisons.append(Comparison(name, base[name]["median"], None, None, None, "missing"))
+            continue
+        before, after = base[name]["median"], cur[name]["median"]
+        change = (after - before) / before if before > 0 else 0.0
+        p_value = mann_whitney_u(base[name]["data"], cur[name]["data"])
+        if p_value < alpha and change > threshold:
+            status = "regression"
+        elif p_value < alpha and change < -threshold:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        comparisons.append(Comparison(name, before, after, change, p_value, status))
+    return comparisons
+
+
+def format_comparisons(comparisons: List[Comparison], name_width: int = 50) -> List[str]:
+    """
+    把对比结果格式化为表格行
+
+    @param comparisons 对比结果
+    @param name_width 测试名称列宽
+    @return List[str] 表格行（含表头）
+    """
+    from src.utils.benchmark import format_time
+
+    def short(text: str) -> str:
+        return text if len(text) <= name_width else "..." + text[-(name_width - 3):]
+
+    lines = [f"{'测试':<{name_width - 2}} {'基线':>9} {'本次':>9} {'变化':>8} {'p值':>8}  结果"]
+    for item in comparisons:
+        baseline = format_time(item.baseline) if item.baseline is not None else "-"
+        current = format_time(item.current) if item.current is not None else "-"
+        change = f"{item.change:+.1%}" if item.change is not None else "-"
+        p_value = f"{item.p_value:.3f}" if item.p_value is not None else "-"
+        lines.append(f"{short(item.name):<{name_width}} {baseline:>11} {current:>11} {change:>10} {p_value:>9}  {item.status}")
+    return lines
+
+
+# ========================================
+# 命令行
+# ========================================
+
+def main(argv: Optional[List[str]] = None):
+    """
+    命令行入口
+
+    @param argv 命令行参数
+    """
+    from src.config.settings import Settings
+    settings = Settings()
+
+    parser = argparse.ArgumentParser(description="基准测试结果查看与对比")
+    parser.add_argument("--storage", type=Path, default=settings.BENCHMARK_STORAGE, help="结果存储目录")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="列出当前机器保存的结果")
+    compare = commands.add_parser("compare", help="对比两次结果")
+    compare.add_argument("baseline", help="基线：编号或结果文件路径")
+    compare.add_argument("current", nargs="?", default="latest", help="本次：编号或结果文件路径，默认最近一次")
+    compare.add_argument("--threshold", type=float, default=settings.BENCHMARK_REGRESSION_THRESHOLD, help="判定退化的变慢比例")
+    compare.add_argument("--alpha", type=float, default=settings.BENCHMARK_ALPHA, help="显著性水平")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for path in list_runs(args.storage):
+            with open(path, encoding="utf-8") as f:
+                run = json.load(f)
+            commit = (run["machine_info"].get("commit") or "-")[:10]
+            print(f"{path.name:<40} {run['datetime']}  commit={commit}  benchmarks={len(run['benchmarks'])}")
+        return 0
+
+    baseline = load_run(args.storage, args.baseline)
+    current = load_run(args.storage, args.current)
+    comparisons = compare_runs(baseline["benchmarks"], current["benchmarks"], args.threshold, args.alpha)
+    print(f"基线: {baseline['path']}\n本次: {current['path']}")
+    for line in format_comparisons(comparisons):
+        print(line)
+    return 1 if any(item.status == "regression" for item in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
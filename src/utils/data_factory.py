@@ -0,0 +1,308 @@
+"""
+测试数据工厂模块
+
+用NumPy按列批量生成大量 users / posts 测试数据，用于容量测试和性能测试。
+
+- 每个字段整列生成（随机数、字符串拼接都是数组运算），不逐条循环
+- 数据分布可控：年龄正态分布，邮箱域名按权重分布，
+  帖子作者按Zipf分布（少数用户发大量帖子），帖子正文长度按对数正态分布
+- 按批次（chunk）产出，任何时候内存中只有一批数据，生成几百万条数据时内存占用不变
+- 使用相同的 seed 和 chunk_size 时生成的数据完全相同
+- 字符串列使用NumPy 2的变长字符串类型 StringDType，内存按实际长度占用
+
+使用示例：
+    factory = DataFactory(seed=42)
+    for batch in factory.users(1_000_000):        # 每批是一个 list[dict]
+        ...
+    factory.write_jsonl("data/users.jsonl", "users", 1_000_000)
+    for body in factory.request_bodies("posts", 100):
+        request_util.post("/posts", data=body, headers={"Content-Type": "application/json"})
+
+生成的JSONL文件可以直接配合 parametrize_from_file 标记使用。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+# 变长字符串类型，定长的 <U 类型会按最长的字符串为每个元素分配空间
+_STR = np.dtypes.StringDType()
+
+# ========================================
+# 取值池
+# ========================================
+# 取值池中的字符串会直接拼接成JSON，不能包含引号、反斜杠和控制字符
+FIRST_NAMES = np.array([
+    "Alice", "Bob", "Carol", "David", "Emma", "Frank", "Grace", "Henry",
+    "Iris", "Jack", "Kate", "Leo", "Mia", "Noah", "Olivia", "Peter",
+    "Quinn", "Rose", "Sam", "Tina", "Uma", "Victor", "Wendy", "Xavier",
+], dtype=_STR)
+LAST_NAMES = np.array([
+    "Smith", "Johnson", "Brown", "Taylor", "Miller", "Wilson", "Moore", "Clark",
+    "Lewis", "Walker", "Hall", "Young", "King", "Wright", "Green", "Baker",
+], dtype=_STR)
+EMAIL_DOMAINS = np.array(["example.com", "test.com", "mail.com", "corp.example.org"], dtype=_STR)
+EMAIL_DOMAIN_WEIGHTS = np.array([0.55, 0.25, 0.15, 0.05])
+TITLE_WORDS = np.array([
+    "quick", "guide", "testing", "pytest", "fixture", "report", "release", "update",
+    "performance", "notes", "data", "review", "api", "design", "weekly", "summary",
+], dtype=_STR)
+SENTENCES = np.array([
+    "This is a generated post.",
+    "The content is used for volume testing.",
+    "Fixtures make test data easy to share.",
+    "Parametrized tests run the same logic with different data.",
+    "Every field in this record is generated column by column.",
+    "Nothing here is real.",
+], dtype=_STR)
+
+# 注册时间的范围
+_CREATED_START = np.datetime64("2020-01-01T00:00:00", "s")
+_CREATED_END = np.datetime64("2025-01-01T00:00:00", "s")
+
+
+def _check_pool(pool: np.ndarray):
+    """
+    检查取值池中的字符串可以直接拼接进JSON
+
+    @param pool 取值池
+    """
+    for value in pool.tolist():
+        if '"' in value or "\\" in value or any(ord(ch) < 0x20 for ch in value):
+            raise ValueError(f"取值池中的字符串不能包含引号、反斜杠或控制字符: {value!r}")
+
+
+for _pool in (FIRST_NAMES, LAST_NAMES, EMAIL_DOMAINS, TITLE_WORDS, SENTENCES):
+    _check_pool(_pool)
+
+
+def _join(*parts) -> np.ndarray:
+    """
+    按元素拼接多个字符串数组（或字符串常量）
+
+    @param parts 字符串数组或字符串
+    @return np.ndarray 拼接结果
+    """
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.strings.add(result, part)
+    return result
+
+
+class DataFactory:
+    """
+    测试数据工厂
+
+    列的生成方式见 user_columns / post_columns；
+    users / posts 按批产出字典列表，write_jsonl / request_bodies 直接产出JSON文本。
+    """
+
+    # 每个字段是字符串（需要加引号）还是数字
+    USER_FIELDS = {"id": False, "name": True, "username": True, "email": True, "age": False, "created_at": True}
+    POST_FIELDS = {"userId": False, "id": False, "title": True, "body": True}
+
+    # 帖子正文池大小
+    BODY_POOL_SIZE = 4096
+
+    def __init__(self, seed: Optional[int] = None, chunk_size: int = 100_000):
+        """
+        @param seed 随机种子，相同的种子生成相同的数据
+        @param chunk_size 每批生成的记录数
+        """
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+        # Zipf分布的累积概率，按用户数缓存
+        self._author_cdf: Dict[int, np.ndarray] = {}
+        self._bodies: Optional[np.ndarray] = None
+
+    # ========================================
+    # 按列生成
+    # ========================================
+
+    def user_columns(self, count: int, start_id: int = 1) -> Dict[str, np.ndarray]:
+        """
+        生成一批用户数据的各列
+
+        @param count 记录数
+        @param start_id 第一条记录的id
+        @return Dict {字段名: 数组}
+        """
+        rng = self.rng
+        ids = np.arange(start_id, start_id + count)
+        id_text = ids.astype(_STR)
+        first = FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), count)]
+        last = LAST_NAMES[rng.integers(0, len(LAST_NAMES), count)]
+        username = _join(np.strings.lower(first), "_", id_text)
+        domain = EMAIL_DOMAINS[rng.choice(len(EMAIL_DOMAINS), count, p=EMAIL_DOMAIN_WEIGHTS)]
+        age = np.clip(rng.normal(35, 10, count).round(), 18, 80).astype(np.int64)
+        span = (_CREATED_END - _CREATED_START).astype(np.int64)
+        created = _CREATED_START + rng.integers(0, span, count).astype("timedelta64[s]")
+        return {
+            "id": ids,
+            "name": _join(first, " ", last),
+            "username": username,
+            "email": _join(username, "@", domain),
+            "age": age,
+            "created_at": np.datetime_as_string(created).astype(_STR),
+        }
+
+    def post_columns(self, count: int, user_count: int, start_id: int = 1) -> Dict[str, np.ndarray]:
+        """
+        生成一批帖子数据的各列
+
+        @param count 记录数
+        @param user_count 用户总数，帖子作者在 1..user_count 中按Zipf分布选取
+        @param start_id 第一条记录的id
+        @return Dict {字段名: 数组}
+        """
+        rng = self.rng
+        ids = np.arange(start_id, start_id + count)
+        cdf = self._author_cdf.get(user_count)
+        if cdf is None:
+            weights = 1.0 / np.arange(1, user_count + 1)
+            cdf = self._author_cdf[user_count] = np.cumsum(weights) / weights.sum()
+        user_ids = np.minimum(np.searchsorted(cdf, rng.random(count)), user_count - 1) + 1
+
+        words = TITLE_WORDS[rng.integers(0, len(TITLE_WORDS), (count, 3))]
+        title = _join(np.strings.capitalize(words[:, 0]), " ", words[:, 1], " ", words[:, 2])
+
+        body = self._body_pool()[rng.integers(0, self.BODY_POOL_SIZE, count)]
+        return {"userId": user_ids, "id": ids, "title": title, "body": body}
+
+    def _body_pool(self) -> np.ndarray:
+        """
+        生成帖子正文池，第一次使用时生成
+
+        每篇正文的句子数按对数正态分布；生成帖子时从池中按索引取正文，
+        避免每条帖子逐句拼接。
+
+        @return np.ndarray 正文池
+        """
+        if self._bodies is None:
+            rng = self.rng
+            sentences = np.clip(rng.lognormal(1.0, 0.6, self.BODY_POOL_SIZE).astype(np.int64), 1, 12)
+            picked = SENTENCES[rng.integers(0, len(SENTENCES), (self.BODY_POOL_SIZE, int(sentences.max())))]
+            body = picked[:, 0]
+            for column in range(1, picked.shape[1]):
+                # 超出该篇句子数的列拼接空字符串
+                used = column < sentences
+                body = _join(body, np.where(used, " ", ""), np.where(used, picked[:, column], ""))
+            self._bodies = body
+        return self._bodies
+
+    # ========================================
+    # 按批产出
+    # ========================================
+
+    def _column_batches(self, kind: str, total: int, user_count: Optional[int]) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        按 chunk_size 分批生成列
+
+        @param kind users 或 posts
+        @param total 总记录数
+        @param user_count 生成帖子时的用户总数，默认等于帖子总数的十分之一
+        @return Iterator 每批的列
+        """
+        if kind not in ("users", "posts"):
+            raise ValueError(f"不支持的数据类型: {kind}，支持 users、posts")
+        if kind == "posts":
+            user_count = user_count or max(total // 10, 1)
+        for start in range(0, total, self.chunk_size):
+            count = min(self.chunk_size, total - start)
+            if kind == "users":
+                yield self.user_columns(count, start_id=start + 1)
+            else:
+                yield self.post_columns(count, user_count, start_id=start + 1)
+
+    def users(self, total: int) -> Iterator[List[dict]]:
+        """
+        按批产出用户记录
+
+        @param total 总记录数
+        @return Iterator[List[dict]] 每批的用户记录
+        """
+        return self.records("users", total)
+
+    def posts(self, total: int, user_count: Optional[int] = None) -> Iterator[List[dict]]:
+        """
+        按批产出帖子记录
+
+        @param total 总记录数
+        @param user_count 用户总数，默认等于帖子总数的十分之一
+        @return Iterator[List[dict]] 每批的帖子记录
+        """
+        return self.records("posts", total, user_count)
+
+    def records(self, kind: str, total: int, user_count: Optional[int] = None) -> Iterator[List[dict]]:
+        """
+        按批产出记录，值都转换为Python原生类型
+
+        @param kind users 或 posts
+        @param total 总记录数
+        @param user_count 生成帖子时的用户总数
+        @return Iterator[List[dict]] 每批的记录
+        """
+        for columns in self._column_batches(kind, total, user_count):
+            names = list(columns)
+            values = [columns[name].tolist() for name in names]
+            yield [dict(zip(names, row)) for row in zip(*values)]
+
+    def json_lines(self, kind: str, total: int, user_count: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        按批产出JSON文本数组，每个元素是一条记录的JSON
+
+        JSON直接由列拼接而成，不经过逐条的 json.dumps。
+
+        @param kind users 或 posts
+        @param total 总记录数
+        @param user_count 生成帖子时的用户总数
+        @return Iterator[np.ndarray] 每批的JSON文本
+        """
+        fields = self.USER_FIELDS if kind == "users" else self.POST_FIELDS
+        for columns in self._column_batches(kind, total, user_count):
+            parts = []
+            for index, (name, quoted) in enumerate(fields.items()):
+                prefix = ("{" if index == 0 else ", ") + f'"{name}": '
+                if quoted:
+                    parts += [prefix + '"', columns[name], '"']
+                else:
+                    parts += [prefix, columns[name].astype(_STR)]
+            parts.append("}")
+            yield _join(*parts)
+
+    def write_jsonl(self, path: Union[str, Path], kind: str, total: int, user_count: Optional[int] = None) -> int:
+        """
+        把生成的数据写入JSONL文件
+
+        @param path 输出文件路径
+        @param kind users 或 posts
+        @param total 总记录数
+        @param user_count 生成帖子时的用户总数
+        @return int 写入的记录数
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        written = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for lines in self.json_lines(kind, total, user_count):
+                f.write("\n".join(lines.tolist()))
+                f.write("\n")
+                written += len(lines)
+        return written
+
+    def request_bodies(self, kind: str, total: int, user_count: Optional[int] = None) -> Iterator[str]:
+        """
+        逐条产出可以直接作为请求体发送的JSON字符串
+
+        @param kind users 或 posts
+        @param total 总记录数
+        @param user_count 生成帖子时的用户总数
+        @return Iterator[str] JSON请求体
+        """
+        for lines in self.json_lines(kind, total, user_count):
+            yield from lines.tolist()
@@ -0,0 +1,300 @@
+"""
+测试数据加载模块
+
+提供带缓存的测试数据加载器，每个进程（xdist的每个worker）对同一个数据文件只解析一次，
+所有测试共享同一份内存中的数据。
+
+- 缓存以文件的 mtime、大小和内容哈希为准：mtime和大小不变时直接命中缓存；
+  发生变化时重新计算哈希，内容确实改变了才重新解析
+- 返回的数据是只读视图（见readonly.py），嵌套的部分在访问时才包装，
+  某个测试无法修改共享数据影响其他测试
+- 超过 Settings.DATA_MMAP_THRESHOLD 的大文件通过内存映射读取，
+  哈希计算和解码直接在映射上进行，不额外复制一份文件内容
+- Settings.DATA_DIR 下的数据文件解析后编译为二进制缓存（pickle，或安装了msgpack时可选msgpack），
+  存放在 Settings.DATA_CACHE_DIR，以内容哈希为键；下次运行或其他worker直接加载缓存，不再解析
+- 每次加载的来源（解析/缓存）和耗时记录在 DataLoader().stats 中，由data_plugin在测试结束时汇总输出
+
+使用示例：
+    loader = DataLoader()
+    data = loader.load()                 # 默认加载 Settings.TEST_DATA_FILE
+    users = loader.section("users")      # 只读的用户列表
+    first = users[0]["name"]
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import threading
+import time
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Tuple, Union
+
+from src.config.settings import Settings
+from src.utils.impact import touch
+from src.utils.readonly import freeze
+
+# 缓存格式版本，缓存内容的结构变化时递增，旧缓存自动失效
+_CACHE_VERSION = 1
+
+# 缓存格式对应的文件扩展名
+CACHE_SUFFIXES = {
+    "pickle": ".pickle",
+    "msgpack": ".msgpack",
+}
+
+
+@dataclass
+class _CacheEntry:
+    """
+    单个数据文件的缓存记录
+
+    @attr mtime_ns 解析时文件的修改时间（纳秒）
+    @attr size 解析时文件的大小
+    @attr digest 文件内容的sha256
+    @attr data 解析结果的只读视图
+    """
+    mtime_ns: int
+    size: int
+    digest: str
+    data: Any
+
+
+@dataclass
+class LoadStat:
+    """
+    一次数据文件加载的统计
+
+    @attr path 数据文件路径
+    @attr source 数据来源：parse（解析原文件）、cache（加载二进制缓存）
+    @attr seconds 本次加载耗时（秒）
+    @attr parse_seconds 解析原文件的耗时（秒），从缓存加载时为生成缓存时记录的解析耗时
+    """
+    path: str
+    source: str
+    seconds: float
+    parse_seconds: float
+
+
+def _parse(text: str, suffix: str) -> Any:
+    """
+    按扩展名解析数据文件内容
+
+    @param text 文件内容
+    @param suffix 文件扩展名（.json、.yaml、.yml）
+    @return 解析结果
+    """
+    if suffix in (".yaml", ".yml"):
+        import yaml
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+class DataLoader:
+    """
+    测试数据加载器
+
+    使用单例模式，同一进程内的所有测试共享同一份缓存。
+    """
+
+    # 单例实例
+    _instance = None
+
+    def __new__(cls):
+        """
+        创建单例实例
+
+        @return DataLoader实例
+        """
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._cache = {}
+            cls._instance.stats = []
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def load(self, path: Optional[Union[str, Path]] = None) -> Any:
+        """
+        加载数据文件，文件未变化时直接返回缓存
+
+        @param path 数据文件路径，默认为 Settings.TEST_DATA_FILE
+        @return 解析结果的只读视图
+        """
+        path = Path(path or Settings().TEST_DATA_FILE).resolve()
+        # 命中缓存时不会打开文件，影响分析（--impact-record）需要单独登记
+        touch(path)
+        stat = path.stat()
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                return entry.data
+            entry = self._read(path, stat, entry)
+            self._cache[path] = entry
+            return entry.data
+
+    def section(self, name: str, path: Optional[Union[str, Path]] = None) -> Any:
+        """
+        获取数据文件中的一个顶层部分，如 users、posts、config
+
+        @param name 顶层键名
+        @param path 数据文件路径，默认为 Settings.TEST_DATA_FILE
+        @return 该部分的只读视图
+        """
+        return self.load(path)[name]
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def _read(self, path: Path, stat: os.stat_result, previous: Optional[_CacheEntry]) -> _CacheEntry:
+        """
+        读取文件并得到解析结果
+
+        内容哈希与上次相同时复用上次的解析结果；否则优先加载二进制缓存，没有缓存时才解析原文件。
+
+        @param path 数据文件路径
+        @param stat 文件状态
+        @param previous 上次的缓存记录
+        @return _CacheEntry 新的缓存记录
+        """
+        threshold = Settings().DATA_MMAP_THRESHOLD
+        with open(path, "rb") as f:
+            # 空文件不能映射，但空文件不会超过阈值
+            use_mmap = threshold and stat.st_size >= threshold
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap else f.read()
+            try:
+                digest = hashlib.sha256(content).hexdigest()
+                if previous and previous.digest == digest:
+                    return _CacheEntry(stat.st_mtime_ns, stat.st_size, digest, previous.data)
+                data = self._compile(path, digest, content)
+            finally:
+                if use_mmap:
+                    content.close()
+        return _CacheEntry(stat.st_mtime_ns, stat.st_size, digest, freeze(data))
+
+    def _compile(self, path: Path, digest: str, content) -> Any:
+        """
+        加载二进制缓存，没有缓存时解析原文件并写入缓存
+
+        @param path 数据文件路径
+        @param digest 文件内容的sha256
+        @param content 文件内容（bytes或内存映射）
+        @return 解析结果
+        """
+        cache_path = self._cache_path(path, digest)
+        if cache_path is not None and cache_path.exists():
+            start = time.perf_counter()
+            cached = self._read_cache(cache_path)
+            if cached is not None:
+                parse_seconds, data = cached
+                self.stats.append(LoadStat(str(path), "cache", time.perf_counter() - start, parse_seconds))
+                return data
+
+        start = time.perf_counter()
+        data = _parse(str(content, "utf-8"), path.suffix)
+        parse_seconds = time.perf_counter() - start
+        self.stats.append(LoadStat(str(path), "parse", parse_seconds, parse_seconds))
+        if cache_path is not None:
+            self._write_cache(cache_path, parse_seconds, data)
+        return data
+
+    def _cache_format(self) -> str:
+        """
+        获取缓存格式，配置为msgpack但未安装时改用pickle
+
+        @return str 缓存格式
+        """
+        cache_format = Settings().DATA_CACHE_FORMAT
+        if cache_format not in CACHE_SUFFIXES:
+            raise ValueError(f"不支持的数据缓存格式: {cache_format}")
+        if cache_format == "msgpack":
+            try:
+                import msgpack  # noqa: F401
+            except ImportError:
+                warnings.warn("未安装msgpack，测试数据缓存改用pickle")
+                Settings().DATA_CACHE_FORMAT = cache_format = "pickle"
+        return cache_format
+
+    def _cache_path(self, path: Path, digest: str) -> Optional[Path]:
+        """
+        获取数据文件对应的缓存文件路径
+
+        只缓存 Settings.DATA_DIR 下的文件；文件名由源文件路径哈希和内容哈希组成，
+        同一个源文件的旧缓存在写入新缓存时删除。
+
+        @param path 数据文件路径
+        @param digest 文件内容的sha256
+        @return Path 缓存文件路径，不缓存时返回None
+        """
+        settings = Settings()
+        if not settings.DATA_CACHE or not path.is_relative_to(settings.DATA_DIR.resolve()):
+            return None
+        source = hashlib.sha256(str(path).encode("utf-8")).hexdigest()[:16]
+        return settings.DATA_CACHE_DIR / f"{source}-{digest}{CACHE_SUFFIXES[self._cache_format()]}"
+
+    def _read_cache(self, cache_path: Path) -> Optional[Tuple[float, Any]]:
+        """
+        读取缓存文件，缓存损坏或版本不符时返回None
+
+        @param cache_path 缓存文件路径
+        @return (解析耗时, 解析结果)
+        """
+        try:
+            raw = cache_path.read_bytes()
+            if cache_path.suffix == ".msgpack":
+                import msgpack
+                version, parse_seconds, data = msgpack.unpackb(raw, strict_map_key=False)
+            else:
+                version, parse_seconds, data = pickle.loads(raw)
+        except Exception:
+            return None
+        if version != _CACHE_VERSION:
+            return None
+        return parse_seconds, data
+
+    def _write_cache(self, cache_path: Path, parse_seconds: float, data: Any):
+        """
+        写入缓存文件并删除同一源文件的旧缓存
+
+        多个worker可能同时写同一个缓存，先写临时文件再改名保证不会读到不完整的缓存；
+        写入失败（如数据包含msgpack不支持的类型）时只是不缓存。
+
+        @param cache_path 缓存文件路径
+        @param parse_seconds 解析耗时
+        @param data 解析结果
+        """
+        payload = (_CACHE_VERSION, parse_seconds, data)
+        try:
+            if cache_path.suffix == ".msgpack":
+                import msgpack
+                raw = msgpack.packb(payload)
+            else:
+                raw = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(raw)
+            tmp.replace(cache_path)
+        except Exception as e:
+            warnings.warn(f"测试数据缓存写入失败: {cache_path.name}: {e}")
+            return
+        source = cache_path.name.split("-", 1)[0]
+        for old in cache_path.parent.glob(f"{source}-*"):
+            if old != cache_path and not old.name.endswith(".tmp"):
+                old.unlink(missing_ok=True)
+
+def get_data_loader() -> DataLoader:
+    """
+    获取数据加载器实例的便捷函数
+
+    @return DataLoader 数据加载器实例
+    """
+    return DataLoader()
@@ -0,0 +1,264 @@
+"""
+数据行流式读取模块
+
+为数据驱动的参数化测试提供按行读取大数据文件的能力，支持三种格式：
+- .jsonl：每行一个JSON对象
+- .csv：第一行为表头，其余每行一条数据
+- .json：顶层为数组的JSON文件，数组的每个元素为一条数据
+
+收集阶段只扫描文件，记录每条数据在文件中的字节位置（RowRef），不保留数据本身；
+测试真正执行时再通过 RowRef.load() 按位置读取并解析这一条数据。
+这样即使数据文件有几十万行，收集阶段的内存占用也只和行数成正比，与数据大小无关。
+需要在收集时用某个字段作为测试ID时，用 iter_rows_with_field() 在同一次扫描中取出字段值。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import csv
+import io
+import json
+import mmap
+import re
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+# JSON数组扫描时关心的字符：括号、字符串开头、元素分隔符
+_JSON_TOKEN = re.compile(rb'[\[\]{}",]')
+# JSON字符串（从开头的引号到结尾的引号，处理转义）
+_JSON_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_WHITESPACE = b" \t\r\n"
+
+SUPPORTED_SUFFIXES = (".jsonl", ".csv", ".json")
+
+
+class RowRef:
+    """
+    数据文件中一条数据的引用
+
+    只记录位置，不保存数据内容；同一文件的所有RowRef共享path和header对象。
+
+    @attr path 数据文件路径
+    @attr offset 数据在文件中的起始字节位置
+    @attr length 数据的字节长度
+    @attr header CSV表头，其他格式为None
+    """
+
+    __slots__ = ("path", "offset", "length", "header")
+
+    def __init__(self, path: Path, offset: int, length: int, header: Optional[tuple] = None):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.header = header
+
+    def read_bytes(self) -> bytes:
+        """
+        读取这条数据的原始字节
+
+        @return bytes 原始内容
+        """
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            return f.read(self.length)
+
+    def load(self) -> Any:
+        """
+        读取并解析这条数据
+
+        @return CSV格式返回 {列名: 值} 字典，JSON格式返回解析后的对象
+        """
+        return self.parse(self.read_bytes())
+
+    def parse(self, data: bytes) -> Any:
+        """
+        解析这条数据的原始字节（扫描时已经读到的内容不必再读一次文件）
+
+        @param data 原始内容
+        @return CSV格式返回 {列名: 值} 字典，JSON格式返回解析后的对象
+        """
+        raw = data.decode("utf-8")
+        if self.header is not None:
+            values = next(csv.reader(io.StringIO(raw)))
+            return dict(zip(self.header, values))
+        return json.loads(raw)
+
+    def __repr__(self):
+        return f"RowRef({self.path.name}@{self.offset}+{self.length})"
+
+
+def _jsonl_rows(path: Path) -> Iterator[Tuple[RowRef, bytes]]:
+    """
+    逐行扫描JSON-lines文件，跳过空行
+
+    @param path 数据文件路径
+    @return Iterator (RowRef, 原始内容)
+    """
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            content = line.strip()
+            if content:
+                start = offset + line.index(content[:1])
+                yield RowRef(path, start, len(content)), content
+            offset += len(line)
+
+
+def _csv_records(f) -> Iterator[Tuple[int, bytes]]:
+    """
+    按CSV记录读取文件，引号内包含换行的记录会合并多行
+
+    @param f 以二进制方式打开的文件
+    @return Iterator (起始位置, 记录字节)
+    """
+    offset = 0
+    start, parts = 0, []
+    for line in f:
+        if not parts:
+            start = offset
+        parts.append(line)
+        offset += len(line)
+        record = b"".join(parts)
+        # 双引号数量为奇数说明记录还没结束
+        if record.count(b'"') % 2 == 0:
+            parts = []
+            yield start, record
+    if parts:
+        yield start, b"".join(parts)
+
+
+def _csv_rows(path: Path) -> Iterator[Tuple[RowRef, bytes]]:
+    """
+    扫描CSV文件，第一条记录作为表头
+
+    @param path 数据文件路径
+    @return Iterator (RowRef, 原始内容)
+    """
+    with open(path, "rb") as f:
+        records = _csv_records(f)
+        header = None
+        for start, record in records:
+            content = record.rstrip(b"\r\n")
+            if not content.strip():
+                continue
+            if header is None:
+                text = content.decode("utf-8-sig")
+                header = tuple(next(csv.reader(io.StringIO(text))))
+                continue
+            yield RowRef(path, start, len(content), header), content
+
+
+def _json_array_rows(path: Path) -> Iterator[Tuple[RowRef, bytes]]:
+    """
+    扫描顶层为数组的JSON文件，找出每个元素的位置
+
+    在内存映射上用正则跳到下一个括号/引号/逗号，只跟踪嵌套深度，
+    不解析元素内容。
+
+    @param path 数据文件路径
+    @return Iterator (RowRef, 原始内容)
+    """
+    if path.stat().st_size == 0:
+        raise ValueError(f"数据文件为空: {path}")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+        if mm[:3] == b"\xef\xbb\xbf":
+            pos = 3
+        while pos < len(mm) and mm[pos] in _WHITESPACE:
+            pos += 1
+        if mm[pos:pos + 1] != b"[":
+            raise ValueError(f"JSON数据文件的顶层必须是数组: {path}")
+
+        depth, element_start = 0, None
+        while True:
+            match = _JSON_TOKEN.search(mm, pos)
+            if match is None:
+                raise ValueError(f"JSON数组不完整: {path}")
+            token, pos = match.group(), match.start()
+            if token == b'"':
+                if element_start is None:
+                    element_start = pos
+                string = _JSON_STRING.match(mm, pos)
+                if string is None:
+                    raise ValueError(f"JSON字符串不完整: {path}")
+                pos = string.end()
+                continue
+            if token in (b"[", b"{"):
+                depth += 1
+                # depth为1的"["是顶层数组本身
+                if depth > 1 and element_start is None:
+                    element_start = pos
+            elif token in (b"]", b"}"):
+                depth -= 1
+            if depth == 0 or (depth == 1 and token == b","):
+                if element_start is None:
+                    # 数字、true、false、null等没有括号和引号的元素
+                    element_start = _skip_whitespace(mm, _previous_boundary(mm, pos))
+                end = pos
+                while end > element_start and mm[end - 1] in _WHITESPACE:
+                    end -= 1
+                if end > element_start:
+                    yield RowRef(path, element_start, end - element_start), mm[element_start:end]
+                element_start = None
+                if depth == 0:
+                    return
+            pos += 1
+
+
+def _previous_boundary(mm: mmap.mmap, pos: int) -> int:
+    """
+    从pos向前找到上一个 "[" 或 "," 之后的位置
+
+    @param mm 内存映射
+    @param pos 当前位置
+    @return int 边界之后的位置
+    """
+    return max(mm.rfind(b",", 0, pos), mm.rfind(b"[", 0, pos)) + 1
+
+
+def _skip_whitespace(mm: mmap.mmap, pos: int) -> int:
+    while pos < len(mm) and mm[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def iter_rows(path: Path) -> Iterator[RowRef]:
+    """
+    按文件格式流式产出每条数据的引用
+
+    @param path 数据文件路径
+    @return Iterator[RowRef]
+    """
+    return (row for row, _ in _scan(path))
+
+
+def iter_rows_with_field(path: Path, field: str) -> Iterator[Tuple[RowRef, Any]]:
+    """
+    流式产出每条数据的引用和其中一个字段的值
+
+    字段值在扫描的同时从已经读到的内容中解析，不会为每条数据重新打开文件；
+    解析结果只保留这个字段。
+
+    @param path 数据文件路径
+    @param field 字段名（CSV为列名）
+    @return Iterator (RowRef, 字段值)
+    """
+    for row, data in _scan(path):
+        yield row, row.parse(data)[field]
+
+
+def _scan(path: Path) -> Iterator[Tuple[RowRef, bytes]]:
+    """
+    按文件格式选择扫描方式
+
+    @param path 数据文件路径
+    @return Iterator (RowRef, 原始内容)
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        return _jsonl_rows(path)
+    if path.suffix == ".csv":
+        return _csv_rows(path)
+    if path.suffix == ".json":
+        return _json_array_rows(path)
+    raise ValueError(f"不支持的数据文件格式: {path.suffix}，支持 {', '.join(SUPPORTED_SUFFIXES)}")
@@ -0,0 +1,112 @@
+"""
+测试耗时历史模块
+
+保存每个测试的历史耗时和上一次运行失败的测试，供 scheduling_plugin 按耗时调度：
+
+- 耗时：setup + call + teardown 的总耗时，按指数加权移动平均（EWMA）更新，
+  新的耗时占比为 alpha，偶尔一次变慢不会让估计值大幅波动
+- 失败：上一次运行中失败的测试；再次运行通过后移除
+- 保存位置：Settings.DURATION_STORE（JSON文件），先写临时文件再替换，写到一半中断也不会损坏
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import json
+import os
+import statistics
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+# 文件格式版本
+_FORMAT_VERSION = 1
+
+
+class DurationStore:
+    """
+    测试耗时历史
+
+    @attr path 保存文件路径
+    @attr alpha EWMA中新耗时的权重（0~1）
+    @attr durations 测试耗时估计值 {nodeid: 秒}
+    @attr failed 上一次运行失败的测试
+    """
+
+    def __init__(self, path: Path, alpha: float = 0.3):
+        """
+        @param path 保存文件路径
+        @param alpha EWMA中新耗时的权重
+        """
+        self.path = Path(path)
+        self.alpha = alpha
+        self.durations: Dict[str, float] = {}
+        self.failed: Set[str] = set()
+        self.load()
+
+    def load(self):
+        """
+        读取保存的历史，文件不存在或格式不对时从空白开始
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != _FORMAT_VERSION:
+            return
+        self.durations = {nodeid: float(value) for nodeid, value in data.get("durations", {}).items()}
+        self.failed = set(data.get("failed", []))
+
+    def save(self):
+        """
+        保存历史
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": _FORMAT_VERSION,
+                "durations": dict(sorted(self.durations.items())),
+                "failed": sorted(self.failed),
+            }, f, ensure_ascii=False, indent=0)
+        os.replace(tmp_path, self.path)
+
+    def update(self, nodeid: str, duration: float, failed: bool):
+        """
+        记录一个测试本次的耗时和结果
+
+        @param nodeid 测试用例ID
+        @param duration 本次耗时（秒）
+        @param failed 本次是否失败
+        """
+        previous = self.durations.get(nodeid)
+        if previous is None:
+            self.durations[nodeid] = duration
+        else:
+            self.durations[nodeid] = self.alpha * duration + (1 - self.alpha) * previous
+        if failed:
+            self.failed.add(nodeid)
+        else:
+            self.failed.discard(nodeid)
+
+    def estimate(self, nodeid: str, default: Optional[float] = None) -> float:
+        """
+        估计测试的耗时
+
+        @param nodeid 测试用例ID
+        @param default 没有历史时使用的值，默认为所有已知耗时的中位数
+        @return float 秒
+        """
+        if nodeid in self.durations:
+            return self.durations[nodeid]
+        if default is not None:
+            return default
+        return self.typical()
+
+    def typical(self) -> float:
+        """
+        已知耗时的中位数，用作新测试的估计值
+
+        @return float 秒，没有任何历史时为0
+        """
+        return statistics.median(self.durations.values()) if self.durations else 0.0
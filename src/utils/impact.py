@@ -0,0 +1,355 @@
+"""
+测试影响分析模块
+
+记录每个测试用到了哪些项目文件（源代码和数据文件），改动文件后只运行受影响的测试，见 src/plugins/impact_plugin.py：
+
+- 源代码：测试执行期间用 sys.setprofile 记录被调用的函数所在的文件（只看函数调用事件，开销比逐行跟踪小得多）
+- 数据文件：用审计钩子（sys.addaudithook）记录以只读方式打开的文件；
+  DataLoader 命中内存缓存时不会再打开文件，由它调用 touch() 登记
+- fixture：构建时用到的文件记在fixture上，所有使用这个fixture的测试都依赖这些文件
+  （session/module作用域的fixture只构建一次，不这样做的话只有第一个测试能记录到）
+- 保存位置：Settings.IMPACT_DB（SQLite），每个测试记录依赖的文件和记录时的git提交
+
+没有开启记录时 touch() 什么都不做，审计钩子直接返回。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import fnmatch
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+# 当前进程的记录器，None表示没有开启
+_recorder: Optional["FileRecorder"] = None
+_audit_hook_installed = False
+
+# 数据库格式版本（PRAGMA user_version）
+_FORMAT_VERSION = 1
+
+
+def matches(path: str, patterns: Iterable[str]) -> bool:
+    """
+    相对路径是否匹配任意一个模式
+
+    @param path 相对于项目根目录的路径（/分隔）
+    @param patterns fnmatch模式，* 可以匹配多级目录
+    @return bool 是否匹配
+    """
+    return any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+
+
+class FileRecorder:
+    """
+    文件依赖记录器
+
+    记录范围可以嵌套（测试中构建fixture），每个范围结束时把记录到的文件并入外层范围。
+
+    @attr root 项目根目录
+    @attr ignored 不记录的文件（相对路径的fnmatch模式）
+    """
+
+    def __init__(self, root: Path, ignored: Sequence[str]):
+        """
+        @param root 项目根目录
+        @param ignored 不记录的文件模式
+        """
+        self.root = Path(root).resolve()
+        self.ignored = list(ignored)
+        self._prefix = str(self.root) + os.sep
+        self._scopes: List[Set[str]] = []
+        # 原始文件名 -> 相对路径（不记录的为None），记录器自身的调用不算依赖
+        self._normalized: Dict[str, Optional[str]] = {__file__: None}
+
+    def push(self):
+        """
+        开始一个记录范围
+        """
+        self._scopes.append(set())
+
+    def pop(self) -> Set[str]:
+        """
+        结束当前记录范围，记录到的文件同时并入外层范围
+
+        @return Set[str] 这个范围内用到的文件（相对路径）
+        """
+        raw = self._scopes.pop()
+        if self._scopes:
+            self._scopes[-1].update(raw)
+        return {path for path in map(self.normalize, raw) if path is not None}
+
+    def touch(self, filename: str):
+        """
+        登记当前范围用到了一个文件
+
+        @param filename 文件路径
+        """
+        if self._scopes:
+            self._scopes[-1].add(filename)
+
+    def profile(self, frame, event, arg):
+        """
+        sys.setprofile 的回调，记录被调用的Python函数所在的文件
+        """
+        if event == "call" and self._scopes:
+            self._scopes[-1].add(frame.f_code.co_filename)
+
+    def normalize(self, filename: str) -> Optional[str]:
+        """
+        转换为相对于项目根目录的路径
+
+        @param filename 原始文件名（绝对或相对于当前目录）
+        @return str 相对路径（/分隔），项目外的文件、不记录的文件返回None
+        """
+        if filename in self._normalized:
+            return self._normalized[filename]
+        path = None
+        if not filename.startswith("<"):
+            absolute = os.path.abspath(filename)
+            if absolute.startswith(self._prefix):
+                relative = absolute[len(self._prefix):].replace(os.sep, "/")
+                if not matches(relative, self.ignored) and os.path.isfile(absolute):
+                    path = relative
+        self._normalized[filename] = path
+        return path
+
+
+def _audit(event: str, args: tuple):
+    """
+    审计钩子：记录以只读方式打开的文件
+
+    审计钩子无法移除，安装后一直存在；没有开启记录时只做一次判断。
+    """
+    recorder = _recorder
+    if recorder is None or event != "open":
+        return
+    path, mode, flags = args
+    if isinstance(path, bytes):
+        path = os.fsdecode(path)
+    if not isinstance(path, str):
+        return
+    if isinstance(mode, str):
+        if any(char in mode for char in "wax+"):
+            return
+    elif flags & os.O_ACCMODE != os.O_RDONLY:
+        return
+    recorder.touch(path)
+
+
+def touch(path):
+    """
+    登记当前测试用到了一个文件（如从缓存中读取数据文件），没有开启记录时什么都不做
+
+    @param path 文件路径
+    """
+    recorder = _recorder
+    if recorder is not None:
+        recorder.touch(os.fspath(path))
+
+
+def enable(root: Path, ignored: Sequence[str]) -> FileRecorder:
+    """
+    开启当前进程的文件依赖记录
+
+    @param root 项目根目录
+    @param ignored 不记录的文件模式
+    @return FileRecorder 记录器
+    """
+    global _recorder, _audit_hook_installed
+    _recorder = FileRecorder(root, ignored)
+    if not _audit_hook_installed:
+        sys.addaudithook(_audit)
+        _audit_hook_installed = True
+    return _recorder
+
+
+def disable():
+    """
+    关闭当前进程的文件依赖记录
+    """
+    global _recorder
+    _recorder = None
+
+
+def get_recorder() -> Optional[FileRecorder]:
+    """
+    获取当前进程的记录器
+
+    @return FileRecorder 没有开启时为None
+    """
+    return _recorder
+
+
+def fixture_key(fixturedef) -> tuple:
+    """
+    fixture的标识，用于记录fixture构建时用到的文件
+
+    @param fixturedef fixture定义
+    @return (fixture名称, 定义位置)
+    """
+    return fixturedef.argname, fixturedef.baseid
+
+
+def fixture_files(item, files_by_fixture: Dict[tuple, Set[str]]) -> Set[str]:
+    """
+    测试使用的fixture构建时用到的文件（包括之前的测试已经构建好的高作用域fixture）
+
+    @param item 测试项
+    @param files_by_fixture 各fixture用到的文件 {fixture_key: 文件}
+    @return Set[str] 文件
+    """
+    files: Set[str] = set()
+    for name in item.fixturenames:
+        fixturedefs = item._fixtureinfo.name2fixturedefs.get(name)
+        if fixturedefs:
+            files |= files_by_fixture.get(fixture_key(fixturedefs[-1]), set())
+    return files
+
+
+# ========================================
+# 依赖映射
+# ========================================
+
+class ImpactStore:
+    """
+    测试与文件的依赖映射（SQLite）
+
+    表结构：
+        tests(test, git_commit, recorded)  每个测试记录时的git提交和时间
+        deps(test, path)                   测试依赖的文件
+    """
+
+    def __init__(self, path: Path):
+        """
+        @param path 数据库文件路径，不存在时创建
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != _FORMAT_VERSION:
+            # 格式不同（或新建的数据库）时重建，旧映射作废
+            self.conn.executescript("""
+                DROP TABLE IF EXISTS tests;
+                DROP TABLE IF EXISTS deps;
+                CREATE TABLE tests (test TEXT PRIMARY KEY, git_commit TEXT, recorded REAL);
+                CREATE TABLE deps (test TEXT, path TEXT, PRIMARY KEY (test, path));
+                CREATE INDEX deps_path ON deps (path);
+            """)
+            self.conn.execute(f"PRAGMA user_version = {_FORMAT_VERSION}")
+            self.conn.commit()
+
+    def record(self, mapping: Dict[str, Iterable[str]], git_commit: Optional[str]):
+        """
+        保存测试的依赖文件，替换这些测试原来的记录
+
+        @param mapping {测试ID: 依赖的文件}
+        @param git_commit 记录时的git提交
+        """
+        now = time.time()
+        with self.conn:
+            for test, paths in mapping.items():
+                self.conn.execute("DELETE FROM deps WHERE test = ?", (test,))
+                self.conn.execute("INSERT OR REPLACE INTO tests VALUES (?, ?, ?)", (test, git_commit, now))
+                self.conn.executemany("INSERT OR IGNORE INTO deps VALUES (?, ?)", ((test, path) for path in paths))
+
+    def tests(self) -> Dict[str, Optional[str]]:
+        """
+        已记录的测试
+
+        @return Dict[str, str] {测试ID: 记录时的git提交}
+        """
+        return dict(self.conn.execute("SELECT test, git_commit FROM tests"))
+
+    def dependencies(self, test: str) -> List[str]:
+        """
+        测试依赖的文件
+
+        @param test 测试ID
+        @return List[str] 相对路径
+        """
+        return [row[0] for row in self.conn.execute("SELECT path FROM deps WHERE test = ? ORDER BY path", (test,))]
+
+    def impacted(self, paths: Iterable[str]) -> Set[str]:
+        """
+        依赖任意一个文件的测试
+
+        @param paths 改动的文件（相对路径）
+        @return Set[str] 测试ID
+        """
+        paths = list(paths)
+        tests = set()
+        # SQLite 对一条语句中的参数个数有限制，分批查询
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            tests.update(row[0] for row in self.conn.execute(
+                f"SELECT DISTINCT test FROM deps WHERE path IN ({placeholders})", chunk))
+        return tests
+
+    def close(self):
+        """
+        关闭数据库
+        """
+        self.conn.close()
+
+
+# ========================================
+# git
+# ========================================
+
+def _git(root: Path, *args: str) -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "-C", str(root), *args], capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def git_head(root: Path) -> Optional[str]:
+    """
+    当前的git提交
+
+    @param root 项目根目录
+    @return str 提交哈希，不是git仓库时为None
+    """
+    output = _git(root, "rev-parse", "HEAD")
+    return output.strip() if output else None
+
+
+def changed_files(root: Path, base: str) -> Optional[Set[str]]:
+    """
+    相对某个提交改动过的文件：已提交和未提交的改动，以及未跟踪的新文件
+
+    @param root 项目根目录
+    @param base 比较的提交（哈希、分支名等）
+    @return Set[str] 相对于项目根目录的路径，无法比较（不是git仓库、提交不存在）时为None
+    """
+    diff = _git(root, "diff", "--name-only", "--relative", base, "--")
+    untracked = _git(root, "ls-files", "--others", "--exclude-standard")
+    if diff is None or untracked is None:
+        return None
+    return {line for line in (diff + untracked).splitlines() if line}
+
+
+def start_profile(recorder: FileRecorder):
+    """
+    开始记录函数调用，同时设置当前线程和之后新建的线程（测试中启动的线程也能记录到）
+
+    @param recorder 记录器
+    """
+    sys.setprofile(recorder.profile)
+    threading.setprofile(recorder.profile)
+
+
+def stop_profile():
+    """
+    停止记录函数调用
+    """
+    sys.setprofile(None)
+    threading.setprofile(None)
@@ -0,0 +1,416 @@
+"""
+日志索引模块
+
+为 logs/pytest_*.log 建立紧凑的离线索引，按测试用例ID、日志级别、时间范围查询时
+直接按字节偏移定位到对应的日志，不需要从头扫描整个文件。
+
+索引文件与日志文件放在一起，文件名为日志文件名加 .idx 后缀
+（压缩分段 pytest_2025-01-01.1.log.gz 的索引为 pytest_2025-01-01.1.log.gz.idx，
+偏移量对应解压后的内容）。索引内容：
+- 第一行：魔数
+- 第二行：JSON头部，包含测试用例ID表、已索引的字节数、最后一条日志的起始偏移等
+- 之后：定长二进制记录，每条记录是一段连续的日志
+  (起始偏移, 长度, 分钟时间桶, 测试用例序号, 级别)
+  同一测试、同一级别、同一分钟内连续的日志合并为一条记录，索引体积远小于日志本身
+
+索引在以下时机自动建立：
+- 日志文件轮转后，由后台压缩线程在压缩前建立
+- 测试会话结束时，为当天正在写入的日志文件增量建立
+
+正在写入的文件末尾可能是写了一半的行，最后一条日志之后也可能还会追加续行（异常堆栈），
+所以增量建立时从最后一条日志的起始位置重新扫描，写了一半的行留到下次再建立索引。
+
+命令行用法（在项目根目录执行）：
+    python -m src.utils.log_index build                     # 为logs目录下所有日志建立/更新索引
+    python -m src.utils.log_index query --test test_03      # 查询测试用例ID包含test_03的日志
+    python -m src.utils.log_index query --level ERROR --since "2025-01-01 10:00" --until "2025-01-01 11:00"
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import argparse
+import gzip
+import io
+import json
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# 索引文件魔数和版本
+MAGIC = b"PYTEST_LEARN_LOG_INDEX 2\n"
+
+# 每条索引记录：起始偏移(8) 长度(4) 分钟时间桶(4) 测试用例序号(4) 级别(1)
+RUN = struct.Struct("<QIIIB")
+
+# 日志级别编号，与logging的级别顺序一致
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+_LEVEL_NUMBERS = {name.encode(): number for number, name in enumerate(LEVELS)}
+
+# 头部记录日志文件开头的字节，用来识别文件是否已被轮转替换
+_HEAD_SIZE = 64
+
+# 正在写入的日志文件：pytest_2025-01-01.log，xdist worker的 pytest_2025-01-01.gw0-<会话ID>.log
+_ACTIVE_LOG = re.compile(r"^pytest_\d{4}-\d{2}-\d{2}(?:\.gw\d+-[0-9a-f]+)?\.log$")
+
+# 文件日志格式：时间 | 级别 | worker | 测试用例ID | 日志器 | 消息
+_ENTRY = re.compile(
+    rb"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}):\d{2}\.\d{3} \| (\w+)\s* \| [^|]*? \| (.*?) \| "
+)
+
+
+def index_path_for(log_path: Path) -> Path:
+    """
+    获取日志文件对应的索引文件路径
+
+    @param log_path 日志文件路径
+    @return Path 索引文件路径
+    """
+    return log_path.with_name(log_path.name + ".idx")
+
+
+def _open_binary(path: Path):
+    """以二进制方式打开日志文件，.gz/.zst文件自动解压（只支持向后seek）"""
+    if path.name.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.name.endswith(".zst"):
+        import zstandard
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        )
+    return open(path, "rb")
+
+
+class LogIndex:
+    """
+    单个日志文件的索引
+
+    @attr tests 测试用例ID表，索引记录中保存的是这里的序号
+    @attr size 已建立索引的日志字节数（只包括完整的行）
+    @attr resume 最后一条日志的起始偏移，增量建立时从这里重新扫描
+    @attr head 日志文件开头的字节（十六进制）
+    @attr runs 索引记录列表 (起始偏移, 长度, 分钟时间桶, 测试用例序号, 级别)
+    """
+
+    def __init__(self, tests: Optional[List[str]] = None, size: int = 0, head: str = "",
+                 runs: Optional[List[Tuple[int, int, int, int, int]]] = None, resume: int = 0):
+        self.tests = tests or []
+        self.size = size
+        self.resume = resume
+        self.head = head
+        self.runs = runs or []
+        self._test_ids = {test: i for i, test in enumerate(self.tests)}
+
+    def test_number(self, test_id: str) -> int:
+        """
+        获取测试用例ID的序号，不存在时加入ID表
+
+        @param test_id 测试用例ID
+        @return int 序号
+        """
+        number = self._test_ids.get(test_id)
+        if number is None:
+            number = self._test_ids[test_id] = len(self.tests)
+            self.tests.append(test_id)
+        return number
+
+    def save(self, path: Path):
+        """
+        写入索引文件（先写临时文件再改名，读取方不会看到写了一半的索引）
+
+        @param path 索引文件路径
+        """
+        header = json.dumps(
+            {"size": self.size, "resume": self.resume, "head": self.head, "tests": self.tests},
+            ensure_ascii=False
+        )
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(header.encode("utf-8") + b"\n")
+            for run in self.runs:
+                f.write(RUN.pack(*run))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['LogIndex']:
+        """
+        读取索引文件
+
+        @param path 索引文件路径
+        @return LogIndex 索引对象，文件不存在或格式不对时返回None
+        """
+        try:
+            with open(path, "rb") as f:
+                if f.readline() != MAGIC:
+                    return None
+                header = json.loads(f.readline())
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        usable = len(data) - len(data) % RUN.size
+        return cls(header["tests"], header["size"], header["head"],
+                   list(RUN.iter_unpack(data[:usable])), header["resume"])
+
+    def truncate(self, offset: int):
+        """
+        去掉索引中offset之后的部分，用于从offset开始重新扫描
+
+        @param offset 日志中的偏移
+        """
+        while self.runs and self.runs[-1][0] >= offset:
+            self.runs.pop()
+        if self.runs and self.runs[-1][0] + self.runs[-1][1] > offset:
+            start, _, *key = self.runs.pop()
+            self.runs.append((start, offset - start, *key))
+        self.size = self.resume = offset
+
+
+class _MinuteClock:
+    """把 'YYYY-MM-DD HH:MM' 转换为分钟时间桶，带缓存（同一分钟的日志只解析一次）"""
+
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, minute: bytes) -> int:
+        bucket = self._cache.get(minute)
+        if bucket is None:
+            bucket = int(time.mktime(time.strptime(minute.decode(), "%Y-%m-%d %H:%M")) // 60)
+            self._cache[minute] = bucket
+        return bucket
+
+
+def _scan(f, offset: int, index: LogIndex, complete: bool) -> Tuple[int, int]:
+    """
+    从指定偏移开始扫描日志，把日志记录追加到索引中
+
+    不以时间戳开头的行（如异常堆栈）属于上一条日志。
+    同一测试、同一级别、同一分钟的连续日志合并为一条索引记录；
+    offset 正好接在索引最后一条记录之后时，从那条记录继续合并。
+
+    @param f 已定位到offset的二进制文件对象
+    @param offset 起始偏移，必须是一条日志的开头
+    @param index 索引对象
+    @param complete 文件是否已经写完；没有写完时不扫描末尾没有换行的行（可能只写了一半）
+    @return (扫描结束时的偏移, 最后一条日志的起始偏移)
+    """
+    clock = _MinuteClock()
+    current = None
+    if index.runs and sum(index.runs[-1][:2]) == offset:
+        current = list(index.runs.pop())
+    last_start = offset
+    for line in f:
+        if not complete and not line.endswith(b"\n"):
+            break
+        match = _ENTRY.match(line)
+        if match:
+            last_start = offset
+            key = [clock(match.group(1)),
+                   index.test_number(match.group(3).decode("utf-8", "replace")),
+                   _LEVEL_NUMBERS.get(match.group(2), 0)]
+            if current is not None and current[2:] == key:
+                current[1] += len(line)
+            else:
+                if current is not None:
+                    index.runs.append(tuple(current))
+                current = [offset, len(line), *key]
+        elif current is not None:
+            current[1] += len(line)
+        offset += len(line)
+    if current is not None:
+        index.runs.append(tuple(current))
+    return offset, last_start
+
+
+def is_active_log(log_path: Path) -> bool:
+    """
+    是否为正在写入的日志文件（当天的主日志或worker日志，而不是轮转下来的历史分段）
+
+    @param log_path 日志文件路径
+    @return bool 是否可能还在写入
+    """
+    return bool(_ACTIVE_LOG.match(Path(log_path).name))
+
+
+def build_index(log_path: Path, index_path: Optional[Path] = None, save: bool = True) -> LogIndex:
+    """
+    为日志文件建立或增量更新索引
+
+    日志文件只追加写入，已有索引覆盖的部分不再重复扫描：从最后一条日志的起始位置重新扫描，
+    这条日志之后追加的续行和上次没有写完的行都能补进索引。
+    文件开头内容变化或文件变小（被轮转后重新开始写）时重新建立索引。
+    压缩分段不会再变化，已有索引直接使用。
+
+    @param log_path 日志文件路径（支持.gz/.zst）
+    @param index_path 索引文件路径，默认为日志文件名加.idx
+    @param save 是否保存索引文件，False时只在内存中更新
+    @return LogIndex 索引对象
+    """
+    log_path = Path(log_path)
+    index_path = index_path or index_path_for(log_path)
+    index = LogIndex.load(index_path)
+    compressed = log_path.name.endswith((".gz", ".zst"))
+    if index is not None and compressed:
+        return index
+
+    with _open_binary(log_path) as f:
+        head = f.read(_HEAD_SIZE).hex()
+        if index is not None:
+            if index.head != head[:len(index.head)] or log_path.stat().st_size < index.size:
+                index = None
+            elif log_path.stat().st_size == index.size:
+                return index
+        if index is None:
+            index = LogIndex()
+        index.head = head
+        index.truncate(index.resume)
+        f.seek(index.resume)
+        complete = compressed or not is_active_log(log_path)
+        index.size, index.resume = _scan(f, index.resume, index, complete)
+
+    if save:
+        index.save(index_path)
+    return index
+
+
+def query(log_path: Path, index: LogIndex, test: Optional[str] = None, level: Optional[str] = None,
+          since: Optional[float] = None, until: Optional[float] = None) -> Iterator[bytes]:
+    """
+    按条件查询日志
+
+    先用索引过滤出可能匹配的记录段，再只读取这些段；
+    时间范围在分钟时间桶上粗过滤后，再按每条日志的精确时间过滤。
+
+    @param log_path 日志文件路径
+    @param index 日志文件的索引
+    @param test 测试用例ID包含的子串
+    @param level 最低日志级别
+    @param since 起始时间戳（包含）
+    @param until 结束时间戳（不包含）
+    @return Iterator[bytes] 匹配的日志（多行日志作为一条返回）
+    """
+    tests = None
+    if test is not None:
+        tests = {i for i, test_id in enumerate(index.tests) if test in test_id}
+    min_level = LEVELS.index(level.upper()) if level else 0
+    first_bucket = int(since // 60) if since is not None else None
+    last_bucket = int(until // 60) if until is not None else None
+
+    runs = [
+        run for run in index.runs
+        if (tests is None or run[3] in tests)
+        and run[4] >= min_level
+        and (first_bucket is None or run[2] >= first_bucket)
+        and (last_bucket is None or run[2] <= last_bucket)
+    ]
+    with _open_binary(log_path) as f:
+        for offset, length, bucket, _, _ in runs:
+            f.seek(offset)
+            chunk = f.read(length)
+            exact = (first_bucket is not None and bucket == first_bucket) or \
+                    (last_bucket is not None and bucket == last_bucket)
+            for entry in _split_entries(chunk):
+                if exact and not _in_range(entry, since, until):
+                    continue
+                yield entry
+
+
+def _split_entries(chunk: bytes) -> Iterator[bytes]:
+    """把一段日志拆分为单条日志（续行归入上一条）"""
+    entry = b""
+    for line in chunk.splitlines(keepends=True):
+        if _ENTRY.match(line) and entry:
+            yield entry
+            entry = b""
+        entry += line
+    if entry:
+        yield entry
+
+
+def _in_range(entry: bytes, since: Optional[float], until: Optional[float]) -> bool:
+    """判断单条日志的精确时间是否在范围内"""
+    ts = time.mktime(time.strptime(entry[:19].decode(), "%Y-%m-%d %H:%M:%S")) + int(entry[20:23]) / 1000
+    return (since is None or ts >= since) and (until is None or ts < until)
+
+
+def build_active_indexes(log_dir: Path) -> List[Path]:
+    """
+    为日志目录中正在写入的主日志文件（pytest_YYYY-MM-DD.log）增量建立索引
+
+    历史分段的索引在轮转时已经建立，这里不再处理。
+
+    @param log_dir 日志目录
+    @return List[Path] 建立了索引的日志文件
+    """
+    active = [path for path in Path(log_dir).glob("pytest_*.log")
+              if re.fullmatch(r"pytest_\d{4}-\d{2}-\d{2}\.log", path.name)]
+    for path in active:
+        build_index(path)
+    return active
+
+
+def find_logs(log_dir: Path) -> List[Path]:
+    """
+    列出日志目录中可以建立索引的文本日志（包括压缩的历史分段）
+
+    @param log_dir 日志目录
+    @return List[Path] 日志文件路径，按文件名排序
+    """
+    return sorted(
+        path for path in Path(log_dir).glob("pytest_*.log*")
+        if path.name.endswith((".log", ".log.gz", ".log.zst"))
+    )
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """解析命令行中的时间，支持 'YYYY-MM-DD HH:MM[:SS]'"""
+    if value is None:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value, fmt))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"无法解析时间: {value}")
+
+
+def main(argv: Optional[List[str]] = None):
+    from src.config.settings import Settings
+
+    parser = argparse.ArgumentParser(description="LoggerUtil 日志索引工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = sub.add_parser("build", help="建立或更新日志索引")
+    build_parser.add_argument("files", nargs="*", type=Path, help="日志文件，默认为logs目录下所有日志")
+
+    query_parser = sub.add_parser("query", help="按条件查询日志")
+    query_parser.add_argument("files", nargs="*", type=Path, help="日志文件，默认为logs目录下所有日志")
+    query_parser.add_argument("--test", help="测试用例ID包含的子串")
+    query_parser.add_argument("--level", choices=LEVELS, type=str.upper, help="最低日志级别")
+    query_parser.add_argument("--since", help="起始时间 'YYYY-MM-DD HH:MM[:SS]'")
+    query_parser.add_argument("--until", help="结束时间 'YYYY-MM-DD HH:MM[:SS]'")
+
+    args = parser.parse_args(argv)
+    files = args.files or find_logs(Settings().LOG_DIR)
+
+    if args.command == "build":
+        for path in files:
+            index = build_index(path)
+            print(f"{path}: {len(index.runs)} 条索引记录, {len(index.tests)} 个测试用例")
+        return
+
+    since, until = _parse_time(args.since), _parse_time(args.until)
+    out = sys.stdout.buffer
+    for path in files:
+        # 正在写入的文件只在内存中补全索引，不保存（索引由写日志的会话结束时建立）
+        index = build_index(path, save=not is_active_log(path))
+        for entry in query(path, index, args.test, args.level, since, until):
+            out.write(entry)
+    out.flush()
+
+
+if __name__ == "__main__":
+    main()
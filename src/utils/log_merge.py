@@ -0,0 +1,199 @@
+"""
+日志合并模块
+
+pytest-xdist 并行执行时，每个worker写自己的日志文件（如 pytest_2025-01-01.gw0-<会话ID>.log），
+避免多个进程争用同一个文件、日志行互相穿插。
+会话结束后由主进程把本次会话各worker的日志按时间顺序合并到 pytest_2025-01-01.log。
+文件名中的会话ID（Settings.LOG_RUN_ID）保证同时运行的其他会话的worker日志不会被合并或删除。
+
+合并使用 heapq.merge 做流式多路归并，要求每个worker的日志按时间排序。
+worker日志基本有序，只有失败时才输出DEBUG日志的模式下，测试失败时补写的DEBUG日志
+比前面已经写入的同一测试的日志更早，错位不超过 LOG_RING_CAPACITY 条；
+所以每个worker的日志先经过这个大小的窗口重新排序（_reorder），再参与归并。
+每个worker同一时刻最多在内存中保留窗口大小的日志，内存占用与日志文件大小无关。合并结果通过 RotatingCompressedFileHandler 写入，
+与正常写日志一样按 LOG_MAX_BYTES 轮转、压缩和清理。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import gzip
+import heapq
+import io
+import json
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.utils.log_rotation import RotatingCompressedFileHandler
+
+# 文本日志每条记录开头的时间戳，如 2025-01-01 12:00:00.123
+_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}")
+
+# worker日志文件名：pytest_2025-01-01.gw0-<会话ID>.log 或历史分段 pytest_2025-01-01.gw0-<会话ID>.3.log.gz
+_WORKER_FILE = re.compile(
+    r"^(?P<prefix>.+)_(?P<date>\d{4}-\d{2}-\d{2})\.(?P<worker>gw\d+)-(?P<run>[0-9a-f]+)"
+    r"(?:\.(?P<number>\d+))?(?P<suffix>\.log|\.jsonl)(?:\.gz|\.zst)?$"
+)
+
+
+def _open_text(path: Path):
+    """
+    以文本方式打开日志文件，自动识别压缩格式
+
+    @param path 日志文件路径
+    @return 文本文件对象
+    """
+    if path.name.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.name.endswith(".zst"):
+        import zstandard
+        return io.TextIOWrapper(
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+            encoding="utf-8", errors="replace",
+        )
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def _text_entries(paths: List[Path]) -> Iterator[Tuple[float, str]]:
+    """
+    按顺序读取一个worker的文本日志，逐条产出日志记录
+
+    不以时间戳开头的行（如异常堆栈）归入上一条记录。
+
+    @param paths 同一个worker的日志文件，从旧到新
+    @return Iterator (时间戳, 完整记录文本)
+    """
+    # 同一秒的日志只解析一次时间
+    seconds: Dict[str, float] = {}
+    ts, lines = 0.0, []
+    for path in paths:
+        with _open_text(path) as f:
+            for line in f:
+                match = _TIMESTAMP.match(line)
+                if match:
+                    if lines:
+                        yield ts, "".join(lines)
+                    second = line[:19]
+                    if second not in seconds:
+                        seconds[second] = datetime.strptime(second, "%Y-%m-%d %H:%M:%S").timestamp()
+                    ts = seconds[second] + int(line[20:23]) / 1000
+                    lines = [line]
+                elif lines:
+                    lines.append(line)
+                else:
+                    # 文件开头没有时间戳的残缺行，排在最前面
+                    ts, lines = 0.0, [line]
+    if lines:
+        yield ts, "".join(lines)
+
+
+def _json_entries(paths: List[Path]) -> Iterator[Tuple[float, str]]:
+    """
+    按顺序读取一个worker的JSON-lines日志，逐条产出日志记录
+
+    @param paths 同一个worker的日志文件，从旧到新
+    @return Iterator (时间戳, 原始行)
+    """
+    for path in paths:
+        with _open_text(path) as f:
+            for line in f:
+                try:
+                    ts = float(json.loads(line)["ts"])
+                except (ValueError, KeyError, TypeError):
+                    ts = 0.0
+                yield ts, line
+
+
+def _reorder(entries: Iterator[Tuple[float, str]], window: int) -> Iterator[Tuple[float, str]]:
+    """
+    用固定大小的窗口给基本有序的日志重新排序
+
+    每条记录与它按时间排序后的位置相差不超过window条时，输出严格按时间排序；
+    时间相同的记录保持原来的顺序。
+
+    @param entries (时间戳, 记录) 序列
+    @param window 窗口大小，0表示不重新排序
+    @return Iterator (时间戳, 记录)
+    """
+    if window <= 0:
+        yield from entries
+        return
+    heap: List[Tuple[float, int, str]] = []
+    for sequence, (ts, entry) in enumerate(entries):
+        heapq.heappush(heap, (ts, sequence, entry))
+        if len(heap) > window:
+            ts, _, entry = heapq.heappop(heap)
+            yield ts, entry
+    while heap:
+        ts, _, entry = heapq.heappop(heap)
+        yield ts, entry
+
+
+def find_worker_logs(log_dir: Path, run_id: str) -> Dict[Tuple[str, str, str], Dict[str, List[Path]]]:
+    """
+    查找日志目录中某次会话所有worker的日志文件
+
+    @param log_dir 日志目录
+    @param run_id 会话ID，其他会话的文件不会返回
+    @return Dict {(前缀, 日期, 扩展名): {worker: [文件, 从旧到新]}}
+    """
+    found: Dict[Tuple[str, str, str], Dict[str, list]] = {}
+    for path in Path(log_dir).iterdir():
+        match = _WORKER_FILE.match(path.name)
+        if not match or match.group("run") != run_id:
+            continue
+        group = (match.group("prefix"), match.group("date"), match.group("suffix"))
+        # 历史分段按编号排序，正在写入的文件（没有编号）排在最后
+        number = int(match.group("number")) if match.group("number") else float("inf")
+        found.setdefault(group, {}).setdefault(match.group("worker"), []).append((number, path))
+    return {
+        group: {worker: [path for _, path in sorted(files)] for worker, files in workers.items()}
+        for group, workers in found.items()
+    }
+
+
+def merge_worker_logs(log_dir: Path, run_id: str, rotation: Optional[dict] = None, index: bool = False,
+                      remove_sources: bool = True, reorder_window: int = 0) -> List[Path]:
+    """
+    把某次会话各worker的日志按时间顺序合并到对应日期的主日志文件
+
+    合并结果追加写入 pytest_YYYY-MM-DD.log（或.jsonl），写入时按 rotation 参数轮转和压缩，
+    每条记录中已经带有worker ID和测试用例ID。
+
+    @param log_dir 日志目录
+    @param run_id 会话ID（Settings.LOG_RUN_ID），只合并文件名中带有这个ID的worker日志
+    @param rotation RotatingCompressedFileHandler 的轮转参数（见 log_rotation.rotation_options）
+    @param index 文本日志轮转时是否为分段建立日志索引
+    @param remove_sources 合并完成后是否删除worker日志文件
+    @param reorder_window 每个worker的日志先按这个窗口重新排序（失败时补写的日志的最大错位，
+                          即 Settings.LOG_RING_CAPACITY），0表示worker日志已经严格有序
+    @return List[Path] 写入的主日志文件列表
+    """
+    merged = []
+    formatter = logging.Formatter("%(message)s")
+    for (prefix, date, suffix), workers in sorted(find_worker_logs(log_dir, run_id).items()):
+        read = _json_entries if suffix == ".jsonl" else _text_entries
+        streams = [_reorder(read(paths), reorder_window) for _, paths in sorted(workers.items())]
+        handler = RotatingCompressedFileHandler(
+            log_dir, prefix=prefix, suffix=suffix, date=date,
+            index=index and suffix == ".log", **(rotation or {})
+        )
+        handler.setFormatter(formatter)
+        # 记录文本已经带有换行
+        handler.terminator = ""
+        day_start = datetime.strptime(date, "%Y-%m-%d").timestamp()
+        try:
+            for ts, entry in heapq.merge(*streams, key=lambda item: item[0]):
+                # 日志时间决定写入哪一天的文件，没有时间的残缺记录归入worker文件的日期
+                handler.handle(logging.makeLogRecord({"msg": entry, "created": max(ts, day_start)}))
+        finally:
+            handler.close()
+        merged.append(handler.base_path(date))
+        if remove_sources:
+            for paths in workers.values():
+                for path in paths:
+                    path.unlink(missing_ok=True)
+    return merged
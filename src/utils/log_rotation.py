@@ -0,0 +1,416 @@
+"""
+日志轮转模块
+
+提供按大小和日期轮转的文件处理器，轮转后的压缩和过期清理在后台线程中执行。
+
+文件命名规则（以 prefix="pytest", suffix=".log" 为例）：
+- 正在写入的文件：pytest_2025-01-01.log
+- 轮转后的历史分段：pytest_2025-01-01.1.log.gz、pytest_2025-01-01.2.log.gz ...
+  分段编号越大越新
+- 之前某天没有轮转的文件（进程在零点前结束）：处理器启动时轮转为那一天的分段并压缩；
+  其他tag的（如其他会话的worker日志）不轮转，但同样按 retention_days 清理
+
+轮转本身只是一次文件重命名，在 LoggerUtil 的后台日志线程中完成；
+压缩、建立日志索引（见log_index.py）和清理交给独立的压缩线程，
+日志线程和测试代码都不会因为轮转而阻塞。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import gzip
+import logging
+import queue
+import re
+import shutil
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from src.utils.log_index import build_index, index_path_for
+
+# 压缩方式对应的文件扩展名
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+    "none": "",
+}
+
+
+def _compress_file(path: Path, compression: str) -> Path:
+    """
+    压缩单个文件，压缩成功后删除原文件
+
+    @param path 待压缩文件
+    @param compression 压缩方式：gzip、zstd、none
+    @return Path 压缩后的文件路径
+    """
+    if compression == "none":
+        return path
+    target = path.with_name(path.name + COMPRESSION_SUFFIXES[compression])
+    tmp = target.with_name(target.name + ".tmp")
+    with open(path, "rb") as src:
+        if compression == "zstd":
+            import zstandard
+            with open(tmp, "wb") as dst:
+                zstandard.ZstdCompressor().copy_stream(src, dst)
+        else:
+            with gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    # 先写临时文件再改名，避免进程中断时留下不完整的压缩文件
+    tmp.replace(target)
+    path.unlink()
+    return target
+
+
+def rotation_options(settings) -> dict:
+    """
+    从配置中读取日志轮转参数
+
+    @param settings 配置对象
+    @return dict RotatingCompressedFileHandler 的 max_bytes、backup_count、retention_days、compression 参数
+    """
+    return dict(
+        max_bytes=settings.LOG_MAX_BYTES,
+        backup_count=settings.LOG_BACKUP_COUNT,
+        retention_days=settings.LOG_RETENTION_DAYS,
+        compression=settings.LOG_COMPRESSION,
+    )
+
+
+class _Compressor:
+    """
+    后台压缩线程
+
+    从任务队列中依次取出轮转下来的文件进行压缩，并执行过期清理。
+    第一次提交任务时才启动线程。
+    """
+
+    # 停止标记
+    _STOP = object()
+    # 本进程所有压缩线程中还没压缩完的文件（主日志和合并日志的处理器会清理同一批分段）
+    _pending = set()
+    _pending_lock = threading.Lock()
+
+    def __init__(self, handler: 'RotatingCompressedFileHandler'):
+        self._handler = handler
+        self._tasks = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: Path):
+        """
+        提交一个待压缩文件
+
+        @param path 轮转下来的日志文件
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="log-compressor", daemon=True
+                )
+                self._thread.start()
+        with self._pending_lock:
+            self._pending.add(path)
+        self._tasks.put(path)
+
+    @classmethod
+    def is_pending(cls, path: Path) -> bool:
+        """
+        文件是否还在等待压缩（清理时不能删除）
+
+        @param path 分段路径
+        @return bool 是否在压缩队列中
+        """
+        with cls._pending_lock:
+            return path in cls._pending
+
+    def stop(self):
+        """
+        停止压缩线程，等待已提交的任务全部完成
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._tasks.put(self._STOP)
+            thread.join()
+
+    def _run(self):
+        while True:
+            path = self._tasks.get()
+            if path is self._STOP:
+                return
+            try:
+                try:
+                    if self._handler.index:
+                        # 在压缩前为分段建立索引，索引文件名对应压缩后的文件
+                        compressed = path.with_name(path.name + COMPRESSION_SUFFIXES[self._handler.compression])
+                        build_index(path, index_path_for(compressed))
+                    _compress_file(path, self._handler.compression)
+                finally:
+                    with self._pending_lock:
+                        self._pending.discard(path)
+                self._handler.cleanup()
+            except Exception:
+                # 后台线程中的异常不能影响测试，交给logging统一的错误输出
+                self._handler.handleError(
+                    logging.makeLogRecord({"msg": f"日志压缩失败: {path}"})
+                )
+
+
+class RotatingCompressedFileHandler(logging.FileHandler):
+    """
+    按大小和日期轮转的日志文件处理器
+
+    - 日期变化时切换到新日期的文件
+    - 当前文件超过 max_bytes 时轮转为新的分段
+    - 轮转下来的文件在后台线程中压缩，并按 backup_count、retention_days 清理
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str = "pytest",
+        suffix: str = ".log",
+        tag: str = "",
+        max_bytes: int = 0,
+        backup_count: int = 0,
+        retention_days: int = 0,
+        compression: str = "gzip",
+        index: bool = False,
+        encoding: str = "utf-8",
+        date: Optional[str] = None,
+    ):
+        """
+        @param directory 日志目录
+        @param prefix 文件名前缀
+        @param suffix 文件扩展名
+        @param tag 插在日期后面的附加标识（如worker编号 ".gw0"）
+        @param max_bytes 单个文件最大字节数，0表示不按大小轮转
+        @param backup_count 最多保留的历史分段数量，0表示不限制
+        @param retention_days 历史分段保留天数，0表示不限制
+        @param compression 压缩方式：gzip、zstd、none
+        @param index 轮转时是否为分段建立日志索引
+        @param encoding 文件编码
+        @param date 写入哪一天的文件 YYYY-MM-DD，默认为今天（合并之前的worker日志时指定）
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"不支持的日志压缩方式: {compression}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                warnings.warn("未安装zstandard，日志压缩改用gzip")
+                compression = "gzip"
+
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.suffix = suffix
+        self.tag = tag
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.retention_days = retention_days
+        self.compression = compression
+        self.index = index
+        # 匹配所有历史分段（不限定tag，清理时对所有worker的分段统一生效）
+        self._segment_pattern = re.compile(
+            rf"^{re.escape(prefix)}_(\d{{4}}-\d{{2}}-\d{{2}})(.*)\.(\d+){re.escape(suffix)}"
+            rf"(\.gz|\.zst)?$"
+        )
+        # 匹配所有日期的正在写入的文件（先排除历史分段再用）
+        self._base_pattern = re.compile(
+            rf"^{re.escape(prefix)}_(\d{{4}}-\d{{2}}-\d{{2}})(.*){re.escape(suffix)}$"
+        )
+        self._compressor = _Compressor(self)
+
+        self._date = date or datetime.now().strftime("%Y-%m-%d")
+        self._next_rollover_at = self._compute_next_rollover()
+        # 多个进程可能同时创建目录，exist_ok保证不会报错
+        self.directory.mkdir(parents=True, exist_ok=True)
+        super().__init__(self.base_path(self._date), encoding=encoding, delay=True)
+        if date is None:
+            self._roll_previous_days()
+
+    def base_path(self, date: str) -> Path:
+        """
+        获取某天正在写入的日志文件路径
+
+        @param date 日期字符串 YYYY-MM-DD
+        @return Path 文件路径
+        """
+        return self.directory / f"{self.prefix}_{date}{self.tag}{self.suffix}"
+
+    def segment_path(self, date: str, number: int) -> Path:
+        """
+        获取某天第number个历史分段的路径（未压缩）
+
+        @param date 日期字符串 YYYY-MM-DD
+        @param number 分段编号
+        @return Path 文件路径
+        """
+        return self.directory / f"{self.prefix}_{date}{self.tag}.{number}{self.suffix}"
+
+    def segments(self, date: str, tag: Optional[str] = None) -> list:
+        """
+        按编号顺序列出某天的历史分段（包括已压缩和未压缩的）
+
+        @param date 日期字符串 YYYY-MM-DD
+        @param tag 只列出指定tag的分段，默认为当前处理器的tag
+        @return list 分段路径列表，从旧到新
+        """
+        tag = self.tag if tag is None else tag
+        found = []
+        for path in self.directory.glob(f"{self.prefix}_{date}*"):
+            match = self._segment_pattern.match(path.name)
+            if match and match.group(1) == date and match.group(2) == tag:
+                found.append((int(match.group(3)), path))
+        return [path for _, path in sorted(found)]
+
+    def _previous_base_files(self, tag: Optional[str] = None) -> list:
+        """
+        列出日期早于当前日期、还没有轮转为分段的文件
+
+        @param tag 只列出指定tag的文件，默认为所有tag
+        @return list [(日期, 路径), ...]
+        """
+        found = []
+        for path in self.directory.glob(f"{self.prefix}_*{self.suffix}"):
+            if self._segment_pattern.match(path.name):
+                continue
+            match = self._base_pattern.match(path.name)
+            if match and match.group(1) < self._date and (tag is None or match.group(2) == tag):
+                found.append((match.group(1), path))
+        return sorted(found)
+
+    def _roll_previous_days(self):
+        """
+        把之前日期的文件（上次运行在零点前结束，没有触发按日期轮转）轮转为那一天的分段并压缩
+
+        同时启动的进程可能已经轮转了同一个文件，文件不存在时跳过。
+        """
+        for date, path in self._previous_base_files(self.tag):
+            existing = self.segments(date)
+            number = int(self._segment_pattern.match(existing[-1].name).group(3)) + 1 if existing else 1
+            target = self.segment_path(date, number)
+            try:
+                if path.stat().st_size == 0:
+                    path.unlink()
+                    continue
+                path.rename(target)
+            except FileNotFoundError:
+                continue
+            index_path_for(path).unlink(missing_ok=True)
+            self._compressor.submit(target)
+
+    def _compute_next_rollover(self) -> float:
+        """
+        计算下一次按日期轮转的时间点（下一个零点）
+
+        @return float 时间戳
+        """
+        tomorrow = datetime.strptime(self._date, "%Y-%m-%d") + timedelta(days=1)
+        return tomorrow.timestamp()
+
+    def should_rollover(self, record: logging.LogRecord) -> bool:
+        """
+        判断写入这条日志前是否需要轮转
+
+        按大小判断时使用当前文件位置，不为了判断而额外格式化日志。
+
+        @param record 日志记录
+        @return bool 是否需要轮转
+        """
+        if record.created >= self._next_rollover_at:
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def do_rollover(self, record: logging.LogRecord):
+        """
+        执行轮转
+
+        关闭并重命名当前文件，交给后台线程压缩，然后按新日期打开新文件。
+
+        @param record 触发轮转的日志记录
+        """
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        current = self.base_path(self._date)
+        if current.exists() and current.stat().st_size > 0:
+            existing = self.segments(self._date)
+            number = 1
+            if existing:
+                number = int(self._segment_pattern.match(existing[-1].name).group(3)) + 1
+            target = self.segment_path(self._date, number)
+            current.rename(target)
+            # 主日志文件重新开始写，旧的索引已经不对应了
+            index_path_for(current).unlink(missing_ok=True)
+            self._compressor.submit(target)
+
+        if record.created >= self._next_rollover_at:
+            self._date = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d")
+            self._next_rollover_at = self._compute_next_rollover()
+        self.baseFilename = str(self.base_path(self._date).absolute())
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.should_rollover(record):
+                self.do_rollover(record)
+        except Exception:
+            self.handleError(record)
+            return
+        super().emit(record)
+
+    def cleanup(self):
+        """
+        清理过期的历史分段
+
+        先删除修改时间超过 retention_days 的分段和之前日期没有轮转的文件，
+        再按（日期, 分段编号）只保留最新的 backup_count 个分段。
+        新旧不能按修改时间判断：刚压缩完的分段修改时间最新，会把还没压缩的更新的分段挤掉。
+        还在压缩队列中的分段不删除。多个进程可能同时清理，文件已被删除时直接忽略。
+        """
+        segments = []
+        for path in self.directory.glob(f"{self.prefix}_*"):
+            match = self._segment_pattern.match(path.name)
+            if match and not _Compressor.is_pending(path):
+                try:
+                    mtime = path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                segments.append(((match.group(1), int(match.group(3)), match.group(2)), mtime, path))
+        segments.sort(key=lambda item: item[0])
+
+        expired = []
+        if self.retention_days > 0:
+            deadline = time.time() - self.retention_days * 86400
+            for _, path in self._previous_base_files():
+                try:
+                    if path.stat().st_mtime < deadline:
+                        expired.append((None, None, path))
+                except FileNotFoundError:
+                    continue
+            expired += [item for item in segments if item[1] < deadline]
+            segments = [item for item in segments if item[1] >= deadline]
+        if self.backup_count > 0 and len(segments) > self.backup_count:
+            expired += segments[:len(segments) - self.backup_count]
+
+        for _, _, path in expired:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            index_path_for(path).unlink(missing_ok=True)
+
+    def close(self):
+        """
+        关闭处理器，等待后台压缩任务完成
+        """
+        self._compressor.stop()
+        super().close()
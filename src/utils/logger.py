@@ -4,16 +4,366 @@
 提供统一的日志配置和日志记录功能。
 支持控制台和文件两种输出方式。
 
+控制台和文件处理器挂在 QueueListener 后台线程上，
+调用方记录日志时把%参数格式化为消息文本后放入队列（日志内容是调用时的值），
+格式器拼接时间、级别等字段和磁盘/终端写入都在后台线程中完成，不会阻塞测试执行。
+
+日志消息支持延迟求值：
+    logger.info('设备配置:%s', config)                  # %s参数在确定要输出时才格式化
+    logger.info(lambda: f'设备配置:{req.json()}')       # 整条消息由函数生成
+    logger.info('设备配置:%s', lazy(req.json))          # 单个参数由函数生成
+级别被过滤、被限流丢弃的日志不会求值；要输出的日志在调用线程中求值一次，
+记录的是调用时的值，之后修改对象或闭包变量不影响日志内容。
+
+可选的结构化JSON-lines输出（Settings.LOG_JSON 或 --log-json 开启），
+每行一条JSON记录，包含测试用例ID、xdist worker ID和耗时字段。
+
+可以按调用点（文件+行号）对日志限流和去重，避免轮询/压测循环刷屏（默认关闭）：
+- LOG_DEDUP_WINDOW > 0：窗口内连续重复的相同消息只输出第一条，之后输出一条"重复了N次"的汇总
+- LOG_RATE_LIMIT > 0：每个调用点在 LOG_RATE_WINDOW 秒内最多输出 LOG_RATE_LIMIT 条，超出部分丢弃并汇总
+
+日志系统在第一次真正记录日志时才初始化：创建 LoggerUtil() 实例（例如在测试模块顶层）
+不会创建目录、打开文件或启动后台线程，收集阶段没有任何开销。
+
+失败时才输出DEBUG日志的模式（Settings.LOG_FAILURE_ONLY 或 --log-failure-only 开启）：
+日志文件只写INFO及以上级别，每个测试的DEBUG日志先放在内存环形缓冲区中，
+测试失败时才作为一整块经过队列写入日志文件，并附加到测试报告。
+这块日志比它前面已经写入的同一测试的INFO日志更早，日志文件因此不是严格按时间排序的，
+但错位不超过 LOG_RING_CAPACITY 条，合并worker日志时按这个窗口重新排序（见log_merge.py）。
+
 @author Test Engineer
 @date 2025/01/01
 """
 
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-from pathlib import Path
-from typing import Optional
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, List, Optional
 from datetime import datetime
 
+from src.config.settings import Settings
+from src.utils.log_rotation import RotatingCompressedFileHandler, rotation_options
+
+
+class LazyMessage:
+    """
+    延迟求值的日志消息
+
+    包装一个无参函数，确定这条日志要输出（或放入失败时才输出的缓冲区）时，
+    在调用线程中调用一次，结果替换掉日志记录中的消息（见 _freeze_message），
+    后台线程和各处理器只使用生成好的文本。
+    """
+
+    __slots__ = ("_func",)
+
+    def __init__(self, func: Callable[[], Any]):
+        self._func = func
+
+    def __str__(self) -> str:
+        return str(self._func())
+
+
+def lazy(func: Callable[[], Any]) -> LazyMessage:
+    """
+    把函数包装为延迟求值的日志参数
+
+    @param func 无参函数，返回值会在日志输出时转为字符串
+    @return LazyMessage 延迟求值对象
+    """
+    return LazyMessage(func)
+
+
+class _ContextFilter(logging.Filter):
+    """
+    日志上下文过滤器
+
+    在调用线程中给日志记录补充测试上下文字段：
+    test_id（当前测试用例ID）、worker_id（xdist worker编号）、
+    test_elapsed_ms（距离当前测试开始的毫秒数）。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.worker_id = os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.worker_id = self.worker_id
+        record.test_id = LoggerUtil._current_test or "-"
+        if LoggerUtil._test_started is not None:
+            record.test_elapsed_ms = round((record.created - LoggerUtil._test_started) * 1000, 3)
+        else:
+            record.test_elapsed_ms = None
+        return True
+
+
+class _CallSiteState:
+    """单个调用点的限流/去重状态"""
+
+    __slots__ = ("window_start", "count", "dropped", "last_msg", "last_args",
+                 "last_time", "repeated", "level")
+
+    def __init__(self, now: float):
+        self.window_start = now
+        self.count = 0
+        self.dropped = 0
+        self.last_msg = None
+        self.last_args = None
+        self.last_time = 0.0
+        self.repeated = 0
+        self.level = logging.INFO
+
+
+def _same_args(args, other) -> bool:
+    """
+    判断两条日志的%参数是否相同
+
+    参数可以是任意对象（如numpy数组的 == 返回数组，比较本身也可能抛异常），
+    这里只判断是否为同一个对象，或者repr相同；repr出错时视为不同。
+
+    @param args 当前日志的参数
+    @param other 上一条日志的参数
+    @return bool 是否相同
+    """
+    if args is other:
+        return True
+    try:
+        return repr(args) == repr(other)
+    except Exception:
+        return False
+
+
+class _RateLimitFilter(logging.Filter):
+    """
+    按调用点限流和去重的过滤器
+
+    在调用线程中执行，被丢弃的日志不会入队，也不会被格式化。
+    调用点由日志记录的文件名和行号确定（LoggerUtil使用stacklevel指向真实调用方）。
+
+    - 去重：同一调用点在 dedup_window 秒内重复输出完全相同的消息（模板和参数都相同）时，
+      只保留第一条，之后输出一条"重复了N次"的汇总
+    - 限流：同一调用点每 rate_window 秒最多输出 rate_limit 条
+    """
+
+    # 汇总记录的标记属性，汇总记录本身不再参与限流
+    SUMMARY_ATTR = "_rate_limit_summary"
+
+    def __init__(self, logger: logging.Logger, rate_limit: int, rate_window: float, dedup_window: float):
+        super().__init__()
+        self._logger = logger
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.dedup_window = dedup_window
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, self.SUMMARY_ATTR, False):
+            return True
+        site = (record.pathname, record.lineno)
+        now = record.created
+        summaries = []
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None:
+                state = self._sites[site] = _CallSiteState(now)
+
+            # 去重：与该调用点上一条输出的消息完全相同（只比较字符串模板，延迟消息不参与去重）
+            if (self.dedup_window > 0
+                    and isinstance(record.msg, str)
+                    and now - state.last_time < self.dedup_window
+                    and record.msg == state.last_msg
+                    and _same_args(record.args, state.last_args)):
+                state.repeated += 1
+                return False
+
+            # 限流：固定时间窗口计数
+            if self.rate_limit > 0:
+                if now - state.window_start >= self.rate_window:
+                    summaries.extend(self._take_summaries(site, state))
+                    state.window_start = now
+                    state.count = 0
+                if state.count >= self.rate_limit:
+                    state.dropped += 1
+                    return False
+                state.count += 1
+
+            summaries.extend(self._take_summaries(site, state, dropped=False))
+            state.last_msg = record.msg
+            state.last_args = record.args
+            state.last_time = now
+            state.level = record.levelno
+        for summary in summaries:
+            self._logger.handle(summary)
+        return True
+
+    def _take_summaries(self, site, state: _CallSiteState, dropped: bool = True) -> List[logging.LogRecord]:
+        """
+        取出调用点待输出的汇总记录并清零计数
+
+        @param site 调用点 (文件名, 行号)
+        @param state 调用点状态
+        @param dropped 是否同时输出限流丢弃的汇总
+        @return List[LogRecord] 汇总记录
+        """
+        summaries = []
+        if state.repeated:
+            summaries.append(self._make_summary(site, state.level, "上一条消息重复了 %d 次", state.repeated))
+            state.repeated = 0
+        if dropped and state.dropped:
+            summaries.append(self._make_summary(
+                site, state.level, "该调用点在 %.1f 秒内超过 %d 条，%d 条日志被限流丢弃",
+                self.rate_window, self.rate_limit, state.dropped
+            ))
+            state.dropped = 0
+        return summaries
+
+    def _make_summary(self, site, level: int, msg: str, *args) -> logging.LogRecord:
+        record = self._logger.makeRecord(self._logger.name, level, site[0], site[1], msg, args, None)
+        setattr(record, self.SUMMARY_ATTR, True)
+        return record
+
+    def flush(self):
+        """
+        输出所有调用点待输出的汇总记录
+
+        在测试切换和日志关闭时调用，避免循环结束后最后的重复/丢弃计数丢失。
+        """
+        with self._lock:
+            summaries = []
+            for site, state in self._sites.items():
+                summaries.extend(self._take_summaries(site, state))
+            self._sites.clear()
+        for summary in summaries:
+            self._logger.handle(summary)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    JSON-lines格式器
+
+    每条日志输出为一行JSON，便于用流式工具（jq、日志平台等）分析。
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": record.created,
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "test_id": getattr(record, "test_id", "-"),
+            "worker_id": getattr(record, "worker_id", "main"),
+            # 距离日志系统启动的毫秒数
+            "elapsed_ms": round(record.relativeCreated, 3),
+            # 距离当前测试开始的毫秒数，不在测试中时为null
+            "test_elapsed_ms": getattr(record, "test_elapsed_ms", None),
+            "file": record.pathname,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _freeze_message(record: logging.LogRecord) -> logging.LogRecord:
+    """
+    在调用线程中生成消息文本：合并%参数、调用延迟消息
+
+    之后修改参数对象、闭包变量都不影响这条日志；已经生成过的记录不会重复求值。
+
+    @param record 日志记录
+    @return LogRecord 消息为最终文本、没有参数的同一个记录
+    """
+    if record.args or not isinstance(record.msg, str):
+        record.msg = record.getMessage()
+        record.args = None
+    return record
+
+
+class _RingBufferHandler(logging.Handler):
+    """
+    环形缓冲区处理器
+
+    在调用线程中生成消息文本后把当前测试的日志记录放入定长队列，不做格式化也不写磁盘，
+    测试失败时写出的是调用时的内容。超过容量时自动丢弃最早的记录，内存占用有上限。
+    """
+
+    def __init__(self, capacity: int):
+        super().__init__(logging.DEBUG)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(_freeze_message(record))
+
+    def drain(self) -> List[logging.LogRecord]:
+        """
+        取出并清空缓冲区中的全部记录
+
+        @return List[LogRecord] 日志记录，从旧到新
+        """
+        records = list(self.records)
+        self.records.clear()
+        return records
+
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """
+    只负责入队的队列处理器
+
+    标准 QueueHandler 会在调用线程中用格式器生成整行文本并复制记录（为了能跨进程传递），
+    这里的队列只在本进程内使用：调用线程中只生成消息文本（合并%参数、调用延迟消息），
+    参数是可变对象时日志记录的是调用时的内容，而不是后台线程写出时的内容；
+    格式器的工作和写入留给后台线程完成。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return _freeze_message(record)
+
+
+class _FlushedRecords:
+    """
+    失败时补写的一组日志记录，作为一个队列元素交给后台线程
+
+    @attr records 日志记录，从旧到新
+    @attr handlers 要写入的文件处理器
+    """
+
+    __slots__ = ("records", "handlers")
+
+    def __init__(self, records: List[logging.LogRecord], handlers: List[logging.Handler]):
+        self.records = records
+        self.handlers = handlers
+
+    def write(self):
+        """
+        把低于处理器级别的记录（之前没有写入文件的DEBUG日志）写入各文件处理器
+        """
+        for record in self.records:
+            for handler in self.handlers:
+                if record.levelno < handler.level:
+                    # Handler.handle不检查级别，直接写出
+                    handler.handle(record)
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """
+    后台写日志的队列监听器，额外处理失败时补写的整块日志
+    """
+
+    def handle(self, record):
+        if isinstance(record, _FlushedRecords):
+            record.write()
+        else:
+            super().handle(record)
+
 
 class LoggerUtil:
     """
@@ -21,27 +371,53 @@ class LoggerUtil:
 
     使用单例模式，提供统一的日志配置。
     支持日志级别设置、格式定制、文件输出等功能。
+    日志配置延迟到第一次记录日志（或调用get_logger）时才执行。
     """
 
     # 单例实例
     _instance: Optional['LoggerUtil'] = None
     # 日志器实例
     _logger: Optional[logging.Logger] = None
+    # 后台写日志的队列监听器
+    _listener: Optional[_QueueListener] = None
+    # 调用方使用的入队处理器
+    _queue_handler: Optional[logging.Handler] = None
+    # 实际输出的处理器（控制台、文件）
+    _handlers: List[logging.Handler] = []
+    # 当前正在执行的测试用例ID及开始时间，由日志插件维护
+    _current_test: Optional[str] = None
+    _test_started: Optional[float] = None
+    # 失败时才输出DEBUG日志模式下的环形缓冲区
+    _ring_handler: Optional[_RingBufferHandler] = None
+    # 按调用点限流/去重的过滤器
+    _rate_filter: Optional[_RateLimitFilter] = None
+    # 初始化锁，保证多线程同时第一次记录日志时只初始化一次
+    _init_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self):
+    def _ensure_logger(self) -> logging.Logger:
+        """
+        获取日志器，第一次调用时执行初始化
+
+        @return logging.Logger 日志器对象
+        """
         if self._logger is None:
-            self._initialize_logger()
+            with LoggerUtil._init_lock:
+                if self._logger is None:
+                    self._initialize_logger()
+        return self._logger
 
     def _initialize_logger(self):
         """
         初始化日志配置
 
-        配置日志格式、级别和输出方式
+        配置日志格式、级别和输出方式。
+        多个进程（xdist worker）同时初始化也是安全的：
+        日志目录允许已存在，每个worker写自己的日志文件，文件在第一次写入时才打开。
         """
         # 创建日志器
         logger = logging.getLogger("pytest_learn")
@@ -53,30 +429,121 @@ class LoggerUtil:
             fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
+        # 文件格式器 - 时间精确到毫秒，并带上worker ID和测试用例ID，
+        # 多个worker的日志合并后仍能按时间排序、区分来源
+        file_formatter = logging.Formatter(
+            fmt='%(asctime)s.%(msecs)03d | %(levelname)-8s | %(worker_id)s | %(test_id)s | %(name)s | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
 
         # 创建控制台处理器 - 输出到控制台
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
 
         # 创建文件处理器 - 输出到文件
-        # 获取项目根目录
-        project_root = Path(__file__).parent.parent.parent
-        logs_dir = project_root / "logs"
-        # 确保日志目录存在
-        logs_dir.mkdir(exist_ok=True)
-
-        # 日志文件按日期命名
-        today = datetime.now().strftime("%Y-%m-%d")
-        log_file = logs_dir / f"pytest_{today}.log"
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        settings = Settings()
+        logs_dir = settings.LOG_DIR
+
+        # 日志文件按日期命名 pytest_YYYY-MM-DD.log，超过大小或跨天时轮转，
+        # 轮转下来的文件在后台线程中压缩和清理。
+        # xdist并行时每个worker写自己的文件 pytest_YYYY-MM-DD.gw0-<会话ID>.log，
+        # 会话结束后由主进程合并本次会话的文件（见log_merge.py）
+        worker_id = os.environ.get("PYTEST_XDIST_WORKER")
+        tag = ""
+        if worker_id:
+            tag = f".{worker_id}-{settings.LOG_RUN_ID}" if settings.LOG_RUN_ID else f".{worker_id}"
+        rotation = dict(tag=tag, **rotation_options(settings))
+        file_handler = RotatingCompressedFileHandler(
+            logs_dir, suffix=".log", index=settings.LOG_INDEX, **rotation
+        )
         file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(file_formatter)
+        handlers = [console_handler, file_handler]
+
+        # 创建JSON-lines处理器 - 可选的结构化输出
+        if settings.LOG_JSON:
+            json_handler = RotatingCompressedFileHandler(logs_dir, suffix=".jsonl", **rotation)
+            json_handler.setLevel(logging.DEBUG)
+            json_handler.setFormatter(JsonLinesFormatter())
+            handlers.append(json_handler)
+
+        # 失败时才输出DEBUG日志模式 - 文件只写INFO及以上，
+        # DEBUG日志先进入当前测试的环形缓冲区，测试失败时再写出
+        ring_handler = None
+        if settings.LOG_FAILURE_ONLY:
+            for handler in handlers[1:]:
+                handler.setLevel(max(handler.level, logging.INFO))
+            ring_handler = _RingBufferHandler(settings.LOG_RING_CAPACITY)
+            logger.addHandler(ring_handler)
+
+        # 日志器级别取所有处理器中最低的级别，
+        # 没有处理器会输出的日志在调用方直接丢弃，延迟消息也不会被求值
+        logger.setLevel(min(handler.level for handler in handlers + [ring_handler] if handler))
+
+        # 创建队列和后台监听线程 - 所有处理器都在后台线程中执行
+        # respect_handler_level=True 保证各处理器自己的级别仍然生效
+        log_queue = queue.SimpleQueue()
+        queue_handler = _EnqueueHandler(log_queue)
+        # 所有处理器都不会输出的级别不再入队
+        queue_handler.setLevel(min(handler.level for handler in handlers))
+        # 上下文字段必须在调用线程中补充，后台线程拿不到当前测试信息
+        logger.addFilter(_ContextFilter())
+        # 限流/去重同样在调用线程中执行，被丢弃的日志不会入队
+        rate_filter = _RateLimitFilter(
+            logger, settings.LOG_RATE_LIMIT, settings.LOG_RATE_WINDOW, settings.LOG_DEDUP_WINDOW
+        )
+        logger.addFilter(rate_filter)
+        listener = _QueueListener(
+            log_queue, *handlers,
+            respect_handler_level=True
+        )
+        listener.start()
+        logger.addHandler(queue_handler)
+
+        # 进程退出（包括未捕获异常导致的退出）时把队列中剩余的日志写完
+        atexit.register(LoggerUtil.shutdown)
 
         # 保存日志器实例
-        self._logger = logger
+        LoggerUtil._logger = logger
+        LoggerUtil._listener = listener
+        LoggerUtil._queue_handler = queue_handler
+        LoggerUtil._handlers = handlers
+        LoggerUtil._ring_handler = ring_handler
+        LoggerUtil._rate_filter = rate_filter
+
+    @classmethod
+    def shutdown(cls):
+        """
+        停止后台日志线程
+
+        等待队列中已有的日志全部写出，然后把处理器直接挂回日志器，
+        之后的日志改为同步写出，保证会话结束后记录的日志也不会丢失。
+        可重复调用。
+        """
+        if cls._listener is None:
+            return
+        cls._rate_filter.flush()
+        # stop() 会放入结束标记并等待后台线程处理完队列中的全部记录
+        cls._listener.stop()
+        cls._listener = None
+        cls._logger.removeHandler(cls._queue_handler)
+        cls._queue_handler = None
+        for handler in cls._handlers:
+            handler.flush()
+            cls._logger.addHandler(handler)
+
+    @classmethod
+    def release_files(cls):
+        """
+        关闭日志文件（等待后台压缩完成），之后再记录日志时重新打开
+
+        合并worker日志时主日志文件可能被轮转改名，合并前调用，
+        之后的日志写入新的主日志文件，而不是已经轮转下来的分段。
+        """
+        for handler in cls._handlers:
+            if isinstance(handler, RotatingCompressedFileHandler):
+                handler.close()
 
     def get_logger(self) -> logging.Logger:
         """
@@ -84,47 +551,111 @@ class LoggerUtil:
 
         @return logging.Logger 日志器对象
         """
-        return self._logger
+        return self._ensure_logger()
+
+    @classmethod
+    def set_current_test(cls, test_id: Optional[str]):
+        """
+        设置当前正在执行的测试用例
+
+        由日志插件在每个测试开始/结束时调用，用于给日志补充test_id和测试耗时。
+
+        @param test_id 测试用例ID（nodeid），测试结束时传None
+        """
+        # 上一个测试中还没输出的重复/限流汇总归属于上一个测试
+        if cls._rate_filter is not None:
+            cls._rate_filter.flush()
+        cls._current_test = test_id
+        cls._test_started = time.time() if test_id is not None else None
+        if cls._ring_handler is not None:
+            cls._ring_handler.records.clear()
+
+    @classmethod
+    def flush_failure_context(cls) -> str:
+        """
+        写出当前测试缓存的日志（失败时才输出DEBUG日志模式）
+
+        缓冲区中低于文件处理器级别的记录（即之前没有写入文件的DEBUG日志）
+        作为一整块放入日志队列，由后台线程连续写入日志文件，不与队列中其他日志穿插；
+        全部缓存记录格式化后返回，用于附加到测试报告。
+        同一个测试多次调用时只返回上次调用之后的新记录。
+
+        @return str 格式化后的日志文本，未开启该模式或没有记录时返回空字符串
+        """
+        if cls._ring_handler is None:
+            return ""
+        records = cls._ring_handler.drain()
+        file_handlers = [h for h in cls._handlers if isinstance(h, RotatingCompressedFileHandler)]
+        # 先在调用线程中格式化报告文本，再交给后台线程写文件
+        text = "\n".join(file_handlers[0].format(record) for record in records)
+        flushed = _FlushedRecords(records, file_handlers)
+        if cls._listener is not None:
+            cls._listener.queue.put_nowait(flushed)
+        else:
+            flushed.write()
+        return text
+
+    def _log(self, level: int, message, args: tuple, kwargs: dict):
+        """
+        记录日志
+
+        message为函数时包装成延迟消息，级别和限流检查通过后才在调用线程中调用。
+        stacklevel=3 让日志记录中的文件名和行号指向调用LoggerUtil的代码，
+        而不是本文件。
+
+        @param level 日志级别
+        @param message 日志消息，可以是字符串、%格式模板或无参函数
+        @param args %格式参数，输出时才格式化
+        @param kwargs 透传给logging的参数，如exc_info
+        """
+        if callable(message):
+            message = LazyMessage(message)
+        self._ensure_logger().log(level, message, *args, stacklevel=3, **kwargs)
 
-    def debug(self, message: str):
+    def debug(self, message, *args, **kwargs):
         """
         记录debug级别日志
 
-        @param message 日志消息
+        @param message 日志消息（字符串、%格式模板或无参函数）
+        @param args %格式参数
         """
-        self._logger.debug(message)
+        self._log(logging.DEBUG, message, args, kwargs)
 
-    def info(self, message: str):
+    def info(self, message, *args, **kwargs):
         """
         记录info级别日志
 
-        @param message 日志消息
+        @param message 日志消息（字符串、%格式模板或无参函数）
+        @param args %格式参数
         """
-        self._logger.info(message)
+        self._log(logging.INFO, message, args, kwargs)
 
-    def warning(self, message: str):
+    def warning(self, message, *args, **kwargs):
         """
         记录warning级别日志
 
-        @param message 日志消息
+        @param message 日志消息（字符串、%格式模板或无参函数）
+        @param args %格式参数
         """
-        self._logger.warning(message)
+        self._log(logging.WARNING, message, args, kwargs)
 
-    def error(self, message: str):
+    def error(self, message, *args, **kwargs):
         """
         记录error级别日志
 
-        @param message 日志消息
+        @param message 日志消息（字符串、%格式模板或无参函数）
+        @param args %格式参数
         """
-        self._logger.error(message)
+        self._log(logging.ERROR, message, args, kwargs)
 
-    def critical(self, message: str):
+    def critical(self, message, *args, **kwargs):
         """
         记录critical级别日志
 
-        @param message 日志消息
+        @param message 日志消息（字符串、%格式模板或无参函数）
+        @param args %格式参数
         """
-        self._logger.critical(message)
+        self._log(logging.CRITICAL, message, args, kwargs)
 
 # 提供便捷的日志获取方法
 def get_logger() -> logging.Logger:
@@ -133,4 +664,4 @@ def get_logger() -> logging.Logger:
 
     @return logging.Logger 日志器对象
     """
-    return logger_util.get_logger()
+    return LoggerUtil().get_logger()
@@ -0,0 +1,151 @@
+"""
+CPU性能分析结果输出模块
+
+把 cProfile 的分析结果保存为两种文件：
+- .prof：pstats格式，可以用 python -m pstats、snakeviz 等工具查看
+- .collapsed：折叠调用栈格式（每行 "a;b;c 耗时"），可以直接交给 flamegraph.pl、
+  speedscope、inferno 等工具生成火焰图
+
+cProfile 只记录"调用者 -> 被调用者"的调用关系和耗时，不记录完整的调用栈。
+生成折叠调用栈时从根函数出发沿调用关系展开：一个函数被多个调用者调用时，
+它下面的耗时按各调用者调用它的耗时比例分配。大部分情况下与真实调用栈一致，
+同一个函数在不同调用路径上的耗时差别很大时是近似值。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import pstats
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 折叠调用栈的最大深度，防止调用关系复杂时展开过深
+_MAX_DEPTH = 128
+# 文件名中不能使用的字符
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.\-\[\]]+")
+
+# pstats中函数的键：(文件名, 行号, 函数名)
+FuncKey = Tuple[str, int, str]
+
+
+def profile_name(nodeid: str) -> str:
+    """
+    把测试用例ID转换为可作为文件名的字符串
+
+    @param nodeid 测试用例ID
+    @return str 如 tests_test_a.py_TestA_test_b[1]
+    """
+    name = _UNSAFE_CHARS.sub("_", nodeid.replace("::", "__").replace("/", "_"))
+    return name[-150:]
+
+
+def func_label(func: FuncKey) -> str:
+    """
+    生成火焰图中显示的函数名
+
+    @param func pstats中函数的键
+    @return str 如 loads (json/__init__.py:299)，内置函数只显示名称
+    """
+    filename, lineno, name = func
+    if filename == "~":
+        return name.replace(";", ",")
+    return f"{name} ({Path(filename).name}:{lineno})".replace(";", ",")
+
+
+def collapse_stats(stats: pstats.Stats, roots: Optional[Iterable[FuncKey]] = None) -> Dict[str, int]:
+    """
+    把pstats结果转换为折叠调用栈
+
+    @param stats pstats结果
+    @param roots 作为栈底的函数，默认为没有调用者的函数
+    @return Dict[str, int] {"a;b;c": 自身耗时（微秒）}
+    """
+    raw = stats.stats
+    # callees[调用者] = [(被调用者, 这条调用关系上的累计耗时), ...]
+    callees: Dict[FuncKey, List[Tuple[FuncKey, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, edge_ct) in callers.items():
+            callees.setdefault(caller, []).append((func, edge_ct))
+
+    if roots is None:
+        roots = [func for func, value in raw.items() if not value[4]]
+    stacks: Dict[str, int] = {}
+
+    def walk(func: FuncKey, path: Tuple[str, ...], on_path: frozenset, share: float, depth: int):
+        # share：本路径占该函数全部耗时的比例
+        _, _, tt, ct, _ = raw[func]
+        path = path + (func_label(func),)
+        self_time = tt * share
+        if depth < _MAX_DEPTH:
+            for child, edge_ct in callees.get(func, ()):
+                if child in on_path or child not in raw:
+                    # 递归调用的耗时计入当前函数
+                    continue
+                child_ct = raw[child][3]
+                # 本路径上耗时不到1微秒的调用不再展开，避免调用关系复杂时展开的路径过多
+                if child_ct <= 0 or share * edge_ct < 1e-6:
+                    continue
+                walk(child, path, on_path | {child}, share * edge_ct / child_ct, depth + 1)
+        else:
+            self_time = ct * share
+        micros = int(round(self_time * 1e6))
+        if micros > 0:
+            key = ";".join(path)
+            stacks[key] = stacks.get(key, 0) + micros
+
+    for root in roots:
+        if root in raw:
+            walk(root, (), frozenset([root]), 1.0, 0)
+    return stacks
+
+
+def write_profile(profiler, base_path: Path, roots: Optional[Iterable[FuncKey]] = None) -> Tuple[Path, Path]:
+    """
+    保存分析结果
+
+    @param profiler 已停止的 cProfile.Profile
+    @param base_path 输出文件路径（不含后缀）
+    @param roots 折叠调用栈的栈底函数，默认为没有调用者的函数
+    @return (pstats文件路径, 折叠调用栈文件路径)
+    """
+    base_path = Path(base_path)
+    base_path.parent.mkdir(parents=True, exist_ok=True)
+    prof_path = base_path.with_name(base_path.name + ".prof")
+    collapsed_path = base_path.with_name(base_path.name + ".collapsed")
+
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(prof_path)
+    stacks = collapse_stats(stats, roots)
+    with open(collapsed_path, "w", encoding="utf-8") as f:
+        for stack, micros in sorted(stacks.items()):
+            f.write(f"{stack} {micros}\n")
+    return prof_path, collapsed_path
+
+
+def top_functions(stats: pstats.Stats, limit: int = 5,
+                  roots: Optional[Iterable[FuncKey]] = None) -> List[Tuple[str, float, float]]:
+    """
+    按自身耗时排序的最耗时函数
+
+    @param stats pstats结果
+    @param limit 返回的条数
+    @param roots 只统计从这些函数出发能调用到的函数，默认统计全部
+    @return List[(函数名, 自身耗时秒, 累计耗时秒)]
+    """
+    raw = stats.stats
+    funcs = set(raw)
+    if roots is not None:
+        callees: Dict[FuncKey, List[FuncKey]] = {}
+        for func, value in raw.items():
+            for caller in value[4]:
+                callees.setdefault(caller, []).append(func)
+        funcs = set()
+        pending = [root for root in roots if root in raw]
+        while pending:
+            func = pending.pop()
+            if func not in funcs:
+                funcs.add(func)
+                pending.extend(callees.get(func, ()))
+    rows = sorted(funcs, key=lambda func: raw[func][2], reverse=True)
+    return [(func_label(func), raw[func][2], raw[func][3]) for func in rows[:limit]]
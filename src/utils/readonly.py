@@ -0,0 +1,148 @@
+"""
+只读视图模块
+
+为字典和列表提供只读视图：不复制原始数据，嵌套的字典/列表在访问时才包装成只读视图，
+任何修改操作都会抛出 TypeError。
+
+多个测试共享同一份数据时使用只读视图，可以保证某个测试无法修改共享数据、
+影响其他测试。需要修改时调用 thaw() 得到一份独立的普通字典/列表。
+
+只读视图不是 dict/list 的子类，json.dumps、requests 的 json= 参数等要求真正的
+dict/list 的地方需要先转换：thaw(view)、view.to_dict() 或 view.to_list()。
+RequestUtil 发送请求前会自动转换 json/data/params 参数。
+
+使用示例：
+    users = freeze({"users": [{"name": "Alice"}]})
+    users["users"][0]["name"]          # 'Alice'
+    users["users"][0]["name"] = "Bob"  # TypeError
+    data = thaw(users)                 # 普通的dict，可以随意修改
+    json.dumps(users.to_dict())        # 序列化前转换为普通的dict
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+from collections.abc import Mapping, MutableSequence, Sequence
+from typing import Any
+
+
+def freeze(value: Any) -> Any:
+    """
+    把字典/列表包装为只读视图，其他类型原样返回
+
+    @param value 任意值
+    @return 只读视图或原值
+    """
+    if isinstance(value, (ReadOnlyDict, ReadOnlyList)):
+        return value
+    if isinstance(value, dict):
+        return ReadOnlyDict(value)
+    if isinstance(value, (list, tuple)):
+        return ReadOnlyList(value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """
+    把只读视图、写时复制副本（包括嵌套的）转换为普通的可修改对象
+
+    @param value 只读视图、写时复制副本或普通对象
+    @return 深拷贝后的普通dict/list，其他类型原样返回
+    """
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, ReadOnlyList, MutableSequence)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} 是只读视图，不能修改；需要修改请先调用 thaw() 复制一份")
+
+
+class ReadOnlyDict(Mapping):
+    """
+    字典的只读视图
+
+    读取嵌套的字典/列表时返回它们的只读视图。
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    def __getitem__(self, key):
+        return freeze(self._data[key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return f"ReadOnlyDict({self._data!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyDict):
+            other = other._data
+        return self._data == other
+
+    def to_dict(self) -> dict:
+        """
+        转换为普通的dict（深拷贝，嵌套的视图也会转换），用于 json.dumps、发送请求等
+
+        @return dict 可以修改的独立副本
+        """
+        return thaw(self)
+
+    __hash__ = None
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+class ReadOnlyList(Sequence):
+    """
+    列表的只读视图
+
+    读取嵌套的字典/列表时返回它们的只读视图，切片返回新的只读视图。
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: list):
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadOnlyList(self._data[index])
+        return freeze(self._data[index])
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"ReadOnlyList({self._data!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyList):
+            other = other._data
+        if isinstance(other, tuple):
+            other = list(other)
+        return list(self._data) == other
+
+    def to_list(self) -> list:
+        """
+        转换为普通的list（深拷贝，嵌套的视图也会转换），用于 json.dumps、发送请求等
+
+        @return list 可以修改的独立副本
+        """
+        return thaw(self)
+
+    __hash__ = None
+    __setitem__ = __delitem__ = __iadd__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
@@ -12,6 +12,13 @@ import requests
 from typing import Any, Dict, Optional, Union
 from dataclasses import dataclass
 
+from src.utils.readonly import ReadOnlyDict, ReadOnlyList, thaw
+from src.utils.shared_fixture import CowDict, CowList
+from src.utils.tracing import span
+
+# requests 不能直接发送的只读视图和写时复制副本
+_VIEW_TYPES = (ReadOnlyDict, ReadOnlyList, CowDict, CowList)
+
 
 @dataclass
 class ResponseWrapper:
@@ -104,13 +111,23 @@ class RequestUtil:
         """
         发起HTTP请求
 
+        json、data、params 参数本身是只读视图（如 test_data 中的数据）或写时复制副本时，
+        先转换为普通的dict/list，requests 只能序列化真正的dict/list；
+        其他参数（包括元组、键值对列表）原样传给 requests，不复制。
+
         @param method HTTP方法（GET、POST、PUT、DELETE等）
         @param url 请求URL
         @param kwargs 其他请求参数
         @return ResponseWrapper 响应包装对象
         """
+        for key in ("json", "data", "params"):
+            if isinstance(kwargs.get(key), _VIEW_TYPES):
+                kwargs[key] = thaw(kwargs[key])
         session = RequestUtil._get_session()
-        response = session.request(method, url, **kwargs)
+        # 开启 --timeline 时记录到时间线，否则不做任何事
+        with span(f"{method} {url}", "http", method=method, url=url) as trace:
+            response = session.request(method, url, **kwargs)
+            trace.set("status", response.status_code)
         return ResponseWrapper(response)
 
     @staticmethod
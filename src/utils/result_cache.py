@@ -0,0 +1,262 @@
+"""
+测试结果缓存模块
+
+给每个测试计算指纹，指纹不变且上次通过的测试不必再运行，见 src/plugins/result_cache_plugin.py。指纹包括：
+
+- 测试自身的代码：测试函数的语法树，以及所在模块（和所在类）中除其他测试之外的代码
+  （辅助函数、常量、模块内的fixture、导入语句等）；只改注释、空行，或改同一个文件中的其他测试都不影响指纹
+- 使用的fixture：定义在项目中的fixture，整个定义文件（如 conftest.py、插件）的内容；pytest自带的fixture只记名称
+- 导入的项目模块：测试模块和fixture定义文件导入的 src 模块，以及这些模块再导入的 src 模块（静态分析import语句）的内容
+- 数据文件：测试上次运行时读取的数据文件的内容哈希，和指纹一起保存，检查缓存时逐个比较
+- Python和pytest的版本
+
+第三方库的版本变化、环境变量等不在指纹中，需要时删除 Settings.RESULT_CACHE_FILE 重新运行。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import ast
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pytest
+
+# 缓存文件格式版本
+_FORMAT_VERSION = 1
+
+
+def _is_test(node: ast.stmt) -> bool:
+    """
+    是否为测试函数或测试类（与 pytest.ini 的 python_functions、python_classes 一致）
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return node.name.startswith("test")
+    return isinstance(node, ast.ClassDef) and node.name.startswith("Test")
+
+
+class Fingerprinter:
+    """
+    测试指纹计算，文件的哈希、语法树和导入关系在一次运行中只计算一次
+
+    @attr root 项目根目录
+    """
+
+    def __init__(self, root: Path):
+        """
+        @param root 项目根目录
+        """
+        self.root = Path(root).resolve()
+        self._salt = f"python={sys.version_info[:3]} pytest={pytest.__version__}"
+        self._digests: Dict[Path, Optional[str]] = {}
+        self._imports: Dict[Path, Tuple[Set[Path], Set[str]]] = {}
+        self._modules: Dict[Path, Tuple[str, Dict[str, str]]] = {}
+
+    def relative(self, path: Path) -> Optional[str]:
+        """
+        项目内文件的相对路径
+
+        @param path 文件路径
+        @return str 相对路径（/分隔），项目外的文件为None
+        """
+        try:
+            return Path(path).resolve().relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+
+    def digest(self, path: Path, refresh: bool = False) -> Optional[str]:
+        """
+        文件内容的哈希
+
+        @param path 文件路径
+        @param refresh 重新计算（文件在运行中可能被修改时），默认使用本次运行中已经算过的结果
+        @return str sha256，文件不存在时为None
+        """
+        path = Path(path)
+        if refresh or path not in self._digests:
+            try:
+                self._digests[path] = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                self._digests[path] = None
+        return self._digests[path]
+
+    def _resolve(self, name: str) -> Optional[Path]:
+        path = self.root.joinpath(*name.split(".")).with_suffix(".py")
+        return path if path.is_file() else None
+
+    def imports(self, path: Path) -> Tuple[Set[Path], Set[str]]:
+        """
+        文件中的import语句（包括函数内的延迟导入）
+
+        @param path Python文件
+        @return (导入的项目模块文件, 导入的第三方模块顶层名称)
+        """
+        path = Path(path)
+        if path not in self._imports:
+            local: Set[Path] = set()
+            external: Set[str] = set()
+            tree = ast.parse(path.read_bytes(), str(path))
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names = [alias.name for alias in node.names]
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    # from src.utils import impact 中 impact 可能是模块
+                    names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+                else:
+                    continue
+                for name in names:
+                    resolved = self._resolve(name)
+                    if resolved is not None:
+                        local.add(resolved)
+                    elif not (self.root / name.split(".")[0]).exists():
+                        external.add(name.split(".")[0])
+            self._imports[path] = (local, external)
+        return self._imports[path]
+
+    def closure(self, paths: Iterable[Path]) -> Tuple[Set[Path], Set[str]]:
+        """
+        文件直接和间接导入的项目模块
+
+        @param paths Python文件
+        @return (所有导入的项目模块文件（不含paths自身）, 所有导入的第三方模块顶层名称)
+        """
+        start = {Path(path) for path in paths}
+        seen: Set[Path] = set()
+        external: Set[str] = set()
+        pending = list(start)
+        while pending:
+            path = pending.pop()
+            local, names = self.imports(path)
+            external |= names
+            for module in local - seen - start:
+                seen.add(module)
+                pending.append(module)
+        return seen, external
+
+    def _module(self, path: Path) -> Tuple[str, Dict[str, str]]:
+        """
+        测试模块的语法树
+
+        @return (模块中除测试之外的代码, {测试的限定名: 测试的代码})
+        """
+        if path not in self._modules:
+            tests: Dict[str, str] = {}
+
+            def strip(body: List[ast.stmt], prefix: str) -> List[ast.stmt]:
+                kept = []
+                for node in body:
+                    if not _is_test(node):
+                        kept.append(node)
+                    elif isinstance(node, ast.ClassDef):
+                        # 测试类保留类属性、fixture、辅助方法，去掉测试方法
+                        members = strip(node.body, f"{prefix}{node.name}.")
+                        kept.append(ast.ClassDef(
+                            name=node.name, bases=node.bases, keywords=node.keywords,
+                            body=members or [ast.Pass()], decorator_list=node.decorator_list,
+                        ))
+                    else:
+                        tests[prefix + node.name] = ast.dump(node)
+                return kept
+
+            tree = ast.parse(Path(path).read_bytes(), str(path))
+            # ast.dump 默认不含行号，在前面加空行、改注释不影响结果
+            self._modules[path] = (ast.dump(ast.Module(body=strip(tree.body, ""), type_ignores=[])), tests)
+        return self._modules[path]
+
+    def fingerprint(self, test_file: Path, qualname: str, fixture_files: Iterable[Path],
+                    builtin_fixtures: Iterable[str]) -> Optional[Tuple[str, Set[str]]]:
+        """
+        计算测试的指纹
+
+        @param test_file 测试模块文件
+        @param qualname 测试函数的限定名，如 TestLogin.test_ok
+        @param fixture_files 测试使用的、定义在项目中的fixture所在的文件（不含测试模块自身）
+        @param builtin_fixtures 测试使用的、定义在项目外的fixture名称
+        @return (指纹, 测试模块直接和间接导入的第三方模块顶层名称)，找不到测试函数的代码时为None
+        """
+        test_file = Path(test_file).resolve()
+        context, tests = self._module(test_file)
+        if qualname not in tests:
+            return None
+        fixture_files = {Path(path).resolve() for path in fixture_files} - {test_file}
+        modules, _ = self.closure({test_file} | fixture_files)
+        _, external = self.closure({test_file})
+        hasher = hashlib.sha256()
+        for part in [self._salt, context, tests[qualname]]:
+            hasher.update(part.encode("utf-8") + b"\0")
+        for path in sorted(modules | fixture_files):
+            hasher.update(f"{self.relative(path)}={self.digest(path)}\0".encode("utf-8"))
+        for name in sorted(builtin_fixtures):
+            hasher.update(f"fixture:{name}\0".encode("utf-8"))
+        return hasher.hexdigest(), external
+
+
+class ResultCacheStore:
+    """
+    通过的测试的指纹
+
+    @attr path 保存文件路径
+    @attr entries {测试ID: {"fingerprint": 指纹, "data": {数据文件: 内容哈希}}}
+    """
+
+    def __init__(self, path: Path):
+        """
+        @param path 保存文件路径
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = {}
+        self.load()
+
+    def load(self):
+        """
+        读取缓存，文件不存在或格式不对时从空白开始
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == _FORMAT_VERSION:
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        """
+        保存缓存（先写临时文件再替换）
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": _FORMAT_VERSION, "entries": dict(sorted(self.entries.items()))},
+                      f, ensure_ascii=False, indent=0)
+        os.replace(tmp_path, self.path)
+
+    def is_valid(self, test: str, fingerprint: str, fingerprinter: Fingerprinter) -> bool:
+        """
+        测试上次是否以相同的指纹通过，且读取过的数据文件都没有变化
+
+        @param test 测试ID
+        @param fingerprint 当前的指纹
+        @param fingerprinter 用于计算数据文件的哈希
+        @return bool 可以使用缓存的结果
+        """
+        entry = self.entries.get(test)
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return False
+        return all(fingerprinter.digest(fingerprinter.root / path) == digest
+                   for path, digest in entry.get("data", {}).items())
+
+    def update(self, test: str, entry: Optional[dict]):
+        """
+        更新测试的缓存
+
+        @param test 测试ID
+        @param entry 新的记录，None表示删除（测试失败、跳过或不再可缓存）
+        """
+        if entry is None:
+            self.entries.pop(test, None)
+        else:
+            self.entries[test] = entry
@@ -0,0 +1,190 @@
+"""
+测试分片模块
+
+把测试分成n片，在多台机器上各运行一片（pytest --shard=i/n），最后合并结果：
+
+- 分片单位与 scheduling_plugin 的工作单元相同：测试类的所有方法始终在同一片中，
+  有先后依赖的测试（如 Test01CaseApi 中按顺序执行的方法）不会被拆开
+- 按历史耗时（Settings.DURATION_STORE）贪心分配：单元按估计耗时从长到短排序，
+  依次放进当前总耗时最少的一片，各片的耗时比按数量平均分更接近
+- 结果是确定的：相同的测试集合和相同的耗时历史，在任何机器上分出的结果都一样。
+  各机器需要使用同一份耗时历史文件（如从上一次合并的结果中下载），否则分片会不一致
+- 每片运行结束时在 Settings.SHARD_DIR 写一个清单（manifest），记录这一片的测试、结果和耗时，
+  合并时检查所有分片是否齐全、有没有测试被重复运行或漏掉
+
+命令行合并：
+    python -m src.utils.sharding merge reports/shards/*.json
+    python -m src.utils.sharding merge reports/shards/*.json --update-durations
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# 清单文件格式版本
+_FORMAT_VERSION = 1
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    解析分片参数
+
+    @param value 如 "2/4" 表示共4片中的第2片（从1开始）
+    @return (第几片, 总片数)
+    """
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"分片参数格式应为 i/n，如 1/4: {value}") from None
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"分片参数超出范围，应满足 1 <= i <= n: {value}")
+    return index, total
+
+
+def split_shards(units: Dict[str, List[str]], estimate: Callable[[str], float], total: int) -> List[List[str]]:
+    """
+    把工作单元贪心分配到各分片
+
+    @param units 工作单元 {单元ID: [测试ID, ...]}
+    @param estimate 测试的估计耗时（秒）
+    @param total 总片数
+    @return List[List[str]] 每片包含的单元ID
+    """
+    costs = {unit: sum(estimate(nodeid) for nodeid in nodeids) for unit, nodeids in units.items()}
+    # 耗时相同时按单元ID排序，保证结果确定
+    ordered = sorted(units, key=lambda unit: (-costs[unit], unit))
+    shards: List[List[str]] = [[] for _ in range(total)]
+    loads = [0.0] * total
+    for unit in ordered:
+        target = min(range(total), key=lambda index: (loads[index], len(shards[index]), index))
+        shards[target].append(unit)
+        loads[target] += costs[unit]
+    return shards
+
+
+def write_manifest(path: Path, manifest: dict):
+    """
+    保存分片清单
+
+    @param path 文件路径
+    @param manifest 清单内容
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(manifest, version=_FORMAT_VERSION), f, ensure_ascii=False, indent=2)
+
+
+def merge_manifests(paths: Sequence[Path]) -> dict:
+    """
+    合并各分片的清单
+
+    @param paths 清单文件
+    @return dict 合并结果：
+        total 总片数；missing_shards 缺少的分片；duplicated 在多片中都运行了的测试；
+        not_run 计划运行但没有结果的测试；results 所有测试的结果；durations 所有测试的耗时；
+        shards 每片的 (第几片, 测试数, 估计耗时, 实际耗时, 退出码)
+    """
+    manifests = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            manifests.append(json.load(f))
+    if not manifests:
+        raise ValueError("没有分片清单")
+    totals = {manifest["total"] for manifest in manifests}
+    if len(totals) != 1:
+        raise ValueError(f"清单来自不同的分片方式: n = {sorted(totals)}")
+    total = totals.pop()
+
+    seen: Dict[str, int] = {}
+    duplicated = set()
+    results: Dict[str, str] = {}
+    durations: Dict[str, float] = {}
+    not_run: List[str] = []
+    shards = []
+    for manifest in sorted(manifests, key=lambda item: item["shard"]):
+        for nodeid in manifest["tests"]:
+            if nodeid in seen and seen[nodeid] != manifest["shard"]:
+                duplicated.add(nodeid)
+            seen[nodeid] = manifest["shard"]
+            if nodeid not in manifest["results"]:
+                not_run.append(nodeid)
+        results.update(manifest["results"])
+        durations.update(manifest["durations"])
+        shards.append((
+            manifest["shard"], len(manifest["tests"]), manifest["estimated"],
+            manifest["elapsed"], manifest["exitstatus"],
+        ))
+    present = {manifest["shard"] for manifest in manifests}
+    return {
+        "total": total,
+        "missing_shards": [index for index in range(1, total + 1) if index not in present],
+        "duplicated": sorted(duplicated),
+        "not_run": not_run,
+        "results": results,
+        "durations": durations,
+        "shards": shards,
+    }
+
+
+# ========================================
+# 命令行
+# ========================================
+
+def main(argv: Optional[List[str]] = None):
+    """
+    命令行入口
+
+    @param argv 命令行参数
+    @return int 退出码：有分片缺失、测试失败、重复或漏跑时为1
+    """
+    from src.config.settings import Settings
+    settings = Settings()
+
+    parser = argparse.ArgumentParser(description="测试分片结果合并")
+    commands = parser.add_subparsers(dest="command", required=True)
+    merge = commands.add_parser("merge", help="合并各分片的清单")
+    merge.add_argument("manifests", nargs="+", type=Path, help="分片清单文件")
+    merge.add_argument("--update-durations", action="store_true", help="用各分片的耗时更新耗时历史")
+    merge.add_argument("--durations-file", type=Path, default=settings.DURATION_STORE, help="耗时历史文件")
+    args = parser.parse_args(argv)
+
+    merged = merge_manifests(args.manifests)
+    print(f"{'分片':>6} {'测试数':>6} {'估计耗时(s)':>12} {'实际耗时(s)':>12} {'退出码':>6}")
+    for index, count, estimated, elapsed, exitstatus in merged["shards"]:
+        print(f"{index:>4}/{merged['total']:<3} {count:>7} {estimated:>16.2f} {elapsed:>16.2f} {exitstatus:>8}")
+
+    outcomes: Dict[str, int] = {}
+    for outcome in merged["results"].values():
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    print("结果: " + ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items())))
+    failed = sorted(nodeid for nodeid, outcome in merged["results"].items() if outcome == "failed")
+    problems = [
+        ("缺少分片", [str(index) for index in merged["missing_shards"]]),
+        ("在多个分片中运行", merged["duplicated"]),
+        ("没有运行结果", merged["not_run"]),
+        ("失败", failed),
+    ]
+    for title, items in problems:
+        if items:
+            print(f"{title}（{len(items)}）:")
+            for item in items:
+                print(f"    {item}")
+
+    if args.update_durations:
+        from src.utils.duration_store import DurationStore
+        store = DurationStore(args.durations_file, settings.DURATION_EWMA_ALPHA)
+        for nodeid, duration in merged["durations"].items():
+            store.update(nodeid, duration, merged["results"].get(nodeid) == "failed")
+        store.save()
+        print(f"耗时历史已更新: {args.durations_file}")
+    return 1 if any(items for _, items in problems) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""
+共享fixture模块
+
+提供 shared_fixture 装饰器：fixture的值在更大的作用域（session/module/class）内只构建一次，
+每个测试拿到的是它的写时复制副本或只读视图，测试之间不会互相泄漏修改。
+
+    @shared_fixture(scope="session")
+    def sample_user():
+        return {"id": 1, "name": "Test User"}
+
+    def test_a(sample_user):
+        sample_user["name"] = "Changed"     # 只修改本测试的副本
+
+    def test_b(sample_user):
+        assert sample_user["name"] == "Test User"
+
+两种模式：
+- cow（默认）：写时复制。顶层做一次浅拷贝（只复制引用），嵌套的值在第一次被读取时
+  才变为本测试私有的（字典/列表同样包装为写时复制副本，其他可变对象深拷贝），
+  没有读取到的部分不会复制。副本实现了完整的 dict/list 接口，但不是它们的子类，
+  json.dumps 等需要真正dict/list的地方先调用 to_dict()/to_list()（RequestUtil会自动转换）
+- frozen：只读视图（见readonly.py），任何修改都会抛出 TypeError，连浅拷贝也没有
+
+注意：被装饰函数依赖的其他fixture只在构建时解析一次，应当使用不小于 scope 的作用域。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import copy
+import inspect
+from collections.abc import Mapping, MutableMapping, MutableSequence
+from typing import Any, Callable, Optional
+
+import pytest
+
+from src.utils.readonly import freeze, thaw
+
+# 作用域对应的pytest节点类型，构建好的值缓存在该节点上
+_SCOPE_NODES = {
+    "class": pytest.Class,
+    "module": pytest.Module,
+}
+
+# 节点上保存共享值的stash键：{被装饰函数: 值}
+_SHARED_VALUES = pytest.StashKey[dict]()
+
+
+# 不可变类型，写时复制副本直接返回原值
+_IMMUTABLE = (str, bytes, int, float, complex, bool, type(None), frozenset, range)
+
+
+def cow(value: Any) -> Any:
+    """
+    为字典/列表创建写时复制副本，其他类型原样返回
+
+    @param value 共享的原始值
+    @return CowDict / CowList 或原值
+    """
+    if isinstance(value, (dict, CowDict)):
+        return CowDict(value)
+    if isinstance(value, (list, CowList)):
+        return CowList(value)
+    return value
+
+
+def _private(value: Any) -> Any:
+    """
+    把共享的嵌套值变为当前副本私有：字典/列表包装为写时复制副本，
+    不可变值原样返回，其他可变对象（集合、自定义对象等）深拷贝
+
+    @param value 副本中还与原始数据共享的值
+    @return 私有的值
+    """
+    if isinstance(value, (CowDict, CowList)):
+        # 已经是某个副本私有的（如 copy() 的结果），与普通dict/list的浅拷贝语义一致
+        return value
+    if type(value) in (dict, list):
+        return cow(value)
+    if isinstance(value, _IMMUTABLE):
+        return value
+    return copy.deepcopy(value)
+
+
+class CowDict(MutableMapping):
+    """
+    字典的写时复制副本
+
+    创建时浅拷贝顶层（只复制引用）；任何方式读取到嵌套的值时（下标、get、values()、items()、
+    遍历、dict(c)/{**c} 解包等）先把它变为本副本私有的，修改不会影响原始数据。
+
+    不是dict的子类，json.dumps、requests 等需要真正dict的地方先调用 to_dict()。
+    """
+
+    __slots__ = ("_data", "_shared")
+
+    def __init__(self, source=None):
+        if isinstance(source, CowDict):
+            source = {key: source[key] for key in source}
+        self._data = dict(source or {})
+        # 还与原始数据共享、没有变为私有的键
+        self._shared = set(self._data)
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        if key in self._shared:
+            value = self._data[key] = _private(value)
+            self._shared.discard(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._shared.discard(key)
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self._shared.discard(key)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __reversed__(self):
+        return reversed(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __eq__(self, other):
+        # 只读比较，不需要变为私有
+        if isinstance(other, CowDict):
+            other = other._data
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return self._data == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._data)
+
+    def __or__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        result = self.copy()
+        result.update(other)
+        return result
+
+    def __ror__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        result = CowDict(other)
+        result.update(self)
+        return result
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def popitem(self):
+        # 与dict一致，弹出最后插入的键
+        if not self._data:
+            raise KeyError("popitem(): dictionary is empty")
+        key = next(reversed(self._data))
+        return key, self.pop(key)
+
+    def copy(self) -> 'CowDict':
+        """
+        浅拷贝（与dict.copy()一致，嵌套的值在两个副本之间共享，但不会与原始数据共享）
+
+        @return CowDict 新副本
+        """
+        return CowDict(self)
+
+    __copy__ = copy
+
+    def to_dict(self) -> dict:
+        """
+        转换为普通的dict（深拷贝），用于 json.dumps、发送请求等
+
+        @return dict 独立的普通字典
+        """
+        return thaw(self)
+
+
+class CowList(MutableSequence):
+    """
+    列表的写时复制副本
+
+    创建时浅拷贝；任何方式读取到嵌套的值时（下标、切片、遍历、reversed()、+、* 等）
+    先把它变为本副本私有的，修改不会影响原始数据。
+
+    不是list的子类，json.dumps、requests 等需要真正list的地方先调用 to_list()。
+    """
+
+    __slots__ = ("_data", "_shared")
+
+    def __init__(self, source=None):
+        if isinstance(source, CowList):
+            source = list(source)
+        self._data = list(source or [])
+        # 与_data一一对应，还与原始数据共享的位置为True
+        self._shared = [True] * len(self._data)
+
+    def _own(self, index: int):
+        """把某个位置的值变为私有，返回这个值"""
+        value = self._data[index]
+        if self._shared[index]:
+            value = self._data[index] = _private(value)
+            self._shared[index] = False
+        return value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._own(i) for i in range(*index.indices(len(self._data)))]
+        return self._own(index)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            # 切片赋值会移动元素，先把所有元素变为私有，之后不再需要记录
+            for i in range(len(self._data)):
+                self._own(i)
+            self._data[index] = value
+            self._shared = [False] * len(self._data)
+        else:
+            self._data[index] = value
+            self._shared[index] = False
+
+    def __delitem__(self, index):
+        del self._data[index]
+        del self._shared[index]
+
+    def __len__(self):
+        return len(self._data)
+
+    def insert(self, index, value):
+        self._data.insert(index, value)
+        self._shared.insert(index, False)
+
+    def __iter__(self):
+        for index in range(len(self._data)):
+            yield self._own(index)
+
+    def __reversed__(self):
+        for index in range(len(self._data) - 1, -1, -1):
+            yield self._own(index)
+
+    def __contains__(self, value):
+        return value in self._data
+
+    def index(self, value, start=0, stop=None):
+        return self._data.index(value, start, len(self._data) if stop is None else stop)
+
+    def count(self, value):
+        return self._data.count(value)
+
+    def __eq__(self, other):
+        # 只读比较，不需要变为私有
+        if isinstance(other, CowList):
+            other = other._data
+        if not isinstance(other, list):
+            return NotImplemented
+        return self._data == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self._data)
+
+    def __add__(self, other):
+        if not isinstance(other, (list, CowList)):
+            return NotImplemented
+        return CowList(self[:] + list(other))
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return CowList(other + self[:])
+
+    def __mul__(self, count):
+        return CowList(self[:] * count)
+
+    __rmul__ = __mul__
+
+    def __imul__(self, count):
+        self[:] = self[:] * count
+        return self
+
+    def sort(self, *, key=None, reverse=False):
+        self[:] = sorted(self, key=key, reverse=reverse)
+
+    def copy(self) -> 'CowList':
+        """
+        浅拷贝（与list.copy()一致，嵌套的值在两个副本之间共享，但不会与原始数据共享）
+
+        @return CowList 新副本
+        """
+        return CowList(self)
+
+    __copy__ = copy
+
+    def to_list(self) -> list:
+        """
+        转换为普通的list（深拷贝），用于 json.dumps、发送请求等
+
+        @return list 独立的普通列表
+        """
+        return thaw(self)
+
+
+def _scope_node(request, scope: str):
+    """
+    获取作用域对应的pytest节点
+
+    @param request pytest请求对象
+    @param scope 作用域
+    @return 节点
+    """
+    if scope == "session":
+        return request.session
+    node = request.node.getparent(_SCOPE_NODES[scope])
+    if node is None:
+        raise ValueError(f"{request.node.nodeid}: 不在 {scope} 作用域内，无法使用 shared_fixture(scope=\"{scope}\")")
+    return node
+
+
+def _build(func: Callable, instance, request, node) -> Any:
+    """
+    解析依赖的fixture并调用被装饰函数构建共享值
+
+    生成器函数在 yield 处取值，yield 之后的清理代码在作用域结束时执行。
+
+    @param func 被装饰函数
+    @param instance 定义在测试类中时为测试类实例
+    @param request pytest请求对象
+    @param node 作用域节点
+    @return 共享值
+    """
+    params = list(inspect.signature(func).parameters)
+    if instance is not None:
+        params = params[1:]
+    kwargs = {name: request.getfixturevalue(name) for name in params}
+    args = () if instance is None else (instance,)
+    if not inspect.isgeneratorfunction(func):
+        return func(*args, **kwargs)
+
+    generator = func(*args, **kwargs)
+    value = next(generator)
+
+    def finish():
+        try:
+            next(generator)
+        except StopIteration:
+            pass
+        else:
+            raise ValueError(f"{func.__name__} 只能yield一次")
+
+    node.addfinalizer(finish)
+    return value
+
+
+def shared_fixture(func: Optional[Callable] = None, *, scope: str = "session", mode: str = "cow",
+                   name: Optional[str] = None, autouse: bool = False):
+    """
+    共享fixture装饰器
+
+    可以直接使用 @shared_fixture，也可以带参数 @shared_fixture(scope="class", mode="frozen")。
+
+    @param func 构建fixture值的函数，可以是普通函数或生成器函数，可以定义在测试类中
+    @param scope 值的共享范围：session、module、class
+    @param mode 每个测试拿到的形式：cow（写时复制副本）、frozen（只读视图）
+    @param name fixture名称，默认为函数名
+    @param autouse 是否自动使用
+    @return pytest fixture
+    """
+    if scope not in ("session", *_SCOPE_NODES):
+        raise ValueError(f"shared_fixture 不支持的作用域: {scope}")
+    if mode not in ("cow", "frozen"):
+        raise ValueError(f"shared_fixture 不支持的模式: {mode}，支持 cow、frozen")
+    if func is None:
+        return lambda f: shared_fixture(f, scope=scope, mode=mode, name=name, autouse=autouse)
+
+    wrap = freeze if mode == "frozen" else cow
+
+    def get(instance, request):
+        node = _scope_node(request, scope)
+        values = node.stash.setdefault(_SHARED_VALUES, {})
+        if func not in values:
+            values[func] = _build(func, instance, request, node)
+        return wrap(values[func])
+
+    # pytest按函数签名解析fixture依赖，这里只依赖request，被装饰函数的依赖在构建时才解析
+    params = list(inspect.signature(func).parameters)
+    if params and params[0] == "self":
+        def fixture(self, request):
+            return get(self, request)
+    else:
+        def fixture(request):
+            return get(None, request)
+
+    fixture.__name__ = func.__name__
+    fixture.__qualname__ = func.__qualname__
+    fixture.__doc__ = func.__doc__
+    fixture.__module__ = func.__module__
+    return pytest.fixture(fixture, name=name or func.__name__, autouse=autouse)
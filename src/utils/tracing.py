@@ -0,0 +1,255 @@
+"""
+时间线跟踪模块
+
+记录一段代码的开始时间和耗时（span），输出为 Chrome Trace Event 格式的JSON，
+可以在 chrome://tracing 或 https://ui.perfetto.dev 中按时间线查看。
+
+    from src.utils.tracing import span
+
+    with span("GET /users", "http", method="GET") as s:
+        response = session.get(url)
+        s.set("status", response.status_code)
+
+- 没有开启跟踪时（默认），span() 返回一个什么都不做的对象，几乎没有开销，
+  业务代码可以直接埋点
+- 由 src/plugins/timeline_plugin.py（--timeline）在测试开始前调用 enable() 开启
+- 时间戳使用墙上时间（微秒），多个进程（xdist worker）的时间线可以合并到一起对齐显示；
+  每个进程在合并后的文件中是一个单独的轨道（pid）
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# 当前进程的跟踪器，None表示没有开启
+_tracer: Optional["Tracer"] = None
+
+
+class Tracer:
+    """
+    跟踪事件收集器
+
+    @attr pid 合并后时间线中的进程编号（轨道）
+    @attr process_name 轨道名称，如 main、gw0
+    @attr events 完整事件（ph=X）列表
+    """
+
+    def __init__(self, pid: int = 0, process_name: str = "main"):
+        """
+        @param pid 轨道编号
+        @param process_name 轨道名称
+        """
+        self.pid = pid
+        self.process_name = process_name
+        self.events: List[dict] = []
+        self._threads: Dict[int, int] = {}
+        # perf_counter_ns 精度高但起点不确定，记下与墙上时间的对应关系用于换算
+        self._wall_origin_ns = time.time_ns()
+        self._perf_origin_ns = time.perf_counter_ns()
+
+    def now(self) -> int:
+        """
+        当前时间（perf_counter_ns）
+
+        @return int 纳秒
+        """
+        return time.perf_counter_ns()
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        tid = self._threads.get(ident)
+        if tid is None:
+            tid = self._threads.setdefault(ident, len(self._threads))
+        return tid
+
+    def add(self, name: str, cat: str, start_ns: int, end_ns: int, args: Optional[dict] = None):
+        """
+        添加一个完整事件
+
+        @param name 事件名称
+        @param cat 分类，如 test、fixture、http
+        @param start_ns 开始时间（perf_counter_ns）
+        @param end_ns 结束时间（perf_counter_ns）
+        @param args 附加信息，在查看工具中点击事件时显示
+        """
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (self._wall_origin_ns + start_ns - self._perf_origin_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": self.pid,
+            "tid": self._tid(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def metadata(self) -> List[dict]:
+        """
+        轨道名称等元数据事件
+
+        @return List[dict] 元数据事件
+        """
+        events = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": self.process_name}},
+            {"name": "process_sort_index", "ph": "M", "pid": self.pid, "tid": 0, "args": {"sort_index": self.pid}},
+        ]
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, tid in self._threads.items():
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                "args": {"name": names.get(ident, f"thread-{tid}")},
+            })
+        return events
+
+    def dump(self, path: Path) -> Path:
+        """
+        保存为 Chrome Trace Event JSON
+
+        @param path 文件路径
+        @return Path 文件路径
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_trace(path, self.metadata() + self.events)
+        return path
+
+
+class Span:
+    """
+    一段被跟踪的代码，作为上下文管理器使用
+    """
+
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+
+    def set(self, key: str, value):
+        """
+        添加附加信息
+
+        @param key 名称
+        @param value 值，需要能序列化为JSON
+        """
+        self.args[key] = value
+
+    def __enter__(self):
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add(self.name, self.cat, self.start, self.tracer.now(), self.args)
+
+
+class _NullSpan:
+    """
+    没有开启跟踪时使用的span，什么都不做
+    """
+
+    __slots__ = ()
+
+    def set(self, key: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, cat: str = "app", **args):
+    """
+    跟踪一段代码
+
+    @param name 事件名称
+    @param cat 分类
+    @param args 附加信息
+    @return 上下文管理器，with块中可以调用 set() 添加附加信息
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, cat, args)
+
+
+def enable(pid: int = 0, process_name: str = "main") -> Tracer:
+    """
+    开启当前进程的跟踪
+
+    @param pid 轨道编号
+    @param process_name 轨道名称
+    @return Tracer 跟踪器
+    """
+    global _tracer
+    _tracer = Tracer(pid, process_name)
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """
+    关闭当前进程的跟踪
+
+    @return Tracer 关闭前的跟踪器，没有开启时为None
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    """
+    获取当前进程的跟踪器
+
+    @return Tracer 没有开启时为None
+    """
+    return _tracer
+
+
+def write_trace(path: Path, events: List[dict]):
+    """
+    写入 Chrome Trace Event JSON（先写临时文件再替换，避免留下写了一半的文件）
+
+    @param path 文件路径
+    @param events 事件列表
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def merge_traces(paths: Iterable[Path], output: Path) -> int:
+    """
+    合并多个进程的时间线文件
+
+    @param paths 各进程的时间线文件
+    @param output 合并后的文件
+    @return int 合并后的事件数（不含元数据）
+    """
+    events = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            events.extend(json.load(f)["traceEvents"])
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    write_trace(output, events)
+    return sum(1 for event in events if event["ph"] != "M")
@@ -0,0 +1,420 @@
+"""
+动态分配（工作窃取）模块
+
+协调者（pytest --coordinator）收集测试后把工作单元放进共享队列，worker（pytest --worker）通过TCP连接领取执行，
+见 src/plugins/distributed_plugin.py：
+
+- 工作单元与 scheduling_plugin 相同：测试类、有序分组整体是一个单元，始终在同一个worker上按顺序运行
+- 共享队列按历史耗时最长优先排列（失败的测试最先）；worker每次从队首预留一批单元，
+  剩余的单元少时每批自动变小，最后阶段每次只领一个
+- 工作窃取：共享队列空了之后，空闲的worker从预留最多的worker那里拿走一半还没开始的单元（从队尾拿，耗时最短的那些）。
+  预留记录在协调者上，worker每个单元开始前都向协调者领取，被拿走的单元不会被执行两次
+- worker断开时，它预留的单元放回共享队列，正在执行的单元中没有运行的测试重新排队
+- 没有可领取的单元、但别的worker还有没执行完的单元时，空闲的worker等待并定时再领取，
+  那些worker断开时重新排队的测试仍有worker执行
+
+协议：每条消息是一行JSON（UTF-8）。
+    worker -> 协调者: {"op": "hello", "host", "pid"}      协调者回复 {"op": "welcome", "worker", "tests"}
+    worker -> 协调者: {"op": "next"}                       协调者回复 {"op": "unit", "unit", "tests"}、{"op": "wait"} 或 {"op": "done"}
+    worker -> 协调者: {"op": "report", "report"}           测试报告（pytest_report_to_serializable 的结果），不回复
+    worker -> 协调者: {"op": "error", "message"}           worker无法执行（如收集结果不一致），不回复
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """
+    解析监听或连接地址
+
+    @param value 如 "127.0.0.1:8765"，端口为0时由系统分配
+    @return (主机, 端口)
+    """
+    host, _, port = value.rpartition(":")
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"地址格式应为 HOST:PORT，如 127.0.0.1:8765: {value}") from None
+    if not host or not 0 <= port <= 65535:
+        raise ValueError(f"地址格式应为 HOST:PORT，如 127.0.0.1:8765: {value}")
+    return host, port
+
+
+def send_message(wfile, message: dict):
+    """
+    发送一条消息
+
+    @param wfile socket的写文件对象（二进制）
+    @param message 消息内容，不能序列化的值转换为字符串
+    """
+    wfile.write(json.dumps(message, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+    wfile.flush()
+
+
+def read_message(rfile) -> Optional[dict]:
+    """
+    读取一条消息
+
+    @param rfile socket的读文件对象（二进制）
+    @return dict 消息内容，连接已关闭时为None
+    """
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class WorkQueue:
+    """
+    共享工作队列，所有方法线程安全
+
+    @attr tests 每个单元的测试 {单元ID: [测试ID, ...]}
+    @attr shared 还没有被预留的单元
+    @attr reserved 各worker预留了但还没开始的单元
+    @attr handed 各worker已经开始的单元
+    @attr finished 已经有结果的测试
+    @attr steals 各worker窃取的单元数
+    """
+
+    def __init__(self, units: Dict[str, List[str]], order: Sequence[str], batch_size: int = 4):
+        """
+        @param units 工作单元 {单元ID: [测试ID, ...]}
+        @param order 单元的分配顺序（优先级从高到低）
+        @param batch_size 每次预留的单元数上限
+        """
+        self.tests = {unit: list(nodeids) for unit, nodeids in units.items()}
+        self.shared: Deque[str] = deque(order)
+        self.batch_size = max(1, batch_size)
+        self.reserved: Dict[str, Deque[str]] = {}
+        self.handed: Dict[str, List[str]] = {}
+        self.finished: Set[str] = set()
+        self.steals: Dict[str, int] = {}
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def add_worker(self, worker: str):
+        """
+        登记worker
+
+        @param worker worker名称
+        """
+        with self._lock:
+            self.reserved[worker] = deque()
+            self.handed[worker] = []
+            self.steals[worker] = 0
+
+    def next_unit(self, worker: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        worker领取下一个单元：先取自己预留的，没有时从共享队列预留一批，共享队列也空了就从别的worker那里窃取
+
+        @param worker worker名称
+        @return (单元ID, 测试ID列表)，没有可领取的单元时为None
+        """
+        with self._lock:
+            own = self.reserved.get(worker)
+            if own is None:
+                return None
+            if not own:
+                self._reserve(own)
+            if not own:
+                self._steal(worker, own)
+            if not own:
+                return None
+            unit = own.popleft()
+            self.handed[worker].append(unit)
+            return unit, self.tests[unit]
+
+    def should_wait(self, worker: str) -> bool:
+        """
+        worker没有领到单元时是否要等待：还有可领取的单元，或者别的worker还有没执行完的单元
+        （那个worker断开时，没有运行的测试会重新排队）
+
+        @param worker worker名称
+        @return bool 需要稍后再领取时为True，所有测试都已经有结果时为False
+        """
+        with self._lock:
+            if self._stopped:
+                return False
+            if self.shared or any(self.reserved.values()):
+                return True
+            return any(
+                any(nodeid not in self.finished for nodeid in self.tests[unit])
+                for name, units in self.handed.items() if name != worker
+                for unit in units
+            )
+
+    def finish(self, nodeid: str):
+        """
+        记录测试已经有结果
+
+        @param nodeid 测试ID
+        """
+        with self._lock:
+            self.finished.add(nodeid)
+
+    def _reserve(self, own: Deque[str]):
+        """
+        从共享队列队首预留一批单元，剩余单元不够每个worker两批时减小批量
+        """
+        size = min(self.batch_size, len(self.shared) // (2 * len(self.reserved)))
+        for _ in range(max(1, size)):
+            if not self.shared:
+                break
+            own.append(self.shared.popleft())
+
+    def _steal(self, worker: str, own: Deque[str]):
+        """
+        从预留最多的worker的队尾拿走一半（向上取整）
+        """
+        victim = max((name for name in self.reserved if name != worker),
+                     key=lambda name: len(self.reserved[name]), default=None)
+        if victim is None or not self.reserved[victim]:
+            return
+        taken = [self.reserved[victim].pop() for _ in range((len(self.reserved[victim]) + 1) // 2)]
+        own.extend(reversed(taken))
+        self.steals[worker] += len(taken)
+
+    def remove_worker(self, worker: str, crashed: Optional[str] = None) -> List[str]:
+        """
+        worker断开：预留的单元和已经开始的单元中没有运行的测试放回共享队列队首
+
+        放回与移除在同一次加锁中完成，等待中的worker不会在两者之间看到"所有单元都已执行完"。
+
+        @param worker worker名称
+        @param crashed 断开时正在执行的测试，记为已有结果，不再重新运行
+        @return List[str] 重新排队的已开始单元
+        """
+        with self._lock:
+            if crashed is not None:
+                self.finished.add(crashed)
+            own = self.reserved.pop(worker, deque())
+            requeued = []
+            for unit in self.handed.pop(worker, []):
+                rest = [nodeid for nodeid in self.tests[unit] if nodeid not in self.finished]
+                if rest:
+                    self.tests[unit] = rest
+                    requeued.append(unit)
+            if not self._stopped:
+                self.shared.extendleft(reversed(requeued + list(own)))
+            return requeued
+
+    def requeue(self, unit: str, nodeids: List[str]):
+        """
+        把单元中没有运行的测试重新放回共享队列队首
+
+        @param unit 单元ID
+        @param nodeids 没有运行的测试
+        """
+        with self._lock:
+            self.tests[unit] = list(nodeids)
+            self.shared.appendleft(unit)
+
+    def stop(self):
+        """
+        不再分配新的单元（如 -x 遇到失败），已经开始的单元继续执行完
+        """
+        with self._lock:
+            self._stopped = True
+            self.shared.clear()
+            for own in self.reserved.values():
+                own.clear()
+
+
+# ========================================
+# 协调者和worker的连接
+# ========================================
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """
+    协调者上与一个worker的连接，每个连接一个线程
+
+    报告和worker状态放进 server.events，由主线程调用pytest的钩子（钩子只在主线程调用）。
+    """
+
+    def handle(self):
+        server = self.server
+        worker = server.register_worker()
+        error = None
+        try:
+            hello = read_message(self.rfile)
+            if hello is None or hello.get("op") != "hello":
+                return
+            server.events.put(("up", worker, {"host": hello.get("host"), "pid": hello.get("pid")}))
+            send_message(self.wfile, {"op": "welcome", "worker": worker, "tests": server.all_tests})
+            while True:
+                message = read_message(self.rfile)
+                if message is None:
+                    break
+                op = message.get("op")
+                if op == "next":
+                    unit = server.work.next_unit(worker)
+                    if unit is not None:
+                        send_message(self.wfile, {"op": "unit", "unit": unit[0], "tests": unit[1]})
+                    elif server.work.should_wait(worker):
+                        send_message(self.wfile, {"op": "wait"})
+                    else:
+                        send_message(self.wfile, {"op": "done"})
+                elif op == "report":
+                    # 同一个连接的消息按顺序处理，worker再次领取前，它前面的测试都已经记为有结果
+                    report = message["report"]
+                    if report.get("when") == "teardown":
+                        server.work.finish(report["nodeid"])
+                    server.events.put(("report", worker, report))
+                elif op == "error":
+                    server.events.put(("error", worker, message.get("message")))
+        except (OSError, ValueError) as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            server.events.put(("down", worker, error))
+            server.unregister_worker()
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    """
+    协调者的TCP服务
+
+    @attr work 共享工作队列
+    @attr all_tests 协调者收集到的所有测试，worker用来检查收集结果是否一致
+    @attr events worker发来的事件 (类型, worker名称, 内容)：up、report、error、down
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], work: WorkQueue, all_tests: List[str]):
+        """
+        @param address 监听地址
+        @param work 共享工作队列
+        @param all_tests 所有测试ID
+        """
+        super().__init__(address, _WorkerHandler)
+        self.work = work
+        self.all_tests = all_tests
+        self.events: "queue.Queue[tuple]" = queue.Queue()
+        self._count = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def register_worker(self) -> str:
+        """
+        为新连接的worker分配名称
+
+        @return str 如 w0、w1
+        """
+        with self._lock:
+            worker = f"w{self._count}"
+            self._count += 1
+            self._active += 1
+        self.work.add_worker(worker)
+        return worker
+
+    def unregister_worker(self):
+        with self._lock:
+            self._active -= 1
+
+    @property
+    def active_workers(self) -> int:
+        """
+        当前连接的worker数
+        """
+        return self._active
+
+
+class WorkerClient:
+    """
+    worker到协调者的连接
+    """
+
+    def __init__(self, sock: socket.socket):
+        """
+        @param sock 已连接的socket
+        """
+        self.sock = sock
+        self.rfile = sock.makefile("rb")
+        self.wfile = sock.makefile("wb")
+
+    @classmethod
+    def connect(cls, address: Tuple[str, int], timeout: float = 30.0) -> "WorkerClient":
+        """
+        连接协调者，协调者还没开始监听时每0.2秒重试一次
+
+        @param address 协调者地址
+        @param timeout 最长等待时间（秒）
+        @return WorkerClient 连接
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return cls(socket.create_connection(address, timeout=timeout))
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.2)
+
+    def _request(self, message: dict) -> dict:
+        send_message(self.wfile, message)
+        reply = read_message(self.rfile)
+        if reply is None:
+            raise ConnectionError("协调者已关闭连接")
+        return reply
+
+    def hello(self, host: str, pid: int) -> dict:
+        """
+        登记到协调者
+
+        @param host 主机名
+        @param pid 进程号
+        @return dict {"worker": 分配的名称, "tests": 协调者收集到的测试}
+        """
+        self.sock.settimeout(None)
+        return self._request({"op": "hello", "host": host, "pid": pid})
+
+    def next_unit(self, wait: bool = True, interval: float = 0.5) -> Optional[List[str]]:
+        """
+        领取下一个单元
+
+        @param wait 协调者要求等待时是否每隔interval秒再领取一次，为False时直接返回None
+        @param interval 等待时再次领取的间隔（秒）
+        @return List[str] 单元中的测试ID，没有可领取的单元时为None
+        """
+        reply = self._request({"op": "next"})
+        while wait and reply["op"] == "wait":
+            time.sleep(interval)
+            reply = self._request({"op": "next"})
+        return reply["tests"] if reply["op"] == "unit" else None
+
+    def report(self, data: dict):
+        """
+        发送测试报告
+
+        @param data pytest_report_to_serializable 的结果
+        """
+        send_message(self.wfile, {"op": "report", "report": data})
+
+    def error(self, message: str):
+        """
+        报告worker无法执行的原因
+
+        @param message 原因
+        """
+        send_message(self.wfile, {"op": "error", "message": message})
+
+    def close(self):
+        """
+        关闭连接
+        """
+        for closing in (self.wfile, self.rfile, self.sock):
+            try:
+                closing.close()
+            except OSError:
+                pass
@@ -0,0 +1,128 @@
+"""
+基准测试示例
+
+本文件演示项目插件提供的benchmark fixture。
+
+为什么不用 time.time() 测一次？
+- time.time() 是系统时间，精度低，还可能被系统时间调整影响
+- 只测一次的结果受缓存、GC、系统调度影响很大，噪声比要发现的性能退化还大
+
+benchmark fixture 的做法：
+1. 使用 perf_counter_ns 计时
+2. 预热后自动校准：每轮调用多次，再重复多轮
+3. 报告 min、median、IQR（四分位距）和离群轮数
+   - min 最接近代码本身的耗时
+   - median 和 IQR 反映典型耗时和波动
+
+运行 pytest 后，终端最后的 benchmark 部分会汇总所有基准测试的结果。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import json
+
+import pytest
+
+
+class TestBenchmarkBasic:
+    """
+    benchmark基础用法
+
+    为了让示例运行得快，这里用benchmark标记缩短了计时时长。
+    """
+
+    @pytest.mark.benchmark(max_time=0.05, warmup_time=0)
+    def test_call_function(self, benchmark):
+        """
+        测试函数方式调用
+
+        benchmark(func, *args) 返回func第一次调用的返回值，可以继续做断言。
+        """
+        result = benchmark(json.loads, '{"name": "Alice", "tags": ["a", "b"]}')
+
+        assert result["name"] == "Alice"
+        # --benchmark-disable 时只调用一次，没有统计结果
+        if benchmark.disabled:
+            return
+        assert benchmark.stats.rounds >= 5
+        assert benchmark.stats.min <= benchmark.stats.median <= benchmark.stats.max
+
+    def test_pedantic(self, benchmark):
+        """
+        测试指定轮数和每轮调用次数
+
+        被测函数很慢（如接口请求）时，用pedantic固定调用次数。
+        """
+        result = benchmark.pedantic(sorted, args=([3, 1, 2],), rounds=3, iterations=10)
+
+        assert result == [1, 2, 3]
+        if benchmark.disabled:
+            return
+        assert benchmark.stats.rounds == 3
+        assert benchmark.stats.iterations == 10
+
+    def test_with_block(self, benchmark):
+        """
+        测试with块用法
+
+        与timer fixture的用法相同，每个with块记为一轮。
+        """
+        for _ in range(3):
+            with benchmark:
+                sum(range(1000))
+
+        assert benchmark.elapsed > 0
+        assert benchmark.stats.rounds == 3
+
+    def test_timer_is_plain(self, timer):
+        """
+        测试timer仍然是简单的计时器，不会出现在benchmark汇总中
+        """
+        with timer:
+            sum(range(1000))
+
+        assert timer.elapsed >= 0
+        assert not hasattr(timer, "stats")
+
+
+class TestBenchmarkCompare:
+    """
+    基准测试结果对比
+
+    运行 pytest --benchmark-save 保存结果，之后 pytest --benchmark-compare 与它对比，
+    中位数变慢超过阈值且 Mann-Whitney U 检验显著时判定为性能退化，运行失败。
+    这里直接调用对比函数演示判定规则。
+    """
+
+    @staticmethod
+    def _result(name, data):
+        from src.utils.benchmark import compute_stats
+        return compute_stats(name, data, 1).as_dict()
+
+    def test_regression_detected(self):
+        """
+        测试明显且稳定的变慢判定为退化
+        """
+        from src.utils.benchmark_store import compare_runs
+
+        baseline = [self._result("t", [1.00 + i * 0.001 for i in range(30)])]
+        current = [self._result("t", [1.30 + i * 0.001 for i in range(30)])]
+        comparison, = compare_runs(baseline, current, threshold=0.1, alpha=0.05)
+
+        assert comparison.status == "regression"
+        assert comparison.change > 0.25
+        assert comparison.p_value < 0.05
+
+    def test_noise_not_regression(self):
+        """
+        测试分布重叠的波动不判定为退化，新增和缺失的测试单独标出
+        """
+        from src.utils.benchmark_store import compare_runs
+
+        baseline = [self._result("t", [1.0, 1.4, 1.1, 1.3, 1.2]), self._result("old", [1.0, 1.0])]
+        current = [self._result("t", [1.3, 1.0, 1.4, 1.2, 1.1]), self._result("new", [1.0, 1.0])]
+        statuses = {item.name: item.status for item in compare_runs(baseline, current, threshold=0.1, alpha=0.05)}
+
+        assert statuses == {"t": "unchanged", "old": "missing", "new": "new"}
+
@@ -0,0 +1,193 @@
+"""
+跨机器分布式执行示例
+
+单台机器的CPU不够用时，可以把测试分到多台机器上运行，本文件介绍两种方式：
+
+- 静态分片：每台机器运行 pytest --shard=i/n，按历史耗时贪心地把工作单元分成耗时接近的n片，
+  各台机器的结果写成清单文件，最后用 python -m src.utils.sharding merge 合并，
+  检查是否有分片缺失、测试重复运行
+- 动态分配：pytest --coordinator 启动协调进程，各台机器上的 pytest --worker 连接过来领取工作单元
+  （单机上可以直接用 --spawn-workers N）；某个worker空闲时从其他worker预留的单元中窃取一半，
+  不会因为分片估计不准而出现某台机器最后才跑完
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import pytest
+
+
+class TestSharding:
+    """
+    静态分片
+
+    分片结果只取决于测试集合和耗时历史，每台机器独立计算也能得到相同的分片。
+    """
+
+    def test_split_balanced_and_classes_together(self):
+        """
+        测试按耗时贪心分片，结果确定，测试类不会被拆开
+        """
+        from src.utils.sharding import split_shards
+
+        units = {
+            "t.py::TestOrdered": ["t.py::TestOrdered::test_1", "t.py::TestOrdered::test_2"],
+            "t.py::test_a": ["t.py::test_a"],
+            "t.py::test_b": ["t.py::test_b"],
+            "t.py::test_c": ["t.py::test_c"],
+        }
+        durations = {"t.py::TestOrdered::test_1": 3, "t.py::TestOrdered::test_2": 3,
+                     "t.py::test_a": 4, "t.py::test_b": 1, "t.py::test_c": 1}
+        shards = split_shards(units, durations.get, 2)
+
+        assert shards == [["t.py::TestOrdered"], ["t.py::test_a", "t.py::test_b", "t.py::test_c"]]
+        assert split_shards(dict(reversed(units.items())), durations.get, 2) == shards
+
+    def test_parse_and_merge(self, tmp_path):
+        """
+        测试分片参数校验，合并时发现缺少的分片和重复运行的测试
+        """
+        from src.utils.sharding import merge_manifests, parse_shard, write_manifest
+
+        assert parse_shard("2/4") == (2, 4)
+        with pytest.raises(ValueError):
+            parse_shard("5/4")
+
+        for index, tests in ((1, ["t.py::test_a", "t.py::test_b"]), (2, ["t.py::test_b"])):
+            write_manifest(tmp_path / f"shard-{index}-of-3.json", {
+                "shard": index, "total": 3, "elapsed": 1.0, "exitstatus": 0, "estimated": 1.0,
+                "tests": tests, "results": {nodeid: "passed" for nodeid in tests},
+                "durations": {nodeid: 0.5 for nodeid in tests},
+            })
+        merged = merge_manifests(sorted(tmp_path.glob("*.json")))
+
+        assert merged["missing_shards"] == [3]
+        assert merged["duplicated"] == ["t.py::test_b"]
+        assert merged["results"] == {"t.py::test_a": "passed", "t.py::test_b": "passed"}
+
+
+class TestWorkStealing:
+    """
+    动态分配
+
+    每个worker一次预留几个单元，减少与协调进程的往返；
+    共享队列空了以后，空闲的worker从预留最多的worker那里窃取还没开始的单元。
+    """
+
+    def test_reserve_and_steal(self):
+        """
+        测试按优先级预留，共享队列空了以后从预留最多的worker的队尾窃取一半
+        """
+        from src.utils.work_stealing import WorkQueue
+
+        order = [f"u{index:02d}" for index in range(20)]
+        work = WorkQueue({unit: [f"t.py::test_{unit}"] for unit in order}, order, batch_size=4)
+        work.add_worker("w0")
+        work.add_worker("w1")
+
+        assert work.next_unit("w0") == ("u00", ["t.py::test_u00"])
+        assert list(work.reserved["w0"]) == ["u01", "u02", "u03"]
+        taken = [work.next_unit("w1")[0] for _ in range(17)]
+        assert taken[:16] == order[4:]
+        # 共享队列空了，从w0预留的 u01~u03 中拿走队尾的一半
+        assert taken[16] == "u02"
+        assert work.steals["w1"] == 2
+        assert work.next_unit("w0")[0] == "u01"
+        assert work.next_unit("w0")[0] == "u03"
+        assert work.next_unit("w0") is None
+        assert work.next_unit("w1") is None
+
+        work.add_worker("w2")
+        work.requeue("u0", ["t.py::test_u0"])
+        assert work.next_unit("w2")[0] == "u0"
+        assert work.remove_worker("w2") == ["u0"]
+
+    def test_protocol(self):
+        """
+        测试worker通过回环地址登记、领取单元、发回报告
+        """
+        import threading
+
+        from src.utils.work_stealing import CoordinatorServer, WorkerClient, WorkQueue
+
+        work = WorkQueue({"t.py::TestA": ["t.py::TestA::test_1", "t.py::TestA::test_2"]}, ["t.py::TestA"])
+        server = CoordinatorServer(("127.0.0.1", 0), work, ["t.py::TestA::test_1", "t.py::TestA::test_2"])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            client = WorkerClient.connect(server.server_address[:2], timeout=5)
+            welcome = client.hello("localhost", 1)
+            assert welcome["worker"] == "w0"
+            assert client.next_unit() == ["t.py::TestA::test_1", "t.py::TestA::test_2"]
+            client.report({"nodeid": "t.py::TestA::test_1"})
+            assert client.next_unit() is None
+            client.close()
+
+            events = [server.events.get(timeout=5) for _ in range(3)]
+            assert [kind for kind, _, _ in events] == ["up", "report", "down"]
+            assert events[1][2] == {"nodeid": "t.py::TestA::test_1"}
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_idle_worker_waits_for_requeued(self):
+        """
+        测试别的worker还有没执行完的单元时空闲的worker等待，那个worker断开后接手重新排队的测试
+        """
+        import threading
+
+        from src.utils.work_stealing import CoordinatorServer, WorkerClient, WorkQueue
+
+        tests = ["t.py::TestA::test_1", "t.py::TestA::test_2"]
+        work = WorkQueue({"t.py::TestA": tests}, ["t.py::TestA"])
+        server = CoordinatorServer(("127.0.0.1", 0), work, tests)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            busy = WorkerClient.connect(server.server_address[:2], timeout=5)
+            busy.hello("localhost", 1)
+            idle = WorkerClient.connect(server.server_address[:2], timeout=5)
+            idle.hello("localhost", 2)
+            assert busy.next_unit() == tests
+            busy.report({"nodeid": tests[0], "when": "teardown"})
+            assert idle.next_unit(wait=False) is None
+            assert work.should_wait("w1")
+
+            # 协调者处理down事件时把没有运行的测试重新排队
+            busy.close()
+            while server.events.get(timeout=5)[0] != "down":
+                pass
+            assert work.remove_worker("w0") == ["t.py::TestA"]
+            assert idle.next_unit(interval=0.05) == tests[1:]
+            idle.report({"nodeid": tests[1], "when": "teardown"})
+            assert idle.next_unit(interval=0.05) is None
+            idle.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_coordinator_stops_when_workers_gone(self):
+        """
+        测试外部worker都断开后协调者列出没有运行的测试并中断，而不是一直等待
+        """
+        import queue
+        from types import SimpleNamespace
+
+        from src.plugins.distributed_plugin import Coordinator
+        from src.utils.work_stealing import WorkQueue
+
+        work = WorkQueue({"t.py::test_a": ["t.py::test_a"]}, ["t.py::test_a"])
+        work.add_worker("w0")
+        work.next_unit("w0")
+        lines = []
+        terminal = SimpleNamespace(write_line=lambda message, **markup: lines.append(message))
+        config = SimpleNamespace(pluginmanager=SimpleNamespace(get_plugin=lambda name: terminal))
+        coordinator = Coordinator(config, ("127.0.0.1", 0), 0)
+        coordinator.server = SimpleNamespace(events=queue.Queue(), work=work, active_workers=0)
+        coordinator.workers["w0"] = {"host": "localhost", "pid": 1, "tests": 0, "busy": 0.0}
+        coordinator._remaining = {"t.py::test_a"}
+        coordinator.server.events.put(("down", "w0", None))
+        session = SimpleNamespace(shouldfail=False, shouldstop=False, Interrupted=pytest.Session.Interrupted)
+
+        with pytest.raises(pytest.Session.Interrupted, match="所有worker都已断开，还有 1 个测试没有运行"):
+            coordinator._loop(session)
+        assert lines == ["没有运行: t.py::test_a"]
+        assert list(work.shared) == ["t.py::test_a"]
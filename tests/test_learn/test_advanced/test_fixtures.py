@@ -24,8 +24,12 @@ Fixture生命周期：
 @date 2025/01/01
 """
 
+from collections.abc import MutableSequence
+
 import pytest
 
+from src.utils.shared_fixture import shared_fixture
+
 
 class TestFixturesBasic:
     """
@@ -34,13 +38,13 @@ class TestFixturesBasic:
     演示fixture的基本用法。
     """
 
-    @pytest.fixture
+    @shared_fixture(scope="class")
     def sample_data(self):
-
         """
         创建一个示例数据fixture
 
-        这个fixture会在每个测试函数执行前创建。
+        这个fixture在整个测试类中只创建一次，
+        每个测试函数拿到的是它的写时复制副本。
 
         @return Dict 示例数据
         """
@@ -72,6 +76,14 @@ class TestFixturesBasic:
         sample_data["age"] = 30
         assert sample_data["age"] == 30
 
+    def test_data_not_leaked(self, sample_data):
+        """
+        测试修改没有泄漏
+
+        上一个测试修改了age，这里拿到的仍然是原始数据。
+        """
+        assert sample_data["age"] == 25
+
 
 class TestFixtureScopes:
     """
@@ -270,3 +282,374 @@ class TestFixtureReturnVsYield:
         测试yield方式的fixture
         """
         assert using_yield["method"] == "yield"
+
+
+class TestSharedTestData:
+    """
+    共享测试数据测试类
+
+    演示session作用域的test_data fixture：数据文件只解析一次，
+    所有测试拿到的是同一份只读数据。
+    """
+
+    def test_read_sections(self, test_data):
+        """
+        测试按部分读取数据
+        """
+        assert test_data["users"][0]["name"] == "Alice"
+        assert test_data["config"]["retries"] == 3
+        assert len(test_data["posts"]) == 1
+
+    def test_data_is_read_only(self, test_data):
+        """
+        测试共享数据不能被修改
+
+        修改共享数据会影响其他测试，所以只读视图直接拒绝修改；
+        需要修改时先用thaw()复制一份。
+        """
+        from src.utils.readonly import thaw
+
+        with pytest.raises(TypeError):
+            test_data["users"][0]["name"] = "Eve"
+        with pytest.raises(TypeError):
+            test_data["users"].append({"id": 3})
+
+        users = thaw(test_data["users"])
+        users.append({"id": 3, "name": "Carol"})
+        assert len(users) == 3
+        assert len(test_data["users"]) == 2
+
+    def test_serialize_section(self, test_data):
+        """
+        测试只读数据转换为普通dict后可以序列化为JSON
+        """
+        import json
+
+        with pytest.raises(TypeError):
+            json.dumps(test_data["posts"][0])
+        assert json.loads(json.dumps(test_data["posts"][0].to_dict())) == test_data["posts"][0]
+        assert json.loads(json.dumps(test_data.to_dict()))["users"][1]["name"] == "Bob"
+
+    def test_post_section(self, test_data, monkeypatch):
+        """
+        测试直接用只读数据作为请求体发送POST请求（替换掉网络发送，只检查请求体）
+        """
+        import json
+        import requests
+        from src.utils.request_util import RequestUtil
+
+        sent = []
+
+        def fake_send(session, request, **kwargs):
+            sent.append(request)
+            response = requests.Response()
+            response.status_code = 201
+            response._content = request.body
+            return response
+
+        monkeypatch.setattr(requests.Session, "send", fake_send)
+        response = RequestUtil.post("https://example.com/posts", json=test_data["posts"][0])
+
+        assert response.status_code == 201
+        assert json.loads(sent[0].body) == test_data["posts"][0]
+        assert response.json["title"] == "First Post"
+
+    def test_other_payloads_untouched(self, monkeypatch):
+        """
+        测试只转换只读视图和写时复制副本，普通参数（如键值对列表）原样传给requests
+        """
+        import requests
+        from src.utils.request_util import RequestUtil
+        from src.utils.shared_fixture import cow
+
+        received = []
+
+        def fake_request(session, method, url, **kwargs):
+            received.append(kwargs)
+            return requests.Response()
+
+        monkeypatch.setattr(requests.Session, "request", fake_request)
+
+        params = [("tag", "a"), ("tag", "b")]
+        body = {"ids": (1, 2)}
+        RequestUtil.post("https://example.com/posts", json=body, params=params)
+        RequestUtil.post("https://example.com/posts", json=cow({"ids": [1]}))
+
+        assert received[0]["params"] is params
+        assert received[0]["json"] is body
+        assert type(received[1]["json"]) is dict
+
+    def test_load_summary_aligned(self):
+        """
+        测试加载统计表的表头和数据行按显示宽度对齐（中文表头占两列）
+        """
+        import unicodedata
+        from types import SimpleNamespace
+
+        from src.config.settings import Settings
+        from src.plugins.data_plugin import DATA_LOAD_STATS, pytest_terminal_summary
+
+        def columns(line):
+            # 每个字符的显示列位置，取各列之间空白后第一个字符的位置
+            positions, column = [], 0
+            for previous, char in zip(" " + line, line):
+                if previous == " " and char != " ":
+                    positions.append(column)
+                column += 2 if unicodedata.east_asian_width(char) in "WF" else 1
+            return positions, column
+
+        lines = []
+        terminal = SimpleNamespace(section=lambda title: None, write_line=lines.append)
+        stat = {"path": str(Settings().TEST_DATA_FILE), "source": "cache", "seconds": 0.012,
+                "parse_seconds": 0.0034, "worker": "gw0"}
+        pytest_terminal_summary(terminal, 0, SimpleNamespace(stash={DATA_LOAD_STATS: [stat]}))
+
+        header, row = lines
+        assert columns(header)[1] == columns(row)[1]
+        assert columns(header)[0][:3] == columns(row)[0][:3]
+
+    def test_parsed_once(self, test_data):
+        """
+        测试文件未变化时直接返回缓存的数据
+        """
+        from src.utils.data_loader import DataLoader
+
+        assert DataLoader().load() is test_data
+
+
+class TestDataFactory:
+    """
+    批量测试数据测试类
+
+    演示data_factory fixture：按批生成大量数据，适合容量测试。
+    """
+
+    def test_batches(self, data_factory):
+        """
+        测试按批生成用户数据
+        """
+        data_factory.chunk_size = 400
+        batches = list(data_factory.users(1000))
+
+        assert [len(batch) for batch in batches] == [400, 400, 200]
+        users = [user for batch in batches for user in batch]
+        assert [user["id"] for user in users] == list(range(1, 1001))
+        assert all(18 <= user["age"] <= 80 for user in users)
+        assert all(user["email"].startswith(user["username"] + "@") for user in users)
+
+    def test_posts_reference_users(self, data_factory):
+        """
+        测试帖子作者在用户范围内
+        """
+        posts = [post for batch in data_factory.posts(500, user_count=50) for post in batch]
+        assert all(1 <= post["userId"] <= 50 for post in posts)
+        assert all(post["title"] and post["body"] for post in posts)
+
+    def test_write_jsonl(self, data_factory, tmp_path):
+        """
+        测试写出的JSONL与按批产出的记录一致
+        """
+        import json
+        from src.utils.data_factory import DataFactory
+
+        path = tmp_path / "posts.jsonl"
+        assert data_factory.write_jsonl(path, "posts", 300) == 300
+
+        expected = DataFactory(seed=data_factory.seed, chunk_size=data_factory.chunk_size).posts(300)
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == next(expected)
+
+
+class TestSharedFixture:
+    """
+    共享fixture测试类
+
+    演示shared_fixture：值在更大的作用域内只构建一次，
+    每个测试拿到写时复制副本（cow）或只读视图（frozen）。
+    """
+
+    build_count = 0
+
+    @shared_fixture(scope="class")
+    def shared_config(self):
+        """
+        嵌套的配置数据，整个测试类只构建一次
+        """
+        TestSharedFixture.build_count += 1
+        return {"env": "test", "servers": [{"host": "a", "tags": ["web"]}]}
+
+    @shared_fixture(scope="class", mode="frozen")
+    def frozen_config(self):
+        """
+        只读的配置数据
+        """
+        return {"retries": 3, "hosts": ["a", "b"]}
+
+    def test_modify_nested_copy(self, shared_config):
+        """
+        测试修改嵌套数据只影响本测试的副本
+        """
+        shared_config["servers"][0]["tags"].append("db")
+        shared_config["servers"].append({"host": "b"})
+        shared_config["env"] = "prod"
+        assert shared_config["servers"][0]["tags"] == ["web", "db"]
+        assert len(shared_config["servers"]) == 2
+
+    def test_original_unchanged(self, shared_config):
+        """
+        测试上一个测试的修改没有泄漏，且值只构建了一次
+        """
+        assert shared_config == {"env": "test", "servers": [{"host": "a", "tags": ["web"]}]}
+        assert TestSharedFixture.build_count == 1
+
+    def test_frozen_rejects_mutation(self, frozen_config):
+        """
+        测试只读模式拒绝修改
+        """
+        with pytest.raises(TypeError):
+            frozen_config["retries"] = 5
+        with pytest.raises(TypeError):
+            frozen_config["hosts"].append("c")
+        assert frozen_config["hosts"][1] == "b"
+
+
+def _mutate_through(path, copy_):
+    """按指定的访问方式拿到嵌套对象并修改"""
+    if path == "dict()":
+        dict(copy_)["nested"]["x"] = 1
+    elif path == "unpack":
+        {**copy_}["items"].append(9)
+    elif path == "values":
+        next(value for value in copy_.values() if isinstance(value, MutableSequence)).append(9)
+    elif path == "items":
+        dict(copy_.items())["nested"]["x"] = 1
+    elif path == "get":
+        copy_.get("nested")["x"] = 1
+    elif path == "pop":
+        copy_.pop("items").append(9)
+    elif path == "setdefault":
+        copy_.setdefault("nested", {})["x"] = 1
+    elif path == "copy":
+        copy_.copy()["nested"]["x"] = 1
+    elif path == "or":
+        (copy_ | {})["nested"]["x"] = 1
+    elif path == "iter":
+        for item in copy_["items"]:
+            item.append(9)
+    elif path == "reversed":
+        next(reversed(copy_["items"])).append(9)
+    elif path == "slice":
+        copy_["items"][:1][0].append(9)
+    elif path == "add":
+        (copy_["items"] + [])[0].append(9)
+    elif path == "radd":
+        ([] + copy_["items"])[0].append(9)
+    elif path == "mul":
+        (copy_["items"] * 1)[0].append(9)
+    elif path == "list copy":
+        copy_["items"].copy()[0].append(9)
+    elif path == "list pop":
+        copy_["items"].pop()[0] = 0
+    elif path == "star":
+        first, *_ = copy_["items"]
+        first.append(9)
+    elif path == "set":
+        copy_["tags"].add("new")
+
+
+class TestCopyOnWrite:
+    """
+    写时复制副本的隔离
+
+    共享的原始数据只有一份，无论通过哪种方式拿到嵌套对象并修改，都不能改到原始数据。
+    """
+
+    ORIGINAL = {"nested": {"a": 1}, "items": [[1], [2]], "tags": {"web"}, "name": "x"}
+
+    @pytest.mark.parametrize("path", [
+        "dict()", "unpack", "values", "items", "get", "pop", "setdefault", "copy", "or",
+        "iter", "reversed", "slice", "add", "radd", "mul", "list copy", "list pop", "star", "set",
+    ])
+    def test_mutation_does_not_leak(self, path):
+        """
+        测试通过各种访问方式修改嵌套对象，原始数据不变，下一个副本也看不到修改
+        """
+        import copy
+        from src.utils.shared_fixture import cow
+
+        original = copy.deepcopy(self.ORIGINAL)
+        _mutate_through(path, cow(original))
+
+        assert original == self.ORIGINAL
+        assert cow(original) == self.ORIGINAL
+
+    def test_changes_visible_in_same_copy(self):
+        """
+        测试同一个副本内的修改是持久的（再次读取拿到的是同一个私有对象）
+        """
+        from src.utils.shared_fixture import cow
+
+        original = {"nested": {"a": 1}, "items": [[1]]}
+        data = cow(original)
+        data["nested"]["b"] = 2
+        data["items"][0].append(2)
+        data["items"].insert(0, [0])
+
+        assert data == {"nested": {"a": 1, "b": 2}, "items": [[0], [1, 2]]}
+        assert dict(data)["nested"] is data["nested"]
+        assert list(data.values())[0] is data["nested"]
+        assert original == {"nested": {"a": 1}, "items": [[1]]}
+
+    def test_views_and_conversion(self):
+        """
+        测试keys()/values()/items()返回视图，to_dict()后可以序列化为JSON
+        """
+        import json
+        from collections.abc import ItemsView, KeysView, ValuesView
+        from src.utils.shared_fixture import cow
+
+        data = cow({"a": {"b": [1]}})
+        keys, values, items = data.keys(), data.values(), data.items()
+        assert isinstance(keys, KeysView) and isinstance(values, ValuesView) and isinstance(items, ItemsView)
+        data["c"] = 2
+        assert list(keys) == ["a", "c"] and len(values) == 2 and ("c", 2) in items
+
+        with pytest.raises(TypeError):
+            json.dumps(data)
+        assert json.loads(json.dumps(data.to_dict())) == {"a": {"b": [1]}, "c": 2}
+        assert type(data["a"]["b"].to_list()) is list
+
+
+class TestFixtureProfiler:
+    """
+    fixture耗时分析
+
+    运行 pytest --fixture-durations 10 会输出最耗时的fixture和作用域建议，
+    这里直接调用汇总函数演示作用域建议的判定规则。
+    """
+
+    @staticmethod
+    def _event(fixture, fingerprint, max_scope="session", setup=0.04):
+        return {
+            "fixture": fixture, "scope": "function", "location": "conftest.py:1", "test": "t",
+            "setup": setup, "teardown": 0.01, "fingerprint": fingerprint, "max_scope": max_scope,
+        }
+
+    def test_scope_suggestion(self):
+        """
+        测试每次值都相同的fixture建议扩大作用域，值不同或依赖窄作用域的不建议
+        """
+        from src.plugins.profiler_plugin import PhaseProfiler
+
+        profiler = PhaseProfiler(config=None, top=0)
+        profiler.events = (
+            [self._event("same_value", "abc") for _ in range(3)]
+            + [self._event("random_value", str(i)) for i in range(3)]
+            + [self._event("uses_tmp_path", "abc", max_scope="function") for _ in range(3)]
+        )
+        fixtures = profiler.fixture_summary()
+        suggestions = profiler.scope_suggestions(fixtures, min_seconds=0.05)
+
+        assert fixtures[0]["count"] == 3
+        assert fixtures[0]["total"] == pytest.approx(0.15)
+        assert [(row["fixture"], row["suggested"]) for row in suggestions] == [("same_value", "session")]
@@ -0,0 +1,120 @@
+"""
+测试影响分析示例
+
+改了一行代码就把全部测试跑一遍太慢，影响分析只运行可能受改动影响的测试：
+
+1. pytest --impact-record：记录每个测试执行时用到的项目文件（源码、数据文件），
+   连同当时的git提交一起保存到 Settings.IMPACT_DB
+2. pytest --impact-select：用git找出相对记录时的提交改动过的文件，
+   只运行依赖这些文件的测试；映射中还没有的测试总是运行
+
+conftest.py、pytest.ini 等影响所有测试的文件改动时（见 Settings.IMPACT_RUN_ALL），
+或者映射中没有的测试太多、映射已经过期时，运行全部测试。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import pytest
+
+
+class TestImpactAnalysis:
+    """
+    测试影响分析
+
+    fixture可能被多个测试共享，fixture中用到的文件计入所有使用它的测试。
+    """
+
+    def test_recorder_scopes(self, tmp_path):
+        """
+        测试fixture范围中用到的文件并入测试范围，项目外的文件和忽略的文件不记录
+        """
+        from src.utils.impact import FileRecorder
+
+        (tmp_path / "data").mkdir()
+        (tmp_path / "data" / "users.json").write_text("[]")
+        (tmp_path / "logs").mkdir()
+        (tmp_path / "logs" / "run.log").write_text("")
+        recorder = FileRecorder(tmp_path, ["logs/*"])
+
+        recorder.push()
+        recorder.push()
+        recorder.touch(str(tmp_path / "data" / "users.json"))
+        assert recorder.pop() == {"data/users.json"}
+        recorder.touch(str(tmp_path / "logs" / "run.log"))
+        recorder.touch(__file__)
+        assert recorder.pop() == {"data/users.json"}
+
+    def test_store_and_git_changes(self, tmp_path):
+        """
+        测试按改动的文件查出受影响的测试，git改动包括未提交的修改和新文件
+        """
+        import subprocess
+
+        from src.utils.impact import ImpactStore, changed_files, git_head
+
+        store = ImpactStore(tmp_path / "impact.db")
+        store.record({"t.py::test_a": ["src/a.py", "data/a.json"], "t.py::test_b": ["src/b.py"]}, "abc")
+        store.record({"t.py::test_b": ["src/a.py"]}, "def")
+        assert store.tests() == {"t.py::test_a": "abc", "t.py::test_b": "def"}
+        assert store.impacted(["src/a.py"]) == {"t.py::test_a", "t.py::test_b"}
+        assert store.impacted(["src/b.py", "README.md"]) == set()
+        store.close()
+
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        git = ["git", "-C", str(repo), "-c", "user.name=t", "-c", "user.email=t@t"]
+        subprocess.run(git + ["init", "-q"], check=True)
+        (repo / "a.py").write_text("a = 1\n")
+        subprocess.run(git + ["add", "a.py"], check=True)
+        subprocess.run(git + ["commit", "-q", "-m", "init"], check=True)
+        base = git_head(repo)
+        (repo / "a.py").write_text("a = 2\n")
+        (repo / "b.json").write_text("{}")
+
+        assert changed_files(repo, base) == {"a.py", "b.json"}
+        assert changed_files(repo, "0" * 40) is None
+
+    def test_plugin_files_ignored(self):
+        """
+        测试每个测试都会经过的日志工具不记录为依赖，业务代码正常记录
+        """
+        from src.config.settings import Settings
+        from src.utils.impact import FileRecorder
+
+        settings = Settings()
+        recorder = FileRecorder(settings.BASE_DIR, settings.IMPACT_IGNORED)
+        assert recorder.normalize(str(settings.BASE_DIR / "src" / "utils" / "logger.py")) is None
+        assert recorder.normalize(str(settings.BASE_DIR / "src" / "utils" / "request_util.py")) == \
+            "src/utils/request_util.py"
+
+    def test_profiled_tests_skipped(self, request):
+        """
+        测试带profile标记的测试给出警告且不记录（cProfile会替换记录用的回调），其他测试正常记录
+        """
+        from types import SimpleNamespace
+
+        from src.plugins.impact_plugin import ImpactRecorder
+
+        if request.config.getoption("impact_record"):
+            pytest.skip("记录器是进程内唯一的，本次运行已经在记录依赖")
+        warned = []
+        profiled = SimpleNamespace(
+            nodeid="t.py::test_profiled",
+            get_closest_marker=lambda name: pytest.mark.profile.mark if name == "profile" else None,
+            warn=warned.append,
+        )
+        recorder = ImpactRecorder(request.config)
+        try:
+            recorder.pytest_collection_modifyitems(None, request.config, [profiled, request.node])
+            for item in (profiled, request.node):
+                protocol = recorder.pytest_runtest_protocol(item, None)
+                next(protocol)
+                with pytest.raises(StopIteration):
+                    protocol.send(None)
+        finally:
+            recorder.pytest_unconfigure(request.config)
+
+        assert len(warned) == 1 and "profile" in str(warned[0])
+        assert list(recorder.mapping) == [request.node.nodeid]
+        assert "tests/test_learn/test_advanced/test_impact.py" in recorder.mapping[request.node.nodeid]
@@ -0,0 +1,775 @@
+"""
+LoggerUtil日志测试
+
+本文件测试 src/utils/logger.py 及相关日志模块的行为。
+
+LoggerUtil 是单例，日志器 pytest_learn 也是全局的，
+每个测试通过 logger_util fixture 在临时目录中重新初始化一份，
+测试结束后恢复原来的日志配置，不影响其他测试的日志输出。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.config.settings import Settings
+from src.utils.log_index import build_index, index_path_for, main as log_index_main, query
+from src.utils.log_merge import merge_worker_logs
+from src.utils.log_rotation import RotatingCompressedFileHandler
+from src.utils.logger import LoggerUtil, lazy
+
+# LoggerUtil 中保存日志状态的类属性
+_STATE = ["_logger", "_listener", "_queue_handler", "_handlers", "_current_test",
+          "_test_started", "_ring_handler", "_rate_filter"]
+
+
+@pytest.fixture
+def log_settings(tmp_path, monkeypatch):
+    """
+    指向临时日志目录的配置
+
+    影响输出内容的可选功能默认关闭，测试需要时再修改。
+
+    @return Settings 配置对象（修改在测试结束后自动恢复）
+    """
+    settings = Settings()
+    monkeypatch.setattr(settings, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(settings, "LOG_JSON", False)
+    monkeypatch.setattr(settings, "LOG_FAILURE_ONLY", False)
+    monkeypatch.setattr(settings, "LOG_RATE_LIMIT", 0)
+    monkeypatch.setattr(settings, "LOG_DEDUP_WINDOW", 0)
+    return settings
+
+
+@pytest.fixture
+def console(monkeypatch):
+    """
+    代替sys.stdout的缓冲区，LoggerUtil初始化时控制台处理器绑定到它
+
+    @return io.StringIO 控制台输出
+    """
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    return stream
+
+
+@pytest.fixture
+def logger_util(log_settings, monkeypatch, console):
+    """
+    尚未初始化的LoggerUtil
+
+    第一次记录日志时按 log_settings 初始化，控制台输出写入 console。
+
+    @return LoggerUtil 日志工具
+    """
+    logger = logging.getLogger("pytest_learn")
+    handlers, filters, level = logger.handlers[:], logger.filters[:], logger.level
+    for handler in handlers:
+        logger.removeHandler(handler)
+    for log_filter in filters:
+        logger.removeFilter(log_filter)
+    for name in _STATE:
+        monkeypatch.setattr(LoggerUtil, name, [] if name == "_handlers" else None)
+    yield LoggerUtil()
+    LoggerUtil.shutdown()
+    for handler in logger.handlers[:]:
+        handler.close()
+        logger.removeHandler(handler)
+    for log_filter in logger.filters[:]:
+        logger.removeFilter(log_filter)
+    for handler in handlers:
+        logger.addHandler(handler)
+    for log_filter in filters:
+        logger.addFilter(log_filter)
+    logger.setLevel(level)
+
+
+def read_log(log_dir, pattern="pytest_*.log") -> str:
+    """
+    读取日志目录中匹配的日志文件内容
+
+    @param log_dir 日志目录
+    @param pattern 文件名模式
+    @return str 所有匹配文件的内容
+    """
+    return "".join(path.read_text(encoding="utf-8") for path in sorted(log_dir.glob(pattern)))
+
+
+class TestQueueLogging:
+    """
+    后台队列写日志
+
+    记录日志时在调用线程中生成消息文本后放入队列，格式器拼接和写文件在 QueueListener 的后台线程中完成，
+    shutdown() 等待队列写完。
+    """
+
+    def test_all_records_written_after_shutdown(self, logger_util, log_settings):
+        """
+        测试shutdown后队列中的日志全部按顺序写入文件
+        """
+        for i in range(200):
+            logger_util.info("第%d条", i)
+        LoggerUtil.shutdown()
+
+        lines = [line for line in read_log(log_settings.LOG_DIR).splitlines() if "第" in line]
+        assert [line.rsplit(" | ", 1)[1] for line in lines] == [f"第{i}条" for i in range(200)]
+
+    def test_message_formatted_at_call_time(self, logger_util, log_settings):
+        """
+        测试%参数在调用线程中格式化一次，之后修改参数对象不影响已经记录的日志
+        """
+        threads = []
+
+        class Probe:
+            def __str__(self):
+                threads.append(threading.current_thread())
+                return "probe"
+
+        state = {"step": 1}
+        logger_util.info("%s 状态:%s", Probe(), state)
+        state["step"] = 99
+        LoggerUtil.shutdown()
+
+        assert threads == [threading.current_thread()]
+        assert "probe 状态:{'step': 1}" in read_log(log_settings.LOG_DIR)
+
+    def test_log_after_shutdown(self, logger_util, log_settings):
+        """
+        测试shutdown后的日志改为同步写出，重复调用shutdown没有影响
+        """
+        logger_util.info("shutdown之前")
+        LoggerUtil.shutdown()
+        LoggerUtil.shutdown()
+        logger_util.warning("shutdown之后")
+
+        content = read_log(log_settings.LOG_DIR)
+        assert "shutdown之前" in content
+        assert "shutdown之后" in content
+
+    def test_console_output(self, logger_util, console):
+        """
+        测试控制台只输出INFO及以上级别
+        """
+        logger_util.debug("调试信息")
+        logger_util.info("普通信息")
+        LoggerUtil.shutdown()
+
+        assert "普通信息" in console.getvalue()
+        assert "调试信息" not in console.getvalue()
+
+
+class TestLazyAndJsonLogging:
+    """
+    延迟求值的日志消息和JSON-lines输出
+
+    消息为函数或参数用 lazy() 包装时，只在日志确定要输出时才在调用线程中求值，多个处理器共用一次结果。
+    LOG_JSON 开启后额外写出 pytest_YYYY-MM-DD.jsonl，每行一条JSON记录。
+    """
+
+    def test_callable_message_evaluated_once(self, logger_util, log_settings):
+        """
+        测试函数消息在三个处理器（控制台、文本、JSON）中只求值一次
+        """
+        log_settings.LOG_JSON = True
+        calls = []
+
+        def build():
+            calls.append(1)
+            return "延迟生成的消息"
+
+        logger_util.info(build)
+        LoggerUtil.shutdown()
+
+        assert calls == [1]
+        assert "延迟生成的消息" in read_log(log_settings.LOG_DIR)
+        assert "延迟生成的消息" in read_log(log_settings.LOG_DIR, "pytest_*.jsonl")
+
+    def test_lazy_evaluated_at_call_time(self, logger_util, log_settings):
+        """
+        测试延迟消息在调用线程中求值，记录的是调用时闭包变量的值；级别被过滤的消息不求值
+        """
+        threads = []
+        state = {"step": 1}
+
+        def build():
+            threads.append(threading.current_thread())
+            return f"步骤{state['step']}"
+
+        logger_util.info(build)
+        logger_util.info("参数:%s", lazy(build))
+        state["step"] = 99
+        logging.getLogger("pytest_learn").setLevel(logging.INFO)
+        logger_util.debug(build)
+        LoggerUtil.shutdown()
+
+        assert threads == [threading.current_thread()] * 2
+        content = read_log(log_settings.LOG_DIR)
+        assert "| 步骤1" in content and "参数:步骤1" in content
+        assert "步骤99" not in content
+
+    def test_lazy_argument(self, logger_util, log_settings):
+        """
+        测试用lazy()包装的单个%参数
+        """
+        calls = []
+
+        def payload():
+            calls.append(1)
+            return {"id": 1}
+
+        logger_util.info("响应:%s 状态:%d", lazy(payload), 200)
+        LoggerUtil.shutdown()
+
+        assert calls == [1]
+        assert "响应:{'id': 1} 状态:200" in read_log(log_settings.LOG_DIR)
+
+    def test_json_lines_fields(self, logger_util, log_settings):
+        """
+        测试JSON记录包含消息、测试用例ID、worker ID、耗时和调用位置
+        """
+        log_settings.LOG_JSON = True
+        LoggerUtil.set_current_test("tests/test_demo.py::test_login")
+        logger_util.info("用户%s登录", "alice")
+        try:
+            raise ValueError("出错了")
+        except ValueError:
+            logger_util.error("请求失败", exc_info=True)
+        LoggerUtil.set_current_test(None)
+        logger_util.info("测试之外")
+        LoggerUtil.shutdown()
+
+        records = [json.loads(line) for line in read_log(log_settings.LOG_DIR, "pytest_*.jsonl").splitlines()]
+        login, failure, outside = records
+        assert login["message"] == "用户alice登录"
+        assert login["level"] == "INFO"
+        assert login["test_id"] == "tests/test_demo.py::test_login"
+        assert login["worker_id"] == os.environ.get("PYTEST_XDIST_WORKER", "main")
+        assert login["test_elapsed_ms"] >= 0
+        assert login["file"] == __file__
+        assert "ValueError: 出错了" in failure["exc_info"]
+        assert outside["test_id"] == "-"
+        assert outside["test_elapsed_ms"] is None
+
+
+class TestLogRotation:
+    """
+    日志轮转、压缩和清理
+
+    RotatingCompressedFileHandler 超过大小或跨天时把当前文件改名为历史分段，
+    分段在后台线程中压缩，并按 backup_count、retention_days 清理。
+    """
+
+    @staticmethod
+    def _handler(log_dir, **kwargs):
+        handler = RotatingCompressedFileHandler(log_dir, **kwargs)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        return handler
+
+    @staticmethod
+    def _emit(handler, messages, created=None):
+        for message in messages:
+            record = logging.makeLogRecord({"msg": message})
+            if created is not None:
+                record.created = created
+            handler.handle(record)
+
+    @staticmethod
+    def _segment_text(path):
+        return gzip.decompress(path.read_bytes()).decode("utf-8") if path.suffix == ".gz" else path.read_text("utf-8")
+
+    def test_size_rollover_compressed(self, tmp_path):
+        """
+        测试超过大小后轮转，历史分段压缩为.gz，内容按顺序完整保留
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        handler = self._handler(tmp_path, max_bytes=200)
+        messages = [f"第{i:03d}条日志" for i in range(100)]
+        self._emit(handler, messages)
+        handler.close()
+
+        segments = handler.segments(today)
+        assert len(segments) > 1
+        assert all(path.name.endswith(".log.gz") for path in segments)
+        text = "".join(self._segment_text(path) for path in segments) + handler.base_path(today).read_text("utf-8")
+        assert text.splitlines() == messages
+
+    def test_backup_count(self, tmp_path):
+        """
+        测试只保留最新的backup_count个历史分段
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        handler = self._handler(tmp_path, max_bytes=100, backup_count=2, compression="none")
+        self._emit(handler, [f"第{i:03d}条日志" for i in range(100)])
+        handler.close()
+
+        segments = handler.segments(today)
+        assert len(segments) == 2
+        assert "第099条日志" not in "".join(path.read_text("utf-8") for path in segments)
+        assert handler.base_path(today).read_text("utf-8").endswith("第099条日志\n")
+
+    def test_backup_count_keeps_newest_while_compressing(self, tmp_path, capsys):
+        """
+        测试压缩进行中清理时按分段编号保留最新的分段，不删除还在压缩队列中的分段
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        handler = self._handler(tmp_path, max_bytes=10, backup_count=2)
+        messages = [f"第{i:03d}条日志" for i in range(50)]
+        self._emit(handler, messages)
+        handler.close()
+
+        assert "日志压缩失败" not in capsys.readouterr().err
+        segments = handler.segments(today)
+        assert [path.name for path in segments] == [f"pytest_{today}.{number}.log.gz" for number in (48, 49)]
+        text = "".join(self._segment_text(path) for path in segments) + handler.base_path(today).read_text("utf-8")
+        assert text.splitlines() == messages[-3:]
+
+    def test_retention_days(self, tmp_path):
+        """
+        测试超过保留天数的历史分段被删除
+        """
+        handler = self._handler(tmp_path, retention_days=7, compression="none")
+        old = tmp_path / "pytest_2020-01-01.1.log.gz"
+        recent = tmp_path / "pytest_2020-01-02.1.log.gz"
+        for path in (old, recent):
+            path.write_bytes(b"")
+        ten_days_ago = time.time() - 10 * 86400
+        os.utime(old, (ten_days_ago, ten_days_ago))
+        handler.cleanup()
+        handler.close()
+
+        assert not old.exists()
+        assert recent.exists()
+
+    def test_previous_day_file_rolled_at_startup(self, tmp_path):
+        """
+        测试之前日期没有轮转的文件在处理器启动时成为那一天最新的分段并压缩，其他tag的文件按保留天数清理
+        """
+        (tmp_path / "pytest_2020-01-01.1.log.gz").write_bytes(gzip.compress("之前的分段\n".encode("utf-8")))
+        (tmp_path / "pytest_2020-01-01.log").write_text("零点前结束的运行\n", encoding="utf-8")
+        other = tmp_path / "pytest_2020-01-01.gw0-old.log"
+        other.write_text("其他会话的worker日志\n", encoding="utf-8")
+        ten_days_ago = time.time() - 10 * 86400
+        os.utime(other, (ten_days_ago, ten_days_ago))
+
+        handler = self._handler(tmp_path, retention_days=7)
+        handler.close()
+
+        assert not (tmp_path / "pytest_2020-01-01.log").exists()
+        assert [path.name for path in handler.segments("2020-01-01")] == [
+            "pytest_2020-01-01.1.log.gz", "pytest_2020-01-01.2.log.gz",
+        ]
+        assert self._segment_text(tmp_path / "pytest_2020-01-01.2.log.gz") == "零点前结束的运行\n"
+        assert not other.exists()
+
+    def test_date_rollover(self, tmp_path):
+        """
+        测试跨天后写入新日期的文件，前一天的文件成为历史分段
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        handler = self._handler(tmp_path, compression="none")
+        self._emit(handler, ["今天"])
+        tomorrow = datetime.strptime(today, "%Y-%m-%d") + timedelta(days=1, hours=1)
+        self._emit(handler, ["明天"], created=tomorrow.timestamp())
+        handler.close()
+
+        assert handler.base_path(tomorrow.strftime("%Y-%m-%d")).read_text("utf-8") == "明天\n"
+        assert [path.read_text("utf-8") for path in handler.segments(today)] == ["今天\n"]
+        assert not handler.base_path(today).exists()
+
+
+class TestWorkerLogMerge:
+    """
+    xdist worker日志合并
+
+    每个worker写 pytest_YYYY-MM-DD.gw<N>-<会话ID>.log，会话结束时主进程按时间顺序
+    合并本次会话的worker日志到主日志文件，合并结果同样按大小轮转。
+    """
+
+    DATE = "2025-01-01"
+
+    def _write(self, log_dir, worker, run_id, lines):
+        path = log_dir / f"pytest_{self.DATE}.{worker}-{run_id}.log"
+        path.write_text("".join(f"{line}\n" for line in lines), encoding="utf-8")
+        return path
+
+    def test_merge_in_time_order(self, tmp_path):
+        """
+        测试按时间交错合并，异常堆栈等续行跟随所属的记录，合并后删除worker文件
+        """
+        gw0 = self._write(tmp_path, "gw0", "abc123", [
+            f"{self.DATE} 10:00:00.100 | INFO     | gw0 | a | pytest_learn | 1",
+            f"{self.DATE} 10:00:00.300 | ERROR    | gw0 | a | pytest_learn | 3",
+            "Traceback (most recent call last):",
+            "ValueError: 出错了",
+        ])
+        gw1 = self._write(tmp_path, "gw1", "abc123", [
+            f"{self.DATE} 10:00:00.200 | INFO     | gw1 | b | pytest_learn | 2",
+            f"{self.DATE} 10:00:00.400 | INFO     | gw1 | b | pytest_learn | 4",
+        ])
+
+        merged, = merge_worker_logs(tmp_path, "abc123")
+
+        lines = merged.read_text("utf-8").splitlines()
+        assert [line.rsplit(" | ", 1)[1] for line in lines if line.startswith(self.DATE)] == ["1", "2", "3", "4"]
+        assert lines[3:5] == ["Traceback (most recent call last):", "ValueError: 出错了"]
+        assert merged.name == f"pytest_{self.DATE}.log"
+        assert not gw0.exists() and not gw1.exists()
+
+    def test_reorder_window(self):
+        """
+        测试窗口排序：错位不超过窗口的记录恢复时间顺序，时间相同的记录保持原顺序
+        """
+        from src.utils.log_merge import _reorder
+
+        entries = [(1.0, "a"), (3.0, "c"), (4.0, "d"), (2.0, "b"), (4.0, "e"), (5.0, "f")]
+        assert [entry for _, entry in _reorder(iter(entries), 2)] == ["a", "b", "c", "d", "e", "f"]
+        assert list(_reorder(iter(entries), 0)) == entries
+
+    def test_other_runs_untouched(self, tmp_path):
+        """
+        测试同时运行的其他会话的worker日志不会被合并或删除
+        """
+        ours = self._write(tmp_path, "gw0", "abc123", [f"{self.DATE} 10:00:00.100 | INFO | gw0 | a | x | 本次会话"])
+        other = self._write(tmp_path, "gw0", "def456", [f"{self.DATE} 10:00:00.100 | INFO | gw0 | a | x | 其他会话"])
+
+        merge_worker_logs(tmp_path, "abc123")
+
+        content = (tmp_path / f"pytest_{self.DATE}.log").read_text("utf-8")
+        assert "本次会话" in content
+        assert "其他会话" not in content
+        assert not ours.exists()
+        assert other.exists()
+
+    def test_merge_rotates(self, tmp_path):
+        """
+        测试合并结果超过大小时轮转为压缩分段，不会无限增长
+        """
+        lines = [f"{self.DATE} 10:00:{i // 1000:02d}.{i % 1000:03d} | INFO | gw0 | a | x | 第{i}条" for i in range(300)]
+        self._write(tmp_path, "gw0", "abc123", lines)
+
+        merged, = merge_worker_logs(tmp_path, "abc123", rotation={"max_bytes": 2000, "compression": "gzip"})
+
+        segments = sorted(tmp_path.glob(f"pytest_{self.DATE}.*.log.gz"), key=lambda path: int(path.name.split(".")[1]))
+        assert segments
+        assert merged.stat().st_size < 2000 + 100
+        text = "".join(gzip.decompress(path.read_bytes()).decode("utf-8") for path in segments)
+        assert (text + merged.read_text("utf-8")).splitlines() == lines
+
+    def test_worker_files_named_with_run_id(self, logger_util, log_settings, monkeypatch):
+        """
+        测试xdist worker的日志文件名带有worker编号和会话ID
+        """
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw3")
+        monkeypatch.setattr(log_settings, "LOG_RUN_ID", "abc123")
+        logger_util.info("worker日志")
+        LoggerUtil.shutdown()
+
+        assert "worker日志" in read_log(log_settings.LOG_DIR, "pytest_*.gw3-abc123.log")
+
+
+class TestFailureOnlyLogging:
+    """
+    失败时才输出DEBUG日志
+
+    LOG_FAILURE_ONLY 开启后日志文件只写INFO及以上，DEBUG日志放在当前测试的环形缓冲区中，
+    测试失败时由日志插件调用 flush_failure_context() 写入日志文件并附加到报告。
+    """
+
+    @pytest.fixture(autouse=True)
+    def failure_only(self, log_settings):
+        log_settings.LOG_FAILURE_ONLY = True
+        log_settings.LOG_RING_CAPACITY = 5
+
+    def test_debug_dropped_when_passed(self, logger_util, log_settings):
+        """
+        测试通过时DEBUG日志不写入文件
+        """
+        LoggerUtil.set_current_test("tests/test_demo.py::test_ok")
+        logger_util.debug("调试细节")
+        logger_util.info("普通信息")
+        LoggerUtil.set_current_test(None)
+        LoggerUtil.shutdown()
+
+        content = read_log(log_settings.LOG_DIR)
+        assert "普通信息" in content
+        assert "调试细节" not in content
+
+    def test_flush_on_failure(self, logger_util, log_settings):
+        """
+        测试失败时写出缓冲区中最近的DEBUG日志，超出容量的旧记录被丢弃
+        """
+        LoggerUtil.set_current_test("tests/test_demo.py::test_fail")
+        for i in range(10):
+            logger_util.debug("调试%d", i)
+        text = LoggerUtil.flush_failure_context()
+        LoggerUtil.shutdown()
+
+        assert [line.rsplit(" | ", 1)[1] for line in text.splitlines()] == [f"调试{i}" for i in range(5, 10)]
+        content = read_log(log_settings.LOG_DIR)
+        assert "调试9" in content
+        assert "调试4" not in content
+        assert LoggerUtil.flush_failure_context() == ""
+
+    def test_flushed_block_merged_in_order(self, logger_util, log_settings, monkeypatch):
+        """
+        测试补写的DEBUG日志在worker文件中排在同一测试之后的INFO日志后面，合并时按窗口恢复时间顺序
+        """
+        monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw0")
+        monkeypatch.setattr(log_settings, "LOG_RUN_ID", "abc123")
+        LoggerUtil.set_current_test("tests/test_demo.py::test_fail")
+        for level, message in (("info", "A"), ("debug", "B"), ("info", "C")):
+            getattr(logger_util, level)(message)
+            time.sleep(0.005)
+        LoggerUtil.flush_failure_context()
+        logger_util.info("D")
+        LoggerUtil.shutdown()
+        LoggerUtil.release_files()
+
+        def messages(text):
+            return [line.rsplit(" | ", 1)[1] for line in text.splitlines()]
+
+        assert messages(read_log(log_settings.LOG_DIR, "pytest_*.gw0-abc123.log")) == ["A", "C", "B", "D"]
+        merged, = merge_worker_logs(log_settings.LOG_DIR, "abc123", reorder_window=5)
+        assert messages(merged.read_text("utf-8")) == ["A", "B", "C", "D"]
+
+    def test_buffered_lazy_message_snapshot(self, logger_util):
+        """
+        测试缓冲区中的延迟消息在记录时求值，失败时写出的是当时的值
+        """
+        state = {"step": 1}
+        LoggerUtil.set_current_test("tests/test_demo.py::test_fail")
+        logger_util.debug(lambda: f"步骤{state['step']}")
+        state["step"] = 2
+        text = LoggerUtil.flush_failure_context()
+
+        assert text.endswith("| 步骤1")
+
+    def test_buffer_cleared_between_tests(self, logger_util):
+        """
+        测试切换测试时清空缓冲区，失败报告中只有当前测试的日志
+        """
+        LoggerUtil.set_current_test("tests/test_demo.py::test_a")
+        logger_util.debug("上一个测试")
+        LoggerUtil.set_current_test("tests/test_demo.py::test_b")
+        logger_util.debug("当前测试")
+
+        text = LoggerUtil.flush_failure_context()
+        assert "当前测试" in text
+        assert "上一个测试" not in text
+
+
+class TestRateLimitLogging:
+    """
+    按调用点限流和去重
+
+    默认关闭；LOG_DEDUP_WINDOW 折叠同一调用点连续重复的相同消息，
+    LOG_RATE_LIMIT 限制同一调用点每个时间窗口内的日志条数，被丢弃的条数以汇总记录输出。
+    """
+
+    @staticmethod
+    def _messages(log_dir):
+        return [line.rsplit(" | ", 1)[1] for line in read_log(log_dir).splitlines()]
+
+    def test_disabled_by_default(self):
+        """
+        测试默认不限流、不去重
+        """
+        settings = Settings()
+        assert settings.LOG_RATE_LIMIT == 0
+        assert settings.LOG_DEDUP_WINDOW == 0
+
+    def test_repeated_messages_kept(self, logger_util, log_settings):
+        """
+        测试关闭时重复的日志全部输出
+        """
+        for _ in range(200):
+            logger_util.info("轮询中")
+        LoggerUtil.shutdown()
+
+        assert self._messages(log_settings.LOG_DIR) == ["轮询中"] * 200
+
+    def test_dedup(self, logger_util, log_settings):
+        """
+        测试连续重复的相同消息折叠为一条汇总，参数不同的消息照常输出
+        """
+        log_settings.LOG_DEDUP_WINDOW = 60
+        for status in ["等待", "等待", "等待", "完成"]:
+            logger_util.info("状态:%s", status)
+        LoggerUtil.shutdown()
+
+        assert self._messages(log_settings.LOG_DIR) == ["状态:等待", "上一条消息重复了 2 次", "状态:完成"]
+
+    def test_dedup_unusual_args(self, logger_util, log_settings):
+        """
+        测试==返回非bool或抛异常、repr出错的参数不会让日志过滤器出错
+        """
+        log_settings.LOG_DEDUP_WINDOW = 60
+
+        class NoBool:
+            def __eq__(self, other):
+                raise TypeError("不能比较")
+
+            def __repr__(self):
+                return "NoBool()"
+
+        class BadRepr:
+            def __repr__(self):
+                raise RuntimeError("repr出错")
+
+            def __str__(self):
+                return "BadRepr"
+
+        for _ in range(2):
+            logger_util.info("%s", NoBool())
+        for _ in range(2):
+            logger_util.info("%s", BadRepr())
+        LoggerUtil.shutdown()
+
+        # 两个调用点，NoBool的重复汇总在关闭时输出
+        assert self._messages(log_settings.LOG_DIR) == [
+            "NoBool()", "BadRepr", "BadRepr", "上一条消息重复了 1 次",
+        ]
+
+    def test_rate_limit(self, logger_util, log_settings):
+        """
+        测试超过每个窗口的条数后丢弃，并在最后输出丢弃条数的汇总
+        """
+        log_settings.LOG_RATE_LIMIT = 3
+        log_settings.LOG_RATE_WINDOW = 60
+        for i in range(10):
+            logger_util.info("第%d次", i)
+        LoggerUtil.shutdown()
+
+        messages = self._messages(log_settings.LOG_DIR)
+        assert messages[:3] == ["第0次", "第1次", "第2次"]
+        assert messages[3:] == ["该调用点在 60.0 秒内超过 3 条，7 条日志被限流丢弃"]
+
+
+class TestLazyInit:
+    """
+    第一次使用时才初始化
+
+    创建 LoggerUtil() 实例不会创建目录、打开文件或启动后台线程，
+    第一次记录日志或调用 get_logger() 时才初始化，多个线程同时第一次使用也只初始化一次。
+    """
+
+    def test_no_side_effects_before_first_log(self, logger_util, log_settings, monkeypatch):
+        """
+        测试创建实例不创建日志目录、不启动线程，第一次记录日志时才创建
+        """
+        log_dir = log_settings.LOG_DIR / "lazy"
+        monkeypatch.setattr(log_settings, "LOG_DIR", log_dir)
+        threads = set(threading.enumerate())
+
+        LoggerUtil()
+        assert not log_dir.exists()
+        assert set(threading.enumerate()) == threads
+
+        LoggerUtil().info("第一条日志")
+        assert log_dir.is_dir()
+        assert set(threading.enumerate()) - threads
+
+    def test_get_logger_initializes(self, logger_util):
+        """
+        测试get_logger()返回已经配置好的日志器
+        """
+        logger = LoggerUtil().get_logger()
+
+        assert logger.name == "pytest_learn"
+        assert logger.handlers
+
+    def test_concurrent_first_use(self, logger_util, log_settings):
+        """
+        测试多个线程同时第一次记录日志时只初始化一次（初始化两次会重复输出日志）
+        """
+        barrier = threading.Barrier(8)
+
+        def worker(number):
+            barrier.wait()
+            LoggerUtil().info("线程%d", number)
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        LoggerUtil.shutdown()
+
+        messages = sorted(line.rsplit(" | ", 1)[1] for line in read_log(log_settings.LOG_DIR).splitlines())
+        assert messages == sorted(f"线程{number}" for number in range(8))
+
+
+class TestLogIndex:
+    """
+    日志索引
+
+    索引按字节偏移定位日志；正在写入的文件增量建立索引时，
+    写了一半的行和之后追加的续行不能丢失。
+    """
+
+    DATE = "2025-01-01"
+
+    @staticmethod
+    def _entry(second, test, message):
+        return f"2025-01-01 10:00:{second:02d}.000 | INFO     | main | {test} | pytest_learn | {message}\n"
+
+    def test_query_by_test(self, tmp_path):
+        """
+        测试按测试用例ID查询，异常堆栈作为所属日志的一部分返回
+        """
+        log = tmp_path / f"pytest_{self.DATE}.log"
+        log.write_text(self._entry(1, "test_a", "甲") + self._entry(2, "test_b", "乙") + "Traceback\n"
+                       + self._entry(3, "test_a", "丙"), encoding="utf-8")
+
+        index = build_index(log)
+
+        assert [entry.decode() for entry in query(log, index, test="test_b")] == [self._entry(2, "test_b", "乙") + "Traceback\n"]
+        assert len(list(query(log, index, test="test_a"))) == 2
+
+    def test_incremental_after_partial_line(self, tmp_path):
+        """
+        测试索引建立时最后一行只写了一半，之后写完并追加了续行，增量建立后能查到完整的日志
+        """
+        log = tmp_path / f"pytest_{self.DATE}.log"
+        first, last = self._entry(1, "test_a", "甲"), self._entry(2, "test_b", "乙")
+        log.write_bytes((first + last[:30]).encode())
+        index = build_index(log)
+        assert index.size == len(first.encode())
+
+        with open(log, "ab") as f:
+            f.write((last[30:] + "Traceback\n").encode())
+        index = build_index(log)
+        assert [entry.decode() for entry in query(log, index, test="test_b")] == [last + "Traceback\n"]
+
+        # 已经完整的日志之后又追加续行
+        with open(log, "ab") as f:
+            f.write("ValueError: 出错了\n".encode())
+        index = build_index(log)
+        assert [entry.decode() for entry in query(log, index, test="test_b")] == [last + "Traceback\nValueError: 出错了\n"]
+        assert [entry.decode() for entry in query(log, index, test="test_a")] == [first]
+
+    def test_query_does_not_save_live_index(self, tmp_path, capsysbinary):
+        """
+        测试命令行查询正在写入的日志文件时只在内存中建立索引，不写索引文件
+        """
+        log = tmp_path / f"pytest_{self.DATE}.log"
+        log.write_text(self._entry(1, "test_a", "甲"), encoding="utf-8")
+        segment = tmp_path / f"pytest_{self.DATE}.1.log"
+        segment.write_text(self._entry(0, "test_a", "旧"), encoding="utf-8")
+
+        log_index_main(["query", "--test", "test_a", str(segment), str(log)])
+
+        assert capsysbinary.readouterr().out.decode() == self._entry(0, "test_a", "旧") + self._entry(1, "test_a", "甲")
+        assert index_path_for(segment).exists()
+        assert not index_path_for(log).exists()
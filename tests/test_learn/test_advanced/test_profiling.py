@@ -0,0 +1,127 @@
+"""
+性能分析示例
+
+本文件介绍项目插件提供的三种性能分析手段，都是按需开启，平时运行测试没有额外开销。
+
+- CPU分析：@pytest.mark.profile 标记或 --profile 选项，用cProfile分析测试的call阶段，
+  保存pstats文件和折叠调用栈（可以用 flamegraph.pl / speedscope 生成火焰图）
+- 内存跟踪：--memory-track 选项，用tracemalloc记录每个测试的内存峰值和留存增长，
+  留存增长过多的测试列为疑似泄漏，并给出分配位置
+- 时间线：--timeline 选项，把测试、fixture、HTTP请求、页面跳转记录为 Chrome Trace Event JSON，
+  在 chrome://tracing 或 https://ui.perfetto.dev 中查看各阶段的先后和耗时
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import json
+
+import pytest
+
+
+def _square_sum(n):
+    return sum(i * i for i in range(n))
+
+
+def _work():
+    return [_square_sum(2000) for _ in range(20)]
+
+
+class TestCpuProfile:
+    """
+    CPU性能分析
+
+    cProfile的结果是"函数 -> 调用者"的统计表，
+    转换为折叠调用栈（每行 "栈底;...;栈顶 自身耗时"）后才能画火焰图。
+    """
+
+    def test_collapsed_stacks(self):
+        """
+        测试折叠调用栈以指定函数为栈底，总耗时等于它的累计耗时
+        """
+        import cProfile
+        import pstats
+
+        from src.utils.profiling import collapse_stats
+
+        profiler = cProfile.Profile()
+        profiler.runcall(_work)
+        stats = pstats.Stats(profiler)
+        root = next(func for func in stats.stats if func[2] == "_work")
+        stacks = collapse_stats(stats, [root])
+
+        assert all(stack.startswith("_work (test_profiling.py:") for stack in stacks)
+        assert any(";_square_sum (test_profiling.py:" in stack for stack in stacks)
+        assert sum(stacks.values()) == pytest.approx(stats.stats[root][3] * 1e6, rel=0.01, abs=20)
+
+
+class TestMemoryTracking:
+    """
+    内存跟踪
+
+    跟踪器包在每个测试的执行过程外面，测试结束后还留着的内存超过阈值时，
+    对比快照列出新增内存最多的分配位置。
+    """
+
+    def test_leak_reported_with_site(self):
+        """
+        测试留存的对象被记录为疑似泄漏，并能定位到分配它的代码行
+        """
+        from types import SimpleNamespace
+
+        from src.plugins.memory_plugin import MemoryTracker, format_size
+
+        tracker = MemoryTracker(config=None)
+        tracker.threshold = 100 * 1024
+        item = SimpleNamespace(nodeid="t.py::test_leak", user_properties=[])
+        retained = []
+        try:
+            protocol = tracker.pytest_runtest_protocol(item, None)
+            next(protocol)
+            retained.extend(bytearray(1024) for _ in range(500))
+            with pytest.raises(StopIteration):
+                protocol.send(None)
+        finally:
+            tracker.pytest_unconfigure(None)
+
+        record, = tracker.records
+        assert record["retained"] >= 500 * 1024
+        assert record["peak"] >= record["retained"]
+        assert item.user_properties == [("memory_retained", record["retained"])]
+        site = record["sites"][0]
+        assert site["size"] >= 500 * 1024
+        assert "test_profiling.py" in site["traceback"][0]
+        assert format_size(site["size"]).endswith("KiB")
+
+
+class TestTimeline:
+    """
+    时间线
+
+    业务代码中可以用 span() 埋点，没有开启 --timeline 时不记录任何内容；
+    xdist并行时每个worker写自己的时间线，结束后合并为一个文件，每个worker一个轨道。
+    """
+
+    def test_span_and_merge(self, tmp_path):
+        """
+        测试记录span并合并两个进程的时间线，每个进程一个轨道
+        """
+        from src.utils.tracing import Span, Tracer, merge_traces
+
+        parts = []
+        for pid, name in ((1, "gw0"), (2, "gw1")):
+            tracer = Tracer(pid, name)
+            with Span(tracer, "GET /users", "http", {"method": "GET"}) as trace:
+                trace.set("status", 200)
+            parts.append(tracer.dump(tmp_path / f"timeline.{name}.json"))
+
+        output = tmp_path / "timeline.json"
+        assert merge_traces(parts, output) == 2
+
+        events = json.loads(output.read_text(encoding="utf-8"))["traceEvents"]
+        spans = [event for event in events if event["ph"] == "X"]
+        tracks = {event["args"]["name"] for event in events if event["name"] == "process_name"}
+        assert {event["pid"] for event in spans} == {1, 2}
+        assert tracks == {"gw0", "gw1"}
+        assert spans[0]["args"] == {"method": "GET", "status": 200}
+        assert spans[0]["dur"] >= 0
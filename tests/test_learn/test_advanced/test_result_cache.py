@@ -0,0 +1,71 @@
+"""
+结果缓存示例
+
+pytest --result-cache 跳过与上次通过时完全相同的测试，报告为 cached。
+
+判断"完全相同"用的是指纹，包括：
+- 测试函数和所在模块中辅助代码的语法树（只改注释、空行或同一文件中的其他测试不影响）
+- 用到的fixture的定义文件和导入的项目模块的内容
+- Python和pytest的版本
+
+测试执行时读取过的数据文件的哈希和指纹一起保存，指纹相同但数据文件变了也会重新运行。
+使用浏览器、网络的测试（见 Settings.RESULT_CACHE_EXCLUDED_*）不缓存，每次都运行。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+
+class TestResultCache:
+    """
+    结果缓存
+
+    指纹只覆盖测试真正依赖的代码，无关的改动不会让缓存失效。
+    """
+
+    def test_fingerprint_scope(self, tmp_path):
+        """
+        测试只改注释或其他测试不影响指纹，改辅助函数、导入的项目模块会改变指纹
+        """
+        from src.utils.result_cache import Fingerprinter
+
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "helper.py").write_text("import requests\nVALUE = 1\n")
+        test_file = tmp_path / "test_demo.py"
+        source = (
+            "from src.helper import VALUE\n\n"
+            "def double(x):\n    return x * 2\n\n"
+            "def test_a():\n    assert double(VALUE) == 2\n\n"
+            "def test_b():\n    assert True\n"
+        )
+
+        def fingerprint(text):
+            test_file.write_text(text)
+            return Fingerprinter(tmp_path).fingerprint(test_file, "test_a", [], ["tmp_path"])
+
+        original, imports = fingerprint(source)
+        assert imports == {"requests"}
+        assert fingerprint("# 注释\n" + source)[0] == original
+        assert fingerprint(source.replace("assert True", "assert 1"))[0] == original
+        assert fingerprint(source.replace("x * 2", "x + x"))[0] != original
+        (tmp_path / "src" / "helper.py").write_text("import requests\nVALUE = 2\n")
+        assert fingerprint(source)[0] != original
+
+    def test_store_checks_data_files(self, tmp_path):
+        """
+        测试指纹相同但读取过的数据文件变化时不使用缓存
+        """
+        from src.utils.result_cache import Fingerprinter, ResultCacheStore
+
+        (tmp_path / "users.json").write_text("[]")
+        fingerprinter = Fingerprinter(tmp_path)
+        store = ResultCacheStore(tmp_path / "cache.json")
+        digest = fingerprinter.digest(tmp_path / "users.json")
+        store.update("t.py::test_a", {"fingerprint": "abc", "data": {"users.json": digest}})
+        store.save()
+
+        loaded = ResultCacheStore(tmp_path / "cache.json")
+        assert loaded.is_valid("t.py::test_a", "abc", fingerprinter)
+        assert not loaded.is_valid("t.py::test_a", "def", fingerprinter)
+        (tmp_path / "users.json").write_text("[{}]")
+        assert not loaded.is_valid("t.py::test_a", "abc", Fingerprinter(tmp_path))
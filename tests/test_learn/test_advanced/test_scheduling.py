@@ -0,0 +1,265 @@
+"""
+按历史耗时调度示例
+
+pytest-xdist 默认按收集顺序把测试分给worker，慢测试如果排在最后，
+其他worker早就空闲了，整体耗时取决于最后那个慢测试。
+
+运行 pytest -n 4 --schedule-by-duration 时：
+1. 运行结束时把每个测试的耗时按EWMA（指数加权移动平均）记入 Settings.DURATION_STORE
+2. 下次运行时包含上一次失败测试的单元最先分配，其余按历史耗时从长到短分配
+3. 同一个测试类的方法是一个工作单元，始终在同一个worker上按顺序执行；
+   @pytest.mark.ordered_group("名称") 可以把多个测试绑在一起
+
+有序分组不依赖 --schedule-by-duration，普通的 pytest -n 4 也不会把同一组拆到不同的worker上。
+
+@author Test Engineer
+@date 2025/01/01
+"""
+
+import pytest
+
+
+class TestDurationScheduling:
+    """
+    按历史耗时调度
+
+    耗时历史只保存每个测试的平滑耗时和失败集合，调度时按工作单元汇总。
+    """
+
+    def test_ewma_and_failed(self, tmp_path):
+        """
+        测试耗时按EWMA更新，失败的测试通过后移除，历史能保存和读取
+        """
+        from src.utils.duration_store import DurationStore
+
+        store = DurationStore(tmp_path / "durations.json", alpha=0.5)
+        store.update("t.py::test_a", 1.0, failed=True)
+        store.update("t.py::test_a", 3.0, failed=False)
+        store.update("t.py::test_b", 0.5, failed=True)
+        store.save()
+
+        loaded = DurationStore(tmp_path / "durations.json")
+        assert loaded.durations["t.py::test_a"] == pytest.approx(2.0)
+        assert loaded.failed == {"t.py::test_b"}
+        assert loaded.estimate("t.py::test_new") == pytest.approx(1.25)
+
+    def test_unit_priority(self, tmp_path):
+        """
+        测试类的方法在同一个单元，失败优先于耗时
+        """
+        from src.plugins.scheduling_plugin import unit_priority, work_unit
+        from src.utils.duration_store import DurationStore
+
+        store = DurationStore(tmp_path / "durations.json")
+        store.update("t.py::TestUI::test_login", 5.0, failed=False)
+        store.update("t.py::TestUI::test_logout", 4.0, failed=False)
+        store.update("t.py::test_fast", 0.01, failed=True)
+
+        assert work_unit("t.py::TestUI::test_login") == "t.py::TestUI"
+        assert work_unit("t.py::test_fast[a::b]") == "t.py::test_fast[a::b]"
+        slow = unit_priority(store, ["t.py::TestUI::test_login", "t.py::TestUI::test_logout"], 0.0)
+        failing = unit_priority(store, ["t.py::test_fast"], 0.0)
+        assert slow == (False, pytest.approx(9.0))
+        assert failing > slow
+
+    @pytest.mark.parametrize("options, expected", [
+        ({}, False),
+        ({"schedule_by_duration": True}, True),
+        ({"record_durations": True}, True),
+        ({"spawn_workers": 2}, True),
+        ({"schedule_by_duration": True, "shard": "1/2"}, False),
+        ({"schedule_by_duration": True, "worker": "127.0.0.1:8765"}, False),
+    ])
+    def test_records_only_when_used(self, options, expected):
+        """
+        测试只有用到耗时历史的运行才更新它，平时运行不会改写耗时历史文件
+        """
+        from types import SimpleNamespace
+
+        from src.plugins.scheduling_plugin import records_durations
+
+        values = {"schedule_by_duration": False, "record_durations": False, "shard": None,
+                  "worker": None, "coordinator": None, "spawn_workers": 0, **options}
+        config = SimpleNamespace(getoption=lambda name, default=None: values[name])
+        assert records_durations(config) is expected
+
+    COLLECTION = [
+        "t.py::test_fast",
+        "t.py::TestSlow::test_a",
+        "t.py::TestSlow::test_b",
+        "t.py::test_mid",
+        "t.py::test_failed",
+    ]
+
+    def _scheduler(self, request, monkeypatch, tmp_path, workers, collection=COLLECTION):
+        from src.plugins.scheduling_plugin import DURATION_STORE, DurationScheduling
+        from src.utils.duration_store import DurationStore
+
+        store = DurationStore(tmp_path / "durations.json")
+        store.update("t.py::test_fast", 0.1, failed=False)
+        store.update("t.py::TestSlow::test_a", 3.0, failed=False)
+        store.update("t.py::TestSlow::test_b", 3.0, failed=False)
+        store.update("t.py::test_mid", 1.0, failed=False)
+        store.update("t.py::test_failed", 0.01, failed=True)
+        monkeypatch.setitem(request.config.stash, DURATION_STORE, store)
+        monkeypatch.setattr(request.config.option, "tx", [f"{workers}*popen"])
+        scheduler = DurationScheduling(request.config)
+        nodes = [_FakeNode(f"gw{index}", tmp_path / "missing.json") for index in range(workers)]
+        for node in nodes:
+            scheduler.add_node(node)
+            scheduler.add_node_collection(node, collection)
+        scheduler.schedule()
+        return scheduler, nodes
+
+    def test_longest_first(self, request, monkeypatch, tmp_path):
+        """
+        测试单元按失败优先、估计耗时最长优先的顺序分配，测试类整体分配
+        """
+        pytest.importorskip("xdist")
+        scheduler, (node,) = self._scheduler(request, monkeypatch, tmp_path, 1)
+
+        for done in range(len(self.COLLECTION)):
+            scheduler.mark_test_complete(node, node.sent[done])
+
+        assert [self.COLLECTION[index] for index in node.sent] == [
+            "t.py::test_failed",
+            "t.py::TestSlow::test_a",
+            "t.py::TestSlow::test_b",
+            "t.py::test_mid",
+            "t.py::test_fast",
+        ]
+
+    def test_crashed_units_requeued(self, request, monkeypatch, tmp_path):
+        """
+        测试崩溃的worker未完成的单元回到队列，由其余的worker继续运行
+        """
+        pytest.importorskip("xdist")
+        # 没有历史的测试按中位数估计，单元比worker多，崩溃时队列中还有单元
+        collection = self.COLLECTION + [f"t.py::test_new{index}" for index in range(6)]
+        scheduler, (first, second) = self._scheduler(request, monkeypatch, tmp_path, 2, collection)
+        lost = list(first.sent)
+
+        assert scheduler.remove_node(first) is not None
+        done = 0
+        while done < len(second.sent):
+            scheduler.mark_test_complete(second, second.sent[done])
+            done += 1
+
+        assert set(lost) <= set(second.sent)
+        assert sorted(second.sent) == list(range(len(collection)))
+
+    def test_other_dist_warns(self, request, monkeypatch):
+        """
+        测试指定了其他 --dist 方式时不替换xdist的调度器，并给出警告
+        """
+        pytest.importorskip("xdist")
+        from src.plugins.scheduling_plugin import pytest_xdist_make_scheduler
+
+        monkeypatch.setattr(request.config.option, "schedule_by_duration", True)
+        monkeypatch.setattr(request.config.option, "dist", "loadfile")
+        issued = []
+        monkeypatch.setattr(request.config, "issue_config_time_warning",
+                            lambda warning, stacklevel: issued.append(warning))
+
+        assert pytest_xdist_make_scheduler(request.config, None) is None
+        assert len(issued) == 1 and "--dist loadfile" in str(issued[0])
+
+    @pytest.mark.ordered_group("demo")
+    def test_ordered_group(self, request):
+        """
+        有序分组的测试是一个单元，测试ID本身不变
+        """
+        from src.plugins.scheduling_plugin import GROUP_PREFIX, item_work_unit, ordered_group
+
+        assert ordered_group(request.node) == "demo"
+        assert item_work_unit(request.node) == GROUP_PREFIX + "demo"
+        assert request.node.nodeid.endswith("::TestDurationScheduling::test_ordered_group")
+
+
+class _FakeNode:
+    """调度器测试用的worker节点，只记录分配到的测试位置"""
+
+    def __init__(self, name, groups_file):
+        from types import SimpleNamespace
+
+        self.gateway = SimpleNamespace(id=name)
+        self.workerinput = {"workerid": name, "ordered_groups_file": str(groups_file)}
+        self.shutting_down = False
+        self.sent = []
+
+    def send_runtest_some(self, indexes):
+        self.sent.extend(indexes)
+
+    def shutdown(self):
+        self.shutting_down = True
+
+
+class TestOrderedGroupScheduling:
+    """
+    -n 运行时保证有序分组
+
+    xdist的主进程只拿到测试ID，有序分组由worker写到文件里交给调度器。
+    """
+
+    COLLECTION = [
+        "t.py::TestApi::test_login",
+        "t.py::test_a",
+        "t.py::TestApi::test_query",
+        "t.py::test_b",
+        "t.py::test_c",
+    ]
+
+    def _schedule(self, request, monkeypatch, tmp_path, groups=True):
+        from src.plugins.scheduling_plugin import GROUP_PREFIX, DeferredScheduling, write_ordered_groups
+
+        # 调度器按 --tx 确定等待几个worker的收集结果
+        monkeypatch.setattr(request.config.option, "tx", ["2*popen"])
+        groups_file = tmp_path / "gw0.json"
+        if groups:
+            group = GROUP_PREFIX + "t.py::TestApi"
+            write_ordered_groups(groups_file, {"t.py::TestApi::test_login": group, "t.py::TestApi::test_query": group})
+        scheduler = DeferredScheduling(request.config)
+        nodes = [_FakeNode("gw0", groups_file), _FakeNode("gw1", groups_file)]
+        for node in nodes:
+            scheduler.add_node(node)
+            scheduler.add_node_collection(node, self.COLLECTION)
+        scheduler.schedule()
+        return scheduler.scheduler, [[self.COLLECTION[index] for index in node.sent] for node in nodes]
+
+    def test_group_kept_together(self, request, monkeypatch, tmp_path):
+        """
+        测试默认的 -n 运行中有序分组整体分给一个worker并保持顺序，其余测试逐个分配
+        """
+        pytest.importorskip("xdist")
+        from src.plugins.scheduling_plugin import OrderedGroupScheduling
+
+        scheduler, assigned = self._schedule(request, monkeypatch, tmp_path)
+
+        assert isinstance(scheduler, OrderedGroupScheduling)
+        owner = next(tests for tests in assigned if "t.py::TestApi::test_login" in tests)
+        position = owner.index("t.py::TestApi::test_login")
+        assert owner[position:position + 2] == ["t.py::TestApi::test_login", "t.py::TestApi::test_query"]
+        assert sorted(sum(assigned, [])) == sorted(self.COLLECTION)
+
+    def test_xdist_scheduler_without_groups(self, request, monkeypatch, tmp_path):
+        """
+        测试没有有序分组时使用xdist自己的 LoadScheduling
+        """
+        pytest.importorskip("xdist")
+        from xdist.scheduler import LoadScheduling
+
+        scheduler, assigned = self._schedule(request, monkeypatch, tmp_path, groups=False)
+
+        assert type(scheduler) is LoadScheduling
+        # LoadScheduling 先给每个worker发一部分，其余的等worker完成后再发
+        pending = [self.COLLECTION[index] for index in scheduler.pending]
+        assert sorted(sum(assigned, []) + pending) == sorted(self.COLLECTION)
+
+    def test_missing_groups_file(self, tmp_path):
+        """
+        测试读不到有序分组文件（如远程的worker）时退化为逐个分配
+        """
+        from src.plugins.scheduling_plugin import read_ordered_groups
+
+        assert read_ordered_groups(str(tmp_path / "missing.json")) == {}
+        assert read_ordered_groups(None) == {}
@@ -211,3 +211,68 @@ class TestMultipleParametrize:
         # 验证结果
         assert isinstance(result, int)
         assert result > 0
+
+
+class TestParametrizeFromFile:
+    """
+    从数据文件参数化
+
+    数据量很大时不适合直接写在parametrize里，可以使用项目插件提供的
+    parametrize_from_file 标记从 data/ 下的数据文件读取，
+    每条数据在测试执行时才通过 data_row fixture 读取。
+    """
+
+    @pytest.mark.parametrize_from_file("test_cases/add_cases.jsonl", id_field="name")
+    def test_add_from_jsonl(self, data_row):
+        """
+        测试从JSON-lines文件读取数据
+
+        每行一条数据，测试ID使用name字段。
+        """
+        assert data_row["a"] + data_row["b"] == data_row["expected"]
+
+    @pytest.mark.parametrize_from_file("test_cases/login_cases.csv")
+    def test_login_from_csv(self, data_row):
+        """
+        测试从CSV文件读取数据
+
+        CSV的值都是字符串，测试ID为 row0、row1 ...
+        """
+        if not data_row["username"]:
+            expected = "username_required"
+        elif not data_row["password"]:
+            expected = "password_required"
+        else:
+            expected = "success"
+        assert data_row["expected"] == expected
+
+    @pytest.mark.parametrize_from_file("test_cases/users.json", id_field="name")
+    def test_users_from_json(self, data_row):
+        """
+        测试从JSON数组文件读取数据
+
+        数组的每个元素为一条数据。
+        """
+        assert data_row["id"] > 0
+        assert isinstance(data_row["name"], str)
+
+    @pytest.mark.parametrize("name, field", [
+        ("add_cases.jsonl", "name"),
+        ("login_cases.csv", "username"),
+        ("users.json", "name"),
+    ])
+    def test_ids_read_in_one_scan(self, name, field, monkeypatch):
+        """
+        测试收集时在同一次扫描中取出测试ID字段，不为每条数据重新读取文件
+        """
+        from src.config.settings import Settings
+        from src.utils.data_rows import RowRef, iter_rows, iter_rows_with_field
+
+        path = Settings().DATA_DIR / "test_cases" / name
+        expected = [row.load()[field] for row in iter_rows(path)]
+
+        def read_again(row):
+            raise AssertionError("收集时不应重新读取数据文件")
+
+        monkeypatch.setattr(RowRef, "read_bytes", read_again)
+        assert [value for _, value in iter_rows_with_field(path, field)] == expected
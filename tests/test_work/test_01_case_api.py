@@ -2,10 +2,12 @@ import pytest
 import requests
 from src.utils.logger import LoggerUtil
 
-# 创建日志实例
+# 创建日志实例（第一次记录日志时才会真正初始化，导入模块时没有开销）
 logger = LoggerUtil()
 
 # 类名+数字编号，执行时会按数字顺序依次执行类里面的用例
+# 方法之间通过类属性传递数据，并行执行时整个类必须在同一个worker上按顺序运行
+@pytest.mark.ordered_group
 class Test01CaseApi:
     # 定义一个类属性
     device_id = ''
@@ -37,7 +39,8 @@ class Test01CaseApi:
         token = response.json()["data"]["access_token"]
         print(f'获取到的token:{token}')
         # 记录token日志，会打印到控制台，同时存入日志文件--logger.py文件中配置
-        logger.info(f'获取到的token:{token}')
+        # 使用%s占位符，只有日志真正输出时才会格式化
+        logger.info('获取到的token:%s', token)
         return token
 
     # 方法名+数字编号，执行时会按数字顺序依次执行用例方法
@@ -153,6 +156,7 @@ class Test01CaseApi:
         }
         # 发送GET请求 等同于 https://172.25.53.92/devapi/terminal/gatherLog/configStr?deviceId=112233
         req = requests.get(url, headers=headers, params=params, verify=False)
-        logger.info(f'获取到的设备配置信息:{req.json()}')
+        # 传入lambda，整段响应只有日志真正输出时才会被格式化（在后台日志线程中执行）
+        logger.info(lambda: f'获取到的设备配置信息:{req.json()}')
         # 验证简单的断言,code是否为200
         assert req.json()["code"] == 200
\ No newline at end of file
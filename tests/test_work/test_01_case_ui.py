@@ -3,6 +3,8 @@ import pytest
 from playwright.sync_api import sync_playwright,Page, expect
 
 
+# 方法之间通过类属性传递数据，并行执行时整个类必须在同一个worker上按顺序运行
+@pytest.mark.ordered_group
 class Test01CaseUI:
     # 定义一个类属性，后续赋值使用
     device_id = ''